@@ -3,7 +3,7 @@ from typing import Any, Dict
 import logging
 
 
-def handler(event: Dict[str, Any], context: Dict[str, Any]) -> Any:
-    response = BitwardenManager().run(event=event)
+def handler(event: Dict[str, Any], context: Any) -> Any:
+    response = BitwardenManager().run(event=event, context=context)
     logging.getLogger().info(response)
     return response
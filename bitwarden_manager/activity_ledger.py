@@ -0,0 +1,115 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from bitwarden_manager.clients.json_store import JsonStore
+
+ACTIVITY_LEDGER_KEY = "activity_ledger.json"
+
+
+def _to_epoch(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def _event_epoch(value: str) -> int:
+    parsed = datetime.fromisoformat(value)
+    return _to_epoch(parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc))
+
+
+# Confirmed members encoded as positions 0..n-1. Each event is resolved to a position with at most two dict probes,
+# so per member state can be kept in flat arrays indexed by position rather than in dicts keyed by id.
+class MemberIndex:
+    def __init__(self, members: List[Dict[str, Any]]) -> None:
+        confirmed = [member for member in members if int(member["status"]) == 2]
+        self.member_ids: List[str] = [member["id"] for member in confirmed]
+        self._by_member_id = {member["id"]: position for position, member in enumerate(confirmed)}
+        self._by_user_id = {str(member["userId"]): position for position, member in enumerate(confirmed)}
+
+    def __len__(self) -> int:
+        return len(self.member_ids)
+
+    def resolve(self, event: Dict[str, Any]) -> int:
+        member_id = event["memberId"]
+        if member_id is not None and member_id in self._by_member_id:
+            return self._by_member_id[member_id]
+        acting_user_id = event["actingUserId"]
+        if acting_user_id is not None and acting_user_id in self._by_user_id:
+            return self._by_user_id[acting_user_id]
+        return -1
+
+    def last_seen(self, events: Iterable[Dict[str, Any]], undated: int) -> Dict[str, int]:
+        # epoch seconds of each member's latest event, events without a date count as seen at undated
+        latest = array("q", bytes(8 * len(self)))
+        for event in events:
+            position = self.resolve(event)
+            if position < 0:
+                continue
+            seen = _event_epoch(event["date"]) if event.get("date") else undated
+            if seen > latest[position]:
+                latest[position] = seen
+        return {member_id: seen for member_id, seen in zip(self.member_ids, latest) if seen}
+
+
+# Last time each member was seen in the events log, stored as epoch seconds to keep the persisted object small.
+# covered_from and checkpoint bound the period of the events log that has been folded into the ledger,
+# so a run only needs to fetch events since the checkpoint to answer inactivity for any duration inside it.
+class ActivityLedger:
+    def __init__(
+        self,
+        store: JsonStore,
+        last_seen: Optional[Dict[str, int]] = None,
+        checkpoint: Optional[int] = None,
+        covered_from: Optional[int] = None,
+    ) -> None:
+        self.store = store
+        self.last_seen: Dict[str, int] = last_seen or {}
+        self.checkpoint = checkpoint
+        self.covered_from = covered_from
+
+    @classmethod
+    def load(cls, store: JsonStore) -> "ActivityLedger":
+        data = store.load()
+        if data is None:
+            return cls(store=store)
+        return cls(
+            store=store,
+            last_seen={str(member_id): int(seen) for member_id, seen in data.get("last_seen", {}).items()},
+            checkpoint=data.get("checkpoint"),
+            covered_from=data.get("covered_from"),
+        )
+
+    def save(self) -> None:
+        self.store.save({"checkpoint": self.checkpoint, "covered_from": self.covered_from, "last_seen": self.last_seen})
+
+    def covers(self, since: datetime) -> bool:
+        return self.checkpoint is not None and self.covered_from is not None and self.covered_from <= _to_epoch(since)
+
+    def record(
+        self,
+        events: Iterable[Dict[str, Any]],
+        members: List[Dict[str, Any]],
+        fetched_from: datetime,
+        fetched_to: datetime,
+    ) -> None:
+        last_seen = MemberIndex(members).last_seen(events, undated=_to_epoch(fetched_to))
+        self.record_last_seen(last_seen=last_seen, members=members, fetched_from=fetched_from, fetched_to=fetched_to)
+
+    def record_last_seen(
+        self,
+        last_seen: Dict[str, int],
+        members: List[Dict[str, Any]],
+        fetched_from: datetime,
+        fetched_to: datetime,
+    ) -> None:
+        # last_seen is the latest activity of each member between fetched_from and fetched_to
+        for member_id, seen in last_seen.items():
+            if seen > self.last_seen.get(member_id, 0):
+                self.last_seen[member_id] = seen
+
+        # members that have left the organisation are dropped so the ledger only grows with the organisation
+        current_ids = {str(member["id"]) for member in members}
+        self.last_seen = {member_id: seen for member_id, seen in self.last_seen.items() if member_id in current_ids}
+
+        if not self.covers(fetched_from):
+            self.covered_from = _to_epoch(fetched_from)
+        self.checkpoint = _to_epoch(fetched_to)
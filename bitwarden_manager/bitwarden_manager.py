@@ -1,22 +1,38 @@
 import json
 import os
+import tempfile
+import time
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 import boto3
 from jsonschema import validate
 
+from bitwarden_manager.activity_ledger import ACTIVITY_LEDGER_KEY
 from bitwarden_manager.clients.aws_secretsmanager_client import AwsSecretsManagerClient
 from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi, BitwardenUserAlreadyExistsException
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient, BitwardenVaultClientLoginError
+from bitwarden_manager.clients.json_store import JsonStore, LocalJsonStore, S3JsonStore
 from bitwarden_manager.clients.s3_client import S3Client
-from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.clients.sqs_client import SqsClient
+from bitwarden_manager.clients.roster_cache import RosterCache
+from bitwarden_manager.clients.user_management_api import ROSTER_CACHE_TTL_SECONDS, UserManagementApi
 from bitwarden_manager.confirm_user import ConfirmUser
-from bitwarden_manager.handlers.offboard_inactive_users import OffboardInactiveUsers
+from bitwarden_manager.deadline import Deadline
+from bitwarden_manager.handlers.offboard_inactive_users import (
+    OFFBOARD_INACTIVE_USERS_PROGRESS_KEY,
+    OffboardInactiveUsers,
+)
+from bitwarden_manager.handlers.onboard_users import OnboardUsers
+from bitwarden_manager.handlers.reconcile_org import ReconcileOrg
+from bitwarden_manager.handlers.refresh_team_mapping import RefreshTeamMapping
+from bitwarden_manager.handlers.remove_users import RemoveUsers
+from bitwarden_manager.handlers.sync_team import SyncTeam
 from bitwarden_manager.offboard_user import OffboardUser
 from bitwarden_manager.onboard_user import OnboardUser
 from bitwarden_manager.export_vault import ExportVault
 from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.team_mapping import TEAM_MAPPING_KEY, TeamMapping
 from bitwarden_manager.temp.list_collection_items import ListCollectionItems
 from bitwarden_manager.temp.list_custom_groups import ListCustomGroups
 from bitwarden_manager.temp.update_collection_external_ids import UpdateCollectionExternalIds
@@ -24,6 +40,11 @@ from bitwarden_manager.update_user_groups import UpdateUserGroups
 from bitwarden_manager.get_user_details import GetUserDetails
 
 
+TEAM_MAPPING_CACHE_TTL_SECONDS = 900.0
+
+# the team mapping of the warm lambda environment and when it expires, so its store is read once per ttl, not per event
+_team_mapping_cache: Optional[Tuple[float, TeamMapping]] = None
+
 # Only one of ["event_name", "path"] may be present in the event object
 event_schema = {
     "$schema": "http://json-schema.org/draft-07/schema#",
@@ -47,22 +68,25 @@ class BitwardenManager:
         self._secretsmanager = AwsSecretsManagerClient(secretsmanager_client=boto3.client("secretsmanager"))
 
         self.__logger = get_bitwarden_logger(extra_redaction_patterns=[self._get_secret("export-encryption-password")])
+        self._rosters = RosterCache(ttl_seconds=ROSTER_CACHE_TTL_SECONDS)
 
     @staticmethod
     def _is_api_gateway_event(event: Dict[str, Any]) -> Any:
         return event.get("path") and "/bitwarden-manager/" in event["path"]
 
-    def run(self, event: Dict[str, Any]) -> Dict[str, Any] | None:
+    def run(self, event: Dict[str, Any], context: Any = None) -> Dict[str, Any] | None:
+        # one roster cache per invocation, shared by the user management client of every record in an SQS batch
+        self._rosters = RosterCache(ttl_seconds=ROSTER_CACHE_TTL_SECONDS)
         if self._is_api_gateway_event(event=event):
             return self._api_run(event=event)
         elif self._is_sqs_event(event=event):
             for record in event["Records"]:
-                self._run(json.loads(record["body"]))
+                self._run(json.loads(record["body"]), context=context)
         else:
-            self._run(event=event)
+            self._run(event=event, context=context)
         return None
 
-    def _run(self, event: Dict[str, Any]) -> None:
+    def _run(self, event: Dict[str, Any], context: Any = None) -> None:
         self.__logger.debug("%s", event)
         validate(instance=event, schema=event_schema)
 
@@ -77,6 +101,16 @@ class BitwardenManager:
                         bitwarden_api=self._get_bitwarden_public_api(),
                         user_management_api=self._get_user_management_api(),
                         bitwarden_vault_client=bitwarden_vault_client,
+                        team_mapping=self._get_team_mapping(),
+                    ).run(event=event)
+
+                case "new_users":
+                    self.__logger.info(f"Handling event {event_name} with OnboardUsers")
+                    OnboardUsers(
+                        bitwarden_api=self._get_bitwarden_public_api(),
+                        user_management_api=self._get_user_management_api(),
+                        bitwarden_vault_client=bitwarden_vault_client,
+                        team_mapping=self._get_team_mapping(),
                     ).run(event=event)
 
                 case "update_user_groups":
@@ -85,6 +119,31 @@ class BitwardenManager:
                         bitwarden_api=self._get_bitwarden_public_api(),
                         user_management_api=self._get_user_management_api(),
                         bitwarden_vault_client=bitwarden_vault_client,
+                        team_mapping=self._get_team_mapping(),
+                    ).run(event=event)
+
+                case "sync_team":
+                    self.__logger.info(f"Handling event {event_name} with SyncTeam")
+                    SyncTeam(
+                        bitwarden_api=self._get_bitwarden_public_api(),
+                        user_management_api=self._get_user_management_api(),
+                        bitwarden_vault_client=bitwarden_vault_client,
+                        team_mapping=self._get_team_mapping(),
+                    ).run(event=event)
+
+                case "reconcile_org":
+                    self.__logger.info(f"Handling event {event_name} with ReconcileOrg")
+                    ReconcileOrg(
+                        bitwarden_api=self._get_bitwarden_public_api(),
+                        user_management_api=self._get_user_management_api(),
+                    ).run(event=event)
+
+                case "refresh_team_mapping":
+                    self.__logger.info(f"Handling event {event_name} with RefreshTeamMapping")
+                    RefreshTeamMapping(
+                        bitwarden_api=self._get_bitwarden_public_api(),
+                        user_management_api=self._get_user_management_api(),
+                        team_mapping=self._get_team_mapping(),
                     ).run(event=event)
 
                 case "export_vault":
@@ -103,6 +162,12 @@ class BitwardenManager:
                         bitwarden_api=self._get_bitwarden_public_api(),
                     ).run(event=event)
 
+                case "remove_users":
+                    self.__logger.info(f"Handling event {event_name} with RemoveUsers")
+                    RemoveUsers(
+                        bitwarden_api=self._get_bitwarden_public_api(),
+                    ).run(event=event)
+
                 case "reinvite_users":
                     self.__logger.info(f"Handling event {event_name} with ReinviteUsers")
                     self.__logger.warning("event reinvite_users has been removed")
@@ -112,6 +177,10 @@ class BitwardenManager:
                     OffboardInactiveUsers(
                         bitwarden_api=self._get_bitwarden_public_api(),
                         bitwarden_vault_client=bitwarden_vault_client,
+                        activity_ledger_store=self._get_backup_bucket_store(ACTIVITY_LEDGER_KEY),
+                        deadline=Deadline.from_context(context),
+                        progress_store=self._get_backup_bucket_store(OFFBOARD_INACTIVE_USERS_PROGRESS_KEY),
+                        sqs_client=SqsClient(),
                     ).run(event=event)
 
                 case "list_custom_groups":
@@ -188,6 +257,31 @@ class BitwardenManager:
             return float(timeout)
         return 20.0
 
+    @staticmethod
+    def _get_backup_bucket_store(key: str) -> Optional[S3JsonStore]:
+        bucket_name = os.environ.get("BITWARDEN_BACKUP_BUCKET")
+        if not bucket_name:
+            return None
+        return S3JsonStore(s3_client=S3Client(), bucket_name=bucket_name, key=key)
+
+    def _get_team_mapping(self) -> TeamMapping:
+        global _team_mapping_cache
+        if _team_mapping_cache is not None and time.monotonic() < _team_mapping_cache[0]:
+            return _team_mapping_cache[1]
+
+        # kept in the backup bucket when there is one, otherwise in the temp dir of the warm lambda environment
+        store: JsonStore = BitwardenManager._get_backup_bucket_store(TEAM_MAPPING_KEY) or LocalJsonStore(
+            path=os.path.join(tempfile.gettempdir(), TEAM_MAPPING_KEY)
+        )
+        try:
+            team_mapping = TeamMapping.load(store)
+        except Exception as e:
+            # the mapping only saves lookups, so an unreadable one leaves every team to live discovery
+            self.__logger.warning(f"Failed to load the team mapping, discovering teams live: {e}")
+            return TeamMapping(store=store)
+        _team_mapping_cache = (time.monotonic() + TEAM_MAPPING_CACHE_TTL_SECONDS, team_mapping)
+        return team_mapping
+
     def _get_bitwarden_public_api(self) -> BitwardenPublicApi:
         return BitwardenPublicApi(
             logger=self.__logger,
@@ -215,4 +309,5 @@ class BitwardenManager:
             logger=self.__logger,
             client_id=self._get_secret("ldap-username"),
             client_secret=self._get_secret("ldap-password"),
+            rosters=self._rosters,
         )
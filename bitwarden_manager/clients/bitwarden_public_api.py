@@ -1,19 +1,50 @@
 import base64
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
 
-from requests import HTTPError, Session
+from requests import HTTPError, Response, Session
 
+from bitwarden_manager.clients.rate_limiter import RateLimiter
+from bitwarden_manager.clients.write_suppression import WriteCounter, unchanged
+from bitwarden_manager.concurrency import TaskResult, run_concurrently
 from bitwarden_manager.user import UmpUser, UserStatus, UserType
 
-
 REQUEST_TIMEOUT_SECONDS = 30
+EVENTS_TIMEOUT_SECONDS = 600.0
+
+RATE_LIMIT_REQUESTS_PER_SECOND = 10.0
+RATE_LIMIT_BURST = 10
+MAX_RATE_LIMIT_RETRIES = 5
+MAX_CONCURRENT_EVENT_WINDOWS = 8
+MAX_CONCURRENT_REMOVALS = 5
+MAX_CONCURRENT_MEMBERSHIP_REQUESTS = 5
 
 LOGIN_URL = "https://identity.bitwarden.eu/connect/token"
 API_URL = "https://api.bitwarden.eu/public"
 
 session = Session()
+rate_limiter = RateLimiter(requests_per_second=RATE_LIMIT_REQUESTS_PER_SECOND, burst=RATE_LIMIT_BURST)
+
+
+def send_rate_limited(method: str, url: str, **kwargs: Any) -> Response:
+    # for requests issued concurrently, waits for the shared rate limiter and retries after a 429
+    attempt = 1
+    while True:
+        rate_limiter.acquire()
+        response = session.request(method, url, timeout=REQUEST_TIMEOUT_SECONDS, **kwargs)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            return response
+        rate_limiter.pause(float(response.headers.get("Retry-After", 60)))
+        attempt += 1
+
+
+def _parse_event_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
 
 class BitwardenUserNotFoundException(Exception):
@@ -28,6 +59,95 @@ class BitwardenAPIException(Exception):
     pass
 
 
+class BitwardenEventsIncompleteException(Exception):
+    pass
+
+
+class BitwardenNotFoundException(Exception):
+    def __init__(self, resource_id: str, message: str) -> None:
+        super().__init__(message)
+        self.resource_id = resource_id
+
+
+# The collection, type and permission changes made to one member during a handler run, so that they are sent
+# together in a single PUT rather than each change fetching the member again and overwriting the last one
+class MemberUpdate:
+    def __init__(self, member: Dict[str, Any]) -> None:
+        self.member = member
+        self.type = member["type"]
+        self.permissions = member["permissions"]
+        self.collections = member.get("collections") or []
+
+    def set_collections(self, collections: List[Dict[str, Any]]) -> None:
+        self.collections = collections
+
+    def set_type(self, member_type: int, permissions: Optional[Dict[str, bool]]) -> None:
+        self.type = member_type
+        self.permissions = permissions
+
+    @property
+    def changed(self) -> bool:
+        return not unchanged(
+            {"type": self.type, "permissions": self.permissions, "collections": self.collections},
+            {
+                "type": self.member["type"],
+                "permissions": self.member["permissions"],
+                "collections": self.member.get("collections") or [],
+            },
+        )
+
+    def body(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "externalId": self.member["externalId"],
+            "resetPasswordEnrolled": self.member["resetPasswordEnrolled"],
+            "permissions": self.permissions,
+            "collections": self.collections,
+        }
+
+
+# Every group in the organisation from one GET /groups, indexed by name and by id. Group names are not unique in
+# Bitwarden so every id listed under a name is kept, in listing order, to let callers detect duplicates.
+class GroupDirectory:
+    def __init__(self, groups: List[Dict[str, Any]]) -> None:
+        self.ids_by_name: Dict[str, List[str]] = {}
+        self.names_by_id: Dict[str, str] = {}
+        for group in groups:
+            self.ids_by_name.setdefault(group.get("name", ""), []).append(group.get("id", ""))
+            self.names_by_id[group.get("id", "")] = group.get("name", "")
+
+    def id_by_name(self, name: str) -> str:
+        ids = self.ids_by_name.get(name)
+        return str(ids[0]) if ids else ""
+
+    def name_by_id(self, group_id: str) -> str:
+        return self.names_by_id.get(group_id, "")
+
+    def ids_for_names(self, names: List[str]) -> Dict[str, str]:
+        # a name listed more than once maps to "duplicate" rather than picking one of its groups
+        return {
+            name: ids[0] if len(ids) == 1 else "duplicate" for name, ids in self.ids_by_name.items() if name in names
+        }
+
+
+# Member ids of every group, loaded in bulk and indexed both ways. Groups whose members could not be fetched are
+# kept in failures so callers can report them instead of treating the group as empty.
+class MembershipIndex:
+    def __init__(self, members_by_group: Dict[str, List[str]], failures: Optional[Dict[str, Exception]] = None) -> None:
+        self.members_by_group = members_by_group
+        self.failures = failures or {}
+        self.groups_by_member: Dict[str, List[str]] = {}
+        for group_id, member_ids in members_by_group.items():
+            for member_id in member_ids:
+                self.groups_by_member.setdefault(member_id, []).append(group_id)
+
+    def members_of(self, group_id: str) -> List[str]:
+        return self.members_by_group.get(group_id, [])
+
+    def groups_of(self, member_id: str) -> List[str]:
+        return self.groups_by_member.get(member_id, [])
+
+
 class BitwardenPublicApi:
 
     bitwarden_access_token = None
@@ -36,9 +156,17 @@ class BitwardenPublicApi:
         self.__logger = logger
         self.__client_secret = client_secret
         self.__client_id = client_id
+        self.__write_counter = WriteCounter()
+        self.__group_directory: Optional[GroupDirectory] = None
+        self.__group_directory_lock = threading.Lock()
 
         self.__fetch_token()
 
+    @property
+    def write_counter(self) -> WriteCounter:
+        # writes sent versus writes skipped because Bitwarden already held the desired state
+        return self.__write_counter
+
     @staticmethod
     def external_id_base64_encoded(id: str) -> str:
         return base64.b64encode(id.encode()).decode("utf-8")
@@ -59,7 +187,7 @@ class BitwardenPublicApi:
         return collections
 
     def __get_user_groups(self, user_id: str) -> List[str]:
-        response = session.get(f"{API_URL}/members/{user_id}/group-ids")
+        response = send_rate_limited("GET", f"{API_URL}/members/{user_id}/group-ids")
         try:
             response.raise_for_status()
         except HTTPError as error:
@@ -67,13 +195,9 @@ class BitwardenPublicApi:
         response_list: List[str] = response.json()
         return response_list
 
-    def __collection_manually_created(self, collection_id: str) -> bool:
-        response = session.get(f"{API_URL}/collections/{collection_id}")
-        try:
-            response.raise_for_status()
-        except HTTPError as error:
-            raise Exception("Failed to get collections", response.content, error) from error
-        external_id: str = response.json().get("externalId", "")
+    @staticmethod
+    def __manually_created(collection: Dict[str, Any]) -> bool:
+        external_id: str = collection.get("externalId", "")
         # All collections created by automation have an external id. Manually created
         # collections _may_ have an external id but we assume that in general they don't
         # since you cannot add one through the UI - only through the API
@@ -124,8 +248,123 @@ class BitwardenPublicApi:
         return str(self.get_user_by_external_id(external_id=external_id)["id"])
 
     def get_events(
-        self, start_date: str, timeout: float = 600.0, end_date: Optional[str] = None
+        self, start_date: str, timeout: float = EVENTS_TIMEOUT_SECONDS, end_date: Optional[str] = None
     ) -> list[Dict[str, Any]]:
+        return list(self.iter_events(start_date=start_date, timeout=timeout, end_date=end_date))
+
+    def iter_events(
+        self,
+        start_date: str,
+        timeout: float = EVENTS_TIMEOUT_SECONDS,
+        end_date: Optional[str] = None,
+        window_days: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        if window_days:
+            yield from self.iter_events_in_windows(
+                start_date=start_date, window_days=window_days, timeout=timeout, end_date=end_date
+            )
+            return
+
+        for page in self.iter_event_pages(start_date=start_date, timeout=timeout, end_date=end_date):
+            yield from page
+
+    def iter_events_in_windows(
+        self,
+        start_date: str,
+        window_days: int,
+        timeout: float = EVENTS_TIMEOUT_SECONDS,
+        end_date: Optional[str] = None,
+        max_workers: int = MAX_CONCURRENT_EVENT_WINDOWS,
+    ) -> Iterator[Dict[str, Any]]:
+        # each window has its own continuation token chain, so windows are fetched concurrently and yielded as they
+        # complete. Events are therefore not in date order across windows.
+        windows = self.split_into_windows(start_date=start_date, end_date=end_date, window_days=window_days)
+        self.__logger.info(
+            f"Fetching events for time range: {start_date} to {end_date or 'now'} in {len(windows)} windows"
+        )
+        total_events = 0
+        for _, events in self.iter_event_windows(windows=windows, timeout=timeout, max_workers=max_workers):
+            total_events += len(events)
+            yield from events
+
+        self.__logger.info(
+            f"Successfully fetched {total_events} events for time range: {start_date} to {end_date or 'now'}"
+        )
+
+    def iter_event_windows(
+        self,
+        windows: List[Tuple[str, str]],
+        timeout: float = EVENTS_TIMEOUT_SECONDS,
+        max_workers: int = MAX_CONCURRENT_EVENT_WINDOWS,
+    ) -> Iterator[Tuple[Tuple[str, str], List[Dict[str, Any]]]]:
+        # every window with all of its events, in the order the windows complete
+        deadline = time.time() + timeout
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {
+                executor.submit(self.__get_window_events, start, end, deadline): (start, end) for start, end in windows
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def split_into_windows(start_date: str, end_date: Optional[str], window_days: int) -> List[Tuple[str, str]]:
+        start = _parse_event_date(start_date)
+        end = _parse_event_date(end_date) if end_date else datetime.now(timezone.utc)
+        windows = []
+        while start < end:
+            window_end = min(start + timedelta(days=window_days), end)
+            # the events API treats end as inclusive, stop just short of the next window
+            inclusive_end = window_end if window_end == end else window_end - timedelta(milliseconds=1)
+            windows.append((start.isoformat(), inclusive_end.isoformat()))
+            start = window_end
+        return windows
+
+    def __get_window_events(self, start: str, end: str, deadline: float) -> List[Dict[str, Any]]:
+        # a window cut short by the deadline would read as inactivity, so it fails rather than returning part of it
+        events: List[Dict[str, Any]] = []
+        continuation_token = None
+        while True:
+            if time.time() >= deadline:
+                raise BitwardenEventsIncompleteException(
+                    f"Ran out of time fetching events for window: {start} to {end}"
+                )
+            page, continuation_token = self.get_event_page(
+                start_date=start, end_date=end, continuation_token=continuation_token
+            )
+            events.extend(page)
+            if not continuation_token:
+                break
+
+        self.__logger.debug(f"Retrieved {len(events)} events for window: {start} to {end}")
+        return events
+
+    @staticmethod
+    def get_event_page(
+        start_date: str, end_date: Optional[str] = None, continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # one page of events and the token for the next one, callers that checkpoint their progress page by page
+        # keep the token rather than holding a generator open
+        params = {"start": start_date}
+        if end_date:
+            params["end"] = end_date
+        if continuation_token:
+            params["continuationToken"] = continuation_token
+
+        response = send_rate_limited("GET", f"{API_URL}/events", params=params)
+        try:
+            response.raise_for_status()
+        except HTTPError as error:
+            raise Exception("Failed to retrieve events report", response.content, error) from error
+
+        response_json: Dict[str, Any] = response.json()
+        return list(response_json["data"]), response_json.get("continuationToken") or None
+
+    def iter_event_pages(
+        self, start_date: str, timeout: float = EVENTS_TIMEOUT_SECONDS, end_date: Optional[str] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
         # get_events_for_range (start_date, end_date=None)
         # https://github.com/bitwarden-labs/events-public-api-client/blob/main/main.py
         params = {"start": start_date}
@@ -133,7 +372,7 @@ class BitwardenPublicApi:
             params["end"] = end_date
 
         self.__logger.info(f"Fetching events for time range: {start_date} to {end_date or 'now'}")
-        events: list[Any] = []
+        total_events = 0
         continuation_token = None
         page = 1
         base_url = f"{API_URL}/events"
@@ -161,21 +400,27 @@ class BitwardenPublicApi:
             except HTTPError as error:
                 raise Exception("Failed to retrieve events report", response.content, error) from error
 
-            events = [*events, *response.json()["data"]]
-            self.__logger.info(f"Retrieved {len(events)} total events")
+            response_json: Dict[str, Any] = response.json()
+            events: List[Dict[str, Any]] = response_json["data"]
+            total_events += len(events)
+            self.__logger.info(f"Retrieved {total_events} total events")
+            yield events
 
-            continuation_token = response.json().get("continuationToken", None)
+            continuation_token = response_json.get("continuationToken", None)
             if not continuation_token:
                 break
 
             page += 1
+        else:
+            # stopping here would read as inactivity for every member whose events were not reached
+            raise BitwardenEventsIncompleteException(
+                f"Ran out of time fetching events for time range: {start_date} to {end_date or 'now'}"
+            )
 
         self.__logger.info(
-            f"Successfully fetched {len(events)} events for time range: {start_date} to {end_date or 'now'}"
+            f"Successfully fetched {total_events} events for time range: {start_date} to {end_date or 'now'}"
         )
 
-        return events
-
     def __fetch_token(self) -> str:
         if self.bitwarden_access_token is None:
             response = session.post(
@@ -200,6 +445,8 @@ class BitwardenPublicApi:
 
     def __get_collection(self, collection_id: str) -> Dict[str, Any]:
         response = session.get(f"{API_URL}/collections/{collection_id}")
+        if response.status_code == 404:
+            raise BitwardenNotFoundException(collection_id, f"Collection {collection_id} not found")
         try:
             response.raise_for_status()
         except HTTPError as error:
@@ -207,13 +454,6 @@ class BitwardenPublicApi:
         response_json: Dict[str, str] = response.json()
         return response_json
 
-    def __get_collection_groups(self, collection_id: str) -> set[str]:
-        group_ids = {group.get("id", "") for group in self.__get_collection(collection_id).get("groups", "")}
-        return group_ids
-
-    def __get_collection_external_id(self, collection_id: str) -> str:
-        return str(self.__get_collection(collection_id).get("externalId", ""))
-
     def __list_collections(self) -> List[Dict[str, Any]]:
         response = session.get(f"{API_URL}/collections")
         try:
@@ -231,7 +471,8 @@ class BitwardenPublicApi:
         return pending
 
     def invite_user(self, user: UmpUser) -> str:
-        response = session.post(
+        response = send_rate_limited(
+            "POST",
             f"{API_URL}/members",
             json={
                 "type": UserType.REGULAR_USER,
@@ -241,7 +482,6 @@ class BitwardenPublicApi:
                 "email": user.email,
                 "collections": [],
             },
-            timeout=REQUEST_TIMEOUT_SECONDS,
         )
         try:
             response.raise_for_status()
@@ -266,8 +506,18 @@ class BitwardenPublicApi:
         except HTTPError as error:
             raise Exception(f"Failed to reinvite {username}", response.content, error) from error
 
-    def grant_can_manage_permission_to_team_collections(self, user: UmpUser, teams: List[str]) -> None:
-        collections = self.list_existing_collections(teams=teams)
+    def grant_can_manage_permission_to_team_collections(
+        self,
+        user: UmpUser,
+        teams: List[str],
+        collections: Optional[Dict[str, Dict[str, Any]]] = None,
+        member_update: Optional[MemberUpdate] = None,
+    ) -> None:
+        # with a member_update the change is only recorded, and written when the caller calls update_member
+        if collections is None:
+            collections = self.list_existing_collections(teams=teams)
+        else:
+            collections = {team: collections[team] for team in teams if team in collections}
         assign_collections = []
         _can_manage_collections = []
         for key, value in collections.items():
@@ -287,34 +537,25 @@ class BitwardenPublicApi:
         if len(assign_collections) == 0:
             return
 
-        bw_user = self.get_user_by_email(email=str(user.email))
+        update = member_update or self.get_member_update(email=str(user.email))
+        bw_user = update.member
         bw_user_collections = self.__get_user_collections(bw_user.get("collections", []))
         for bw_user_collection in bw_user_collections:
-            if self.__collection_manually_created(bw_user_collection["id"]):
+            if self.__manually_created(bw_user_collection):
                 assign_collections.append(
                     next(item for item in bw_user.get("collections", []) if item["id"] == bw_user_collection["id"])
                 )
 
-        response = session.put(
-            f"{API_URL}/members/{bw_user['id']}",
-            json={
-                "type": bw_user["type"],
-                "externalId": bw_user["externalId"],
-                "resetPasswordEnrolled": bw_user["resetPasswordEnrolled"],
-                "permissions": bw_user["permissions"],
-                "collections": assign_collections,
-            },
-            timeout=REQUEST_TIMEOUT_SECONDS,
-        )
-        try:
-            response.raise_for_status()
-        except HTTPError as error:
-            raise Exception('Failed to grant "can manage" permission to user', response.content, error) from error
+        update.set_collections(assign_collections)
+        if member_update is None:
+            self.update_member(update)
 
         self.__logger.info(f'User has been granted "can manage" permissions to collections: {_can_manage_collections}')
 
-    def assign_custom_permissions_to_platsec_user(self, user: UmpUser, teams: List[str]) -> None:
-        bw_user = self.get_user_by_email(email=str(user.email))
+    def assign_custom_permissions_to_platsec_user(
+        self, user: UmpUser, teams: List[str], member_update: Optional[MemberUpdate] = None
+    ) -> None:
+        update = member_update or self.get_member_update(email=str(user.email))
         permissions = {
             "accessEventLogs": True,
             "accessImportExport": False,
@@ -329,24 +570,30 @@ class BitwardenPublicApi:
             "manageResetPassword": True,
             "manageScim": False,
         }
-        if user.is_a_support_admin(teams, bw_user["type"]):
-            response = session.put(
-                f"{API_URL}/members/{bw_user['id']}",
-                json={
-                    "type": 4,
-                    "permissions": permissions,
-                },
-                timeout=REQUEST_TIMEOUT_SECONDS,
-            )
-            try:
-                response.raise_for_status()
-            except HTTPError as error:
-                raise Exception(
-                    "Failed to grant custom permissions to PlatSec user", response.content, error
-                ) from error
+        if user.is_a_support_admin(teams, update.member["type"]):
+            update.set_type(member_type=UserType.CUSTOM, permissions=permissions)
+            if member_update is None:
+                self.update_member(update)
 
         self.__logger.info(f"PlatSec user {user.username} has been granted custom permissions")
 
+    def get_member_update(self, email: str) -> MemberUpdate:
+        return MemberUpdate(self.get_user_by_email(email=email))
+
+    def update_member(self, update: MemberUpdate) -> None:
+        # one PUT carrying every change recorded on the update, nothing is sent when nothing changed
+        if not update.changed:
+            self.__write_counter.record_suppressed()
+            return
+        self.__write_counter.record_sent()
+        response = send_rate_limited("PUT", f"{API_URL}/members/{update.member['id']}", json=update.body())
+        try:
+            response.raise_for_status()
+        except HTTPError as error:
+            raise Exception(
+                f"Failed to update member {update.member['externalId']}", response.content, error
+            ) from error
+
     def remove_user(self, username: str) -> None:
         try:
             uid = self.fetch_user_id_by_external_id(external_id=username)
@@ -370,30 +617,59 @@ class BitwardenPublicApi:
         except HTTPError as error:
             raise BitwardenAPIException(f"Failed to delete user {username}", response.content, error) from error
 
-    def get_groups(self) -> Dict[str, str]:
-        response = session.get(f"{API_URL}/groups", timeout=REQUEST_TIMEOUT_SECONDS)
+    def remove_users_by_id(
+        self, users: Dict[str, str], max_workers: int = MAX_CONCURRENT_REMOVALS
+    ) -> List[TaskResult[str, None]]:
+        # users maps member id to username, every removal goes through the shared rate limiter so a bulk
+        # removal runs at the rate the API allows and one failure never stops the others
+        return run_concurrently(
+            lambda user_id: self.__remove_user_rate_limited(user_id=user_id, username=users[user_id]),
+            sorted(users),
+            max_workers=max_workers,
+        )
+
+    def __remove_user_rate_limited(self, user_id: str, username: str) -> None:
+        response = send_rate_limited("DELETE", f"{API_URL}/members/{user_id}")
+        if response.status_code == 404:
+            # a redelivered or resumed removal finds the members it already removed gone
+            self.__logger.info(f"User {username} was already removed from the Bitwarden organisation")
+            return
         try:
             response.raise_for_status()
         except HTTPError as error:
-            raise Exception("Failed to get groups") from error
-        response_json: Dict[str, Any] = response.json()
-        return {group.get("name"): group.get("id") for group in response_json.get("data", [])}
+            raise BitwardenAPIException(f"Failed to delete user {username}", response.content, error) from error
+
+    def get_group_directory(self, error_message: str = "Failed to list groups") -> GroupDirectory:
+        # groups are listed once per client and shared by every lookup until a group is created
+        with self.__group_directory_lock:
+            if self.__group_directory is None:
+                response = session.get(f"{API_URL}/groups", timeout=REQUEST_TIMEOUT_SECONDS)
+                try:
+                    response.raise_for_status()
+                except HTTPError as error:
+                    raise Exception(error_message, response.content, error) from error
+                response_json: Dict[str, Any] = response.json()
+                self.__group_directory = GroupDirectory(list(response_json.get("data", [])))
+            return self.__group_directory
+
+    def get_membership_index(self, max_workers: int = MAX_CONCURRENT_MEMBERSHIP_REQUESTS) -> MembershipIndex:
+        group_ids = list(self.get_group_directory().names_by_id)
+        members_by_group: Dict[str, List[str]] = {}
+        failures: Dict[str, Exception] = {}
+        for result in run_concurrently(self.get_users_in_group, group_ids, max_workers):
+            if result.error is not None:
+                failures[result.item] = result.error
+            else:
+                members_by_group[result.item] = result.value or []
+        self.__logger.info(f"Loaded members of {len(members_by_group)} of {len(group_ids)} groups")
+        return MembershipIndex(members_by_group=members_by_group, failures=failures)
+
+    def get_groups(self) -> Dict[str, str]:
+        directory = self.get_group_directory(error_message="Failed to get groups")
+        return {name: ids[-1] for name, ids in directory.ids_by_name.items()}
 
     def list_existing_groups(self, users_teams: List[str]) -> Dict[str, str]:
-        existing_groups: Dict[str, str] = {}
-        response = session.get(f"{API_URL}/groups")
-        try:
-            response.raise_for_status()
-        except HTTPError as error:
-            raise Exception("Failed to list groups", response.content, error) from error
-        response_json: Dict[str, Any] = response.json()
-        for group in response_json.get("data", {}):
-            if group.get("name", "") in users_teams:
-                if not existing_groups.get(group.get("name")):
-                    existing_groups[group.get("name")] = group.get("id")
-                else:
-                    existing_groups[group.get("name")] = "duplicate"
-        return existing_groups
+        return self.get_group_directory(error_message="Failed to list groups").ids_for_names(users_teams)
 
     def create_group(self, group_name: str, collection_id: str) -> str:
         if len(group_name) == 0 or len(group_name) > 100:
@@ -418,6 +694,7 @@ class BitwardenPublicApi:
             response.raise_for_status()
         except HTTPError as error:
             raise Exception("Failed to create group", response.content, error) from error
+        self.__group_directory = None
         response_json: Dict[str, Any] = response.json()
         return str(response_json.get("id", ""))
 
@@ -429,32 +706,63 @@ class BitwardenPublicApi:
 
         user_group_ids = managed_group_ids + self._user_custom_group_ids(existing_user_group_ids, custom_group_ids)
 
-        if not existing_user_group_ids == user_group_ids:
-            response = session.put(
-                f"{API_URL}/members/{user_id}/group-ids",
-                json={"groupIds": user_group_ids},
-                timeout=REQUEST_TIMEOUT_SECONDS,
+        if unchanged(user_group_ids, existing_user_group_ids):
+            self.__write_counter.record_suppressed()
+        else:
+            self.__write_counter.record_sent()
+            response = send_rate_limited(
+                "PUT", f"{API_URL}/members/{user_id}/group-ids", json={"groupIds": user_group_ids}
             )
             try:
                 response.raise_for_status()
             except HTTPError as error:
                 raise Exception("Failed to associate user to group-ids", response.content, error) from error
 
+    def update_group_members(self, group_id: str, member_ids: List[str]) -> None:
+        # replaces the whole membership of a group, the counterpart of get_users_in_group
+        self.__write_counter.record_sent()
+        response = send_rate_limited("PUT", f"{API_URL}/groups/{group_id}/member-ids", json={"memberIds": member_ids})
+        if response.status_code == 404:
+            raise BitwardenNotFoundException(group_id, f"Group {group_id} not found")
+        try:
+            response.raise_for_status()
+        except HTTPError as error:
+            raise Exception("Failed to update group members", response.content, error) from error
+
+    def update_member_collections(self, member: Dict[str, Any], collections: List[Dict[str, Any]]) -> None:
+        update = MemberUpdate(member)
+        update.set_collections(collections)
+        self.update_member(update)
+
     def update_collection_groups(self, collection_name: str, collection_id: str, group_id: str) -> None:
-        if self.__collection_manually_created(collection_id):
+        self.assign_groups_to_collections([(collection_name, collection_id, group_id)])
+
+    def assign_groups_to_collections(self, assignments: List[Tuple[str, str, str]]) -> None:
+        # (collection_name, collection_id, group_id) assignments are merged per collection, so each collection is read
+        # once and written at most once whatever the number of groups pending for it
+        pending: Dict[str, Tuple[str, Set[str]]] = {}
+        for collection_name, collection_id, group_id in assignments:
+            pending.setdefault(collection_id, (collection_name, set()))[1].add(group_id)
+        for collection_id, (collection_name, group_ids) in pending.items():
+            self.__assign_groups_to_collection(collection_name, collection_id, group_ids)
+
+    def __assign_groups_to_collection(self, collection_name: str, collection_id: str, group_ids: Set[str]) -> None:
+        collection = self.__get_collection(collection_id)
+        if self.__manually_created(collection):
             return
-        group_ids = self.__get_collection_groups(collection_id)
-        if group_id in group_ids:
+        current_group_ids = {group.get("id", "") for group in collection.get("groups") or []}
+        if group_ids <= current_group_ids:
             self.__logger.info(f"Group already assigned to collection: {collection_name}")
+            self.__write_counter.record_suppressed()
             return
-        group_ids.add(group_id)
-        group_json = [{"id": group_id, "readOnly": False} for group_id in group_ids]
+        group_json = [{"id": group_id, "readOnly": False} for group_id in sorted(current_group_ids | group_ids)]
 
+        self.__write_counter.record_sent()
         try:
             put_response = session.put(
                 f"{API_URL}/collections/{collection_id}",
                 json={
-                    "externalId": self.__get_collection_external_id(collection_id),
+                    "externalId": str(collection.get("externalId", "")),
                     "groups": group_json,
                 },
                 timeout=REQUEST_TIMEOUT_SECONDS,
@@ -482,22 +790,39 @@ class BitwardenPublicApi:
         return collections
 
     def collate_user_group_ids(
-        self, teams: List[str], groups: Dict[str, str], collections: Dict[str, Dict[str, Any]]
+        self,
+        teams: List[str],
+        groups: Dict[str, str],
+        collections: Dict[str, Dict[str, Any]],
+        pending_assignments: Optional[List[Tuple[str, str, str]]] = None,
     ) -> List[str]:
+        # given pending_assignments, the collated assignments are left there for the caller to flush in one pass
         groups_ids = []
-        for team in teams:
-            collection = collections.get(team, {})
-            if collection:
-                collection_id = collection.get("id", "")
-            group_id = groups.get(team, "")
-            if "duplicate" not in (group_id, collection_id):
-                if not group_id:
-                    group_id = self.create_group(group_name=team, collection_id=collection_id)
-                if collection_id and group_id:
-                    self.update_collection_groups(team, collection_id, group_id)
-                groups_ids.append(group_id)
-            else:
-                raise Exception(f"There are duplicate groups or collections for {team}")
+        assignments: List[Tuple[str, str, str]] = [] if pending_assignments is None else pending_assignments
+        try:
+            for team in teams:
+                collection = collections.get(team, {})
+                if collection:
+                    collection_id = collection.get("id", "")
+                group_id = groups.get(team, "")
+                if "duplicate" not in (group_id, collection_id):
+                    if not group_id:
+                        group_id = self.create_group(group_name=team, collection_id=collection_id)
+                    if collection_id and group_id:
+                        assignments.append((team, collection_id, group_id))
+                    groups_ids.append(group_id)
+                else:
+                    raise Exception(f"There are duplicate groups or collections for {team}")
+        except Exception as error:
+            # the teams collated before the failure are still assigned, without hiding why collating stopped
+            if pending_assignments is None:
+                try:
+                    self.assign_groups_to_collections(assignments)
+                except Exception as assign_error:
+                    error.add_note(f"Assigning the groups collated before the failure also failed: {assign_error}")
+            raise
+        if pending_assignments is None:
+            self.assign_groups_to_collections(assignments)
         return groups_ids
 
     def get_users_by_group_name(self, group_name: str) -> List[str]:
@@ -511,24 +836,16 @@ class BitwardenPublicApi:
         return users
 
     def get_group_id_by_name(self, group_name: str) -> str:
-        response = session.get(f"{API_URL}/groups/")
-        try:
-            response.raise_for_status()
-        except HTTPError as error:
-            raise Exception("Failed to retrieve groups", response.content, error) from error
-        response_json: Dict[str, Any] = response.json()
-        groups = list(response_json.get("data", []))
-        for group in groups:
-            if group.get("name", "") == group_name:
-                return str(group.get("id", ""))
-        return ""
+        return self.get_group_directory(error_message="Failed to retrieve groups").id_by_name(group_name)
 
     def get_users_in_group(self, group_id: str) -> List[str]:
         # this endpoint just returns a list of user ids
         if not group_id:
             self.__logger.warning("group_id cannot be empty")
             return []
-        response = session.get(f"{API_URL}/groups/{group_id}/member-ids")
+        response = send_rate_limited("GET", f"{API_URL}/groups/{group_id}/member-ids")
+        if response.status_code == 404:
+            raise BitwardenNotFoundException(group_id, f"Group {group_id} not found")
         try:
             response.raise_for_status()
         except HTTPError as error:
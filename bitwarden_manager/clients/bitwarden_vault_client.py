@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Any
 from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
 
 BW_SERVER_URI = "https://vault.bitwarden.eu"
+CLI_CONFIG_DIR = "/tmp/.config"  # nosec B108
 
 
 class BitwardenVaultClientError(Exception):
@@ -36,6 +37,7 @@ class BitwardenVaultClient:
         cli_executable_path: str,
         organisation_id: str,
         cli_timeout: float,
+        cli_config_dir: str = CLI_CONFIG_DIR,
     ) -> None:
         self.__logger = logger
         self.__client_secret = client_secret
@@ -46,6 +48,21 @@ class BitwardenVaultClient:
         self.organisation_id = organisation_id
         self.cli_executable_path = cli_executable_path
         self.cli_timeout = cli_timeout
+        self.cli_config_dir = cli_config_dir
+
+    def for_organisation(self, organisation_id: str) -> "BitwardenVaultClient":
+        # each organisation gets its own CLI profile so that sessions can run side by side
+        return BitwardenVaultClient(
+            logger=self.__logger,
+            client_id=self.__client_id,
+            client_secret=self.__client_secret,
+            password=self.__password,
+            export_enc_password=self.__export_enc_password,
+            cli_executable_path=self.cli_executable_path,
+            organisation_id=organisation_id,
+            cli_timeout=self.cli_timeout,
+            cli_config_dir=f"{CLI_CONFIG_DIR}-{organisation_id}",
+        )
 
     def configure_server(self) -> None:
         self.__logger.info("Attempting to configure vault server")
@@ -287,7 +304,7 @@ class BitwardenVaultClient:
             raise BitwardenVaultClientError(e)
 
     def __get_config_dir(self) -> str:
-        return "/tmp/.config"  # nosec B108
+        return self.cli_config_dir
 
     def get_collection_id_by_name(self, collection_name: str) -> str:
         # Get all collections in the organisation
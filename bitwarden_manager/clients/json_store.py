@@ -0,0 +1,47 @@
+import json
+import os
+from typing import Any, Dict, Optional, Protocol
+
+from bitwarden_manager.clients.s3_client import S3Client
+
+
+class JsonStore(Protocol):
+    def load(self) -> Optional[Dict[str, Any]]: ...
+
+    def save(self, data: Dict[str, Any]) -> None: ...
+
+
+class S3JsonStore:
+    def __init__(self, s3_client: S3Client, bucket_name: str, key: str) -> None:
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        body = self.s3_client.read_object_if_exists(bucket_name=self.bucket_name, key=self.key)
+        return None if body is None else dict(json.loads(body))
+
+    def save(self, data: Dict[str, Any]) -> None:
+        self.s3_client.write_object(bucket_name=self.bucket_name, key=self.key, body=_dumps(data))
+
+
+class LocalJsonStore:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as f:
+            return dict(json.load(f))
+
+    def save(self, data: Dict[str, Any]) -> None:
+        # written beside the target and renamed so a failed write never leaves a truncated document behind
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_dumps(data))
+        os.replace(tmp_path, self.path)
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True)
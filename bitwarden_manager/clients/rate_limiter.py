@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+# Token bucket shared by every thread calling an API. A 429 pauses all callers for the Retry-After period
+# rather than each thread discovering the limit on its own.
+class RateLimiter:
+    def __init__(self, requests_per_second: float, burst: int) -> None:
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.requests_per_second)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
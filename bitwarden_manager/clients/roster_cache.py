@@ -0,0 +1,31 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+# Team rosters mapping username to role, kept for ttl_seconds. Each Lambda invocation has its own, shared by the
+# clients and threads of every event it handles, so a roster is never reused by a later warm Lambda invocation.
+class RosterCache:
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._rosters: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, team: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            cached = self._rosters.get(team)
+            if cached is None:
+                return None
+            expires_at, roster = cached
+            if time.monotonic() >= expires_at:
+                del self._rosters[team]
+                return None
+            return dict(roster)
+
+    def put(self, team: str, roster: Dict[str, str]) -> None:
+        with self._lock:
+            self._rosters[team] = (time.monotonic() + self.ttl_seconds, dict(roster))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rosters.clear()
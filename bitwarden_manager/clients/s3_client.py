@@ -1,8 +1,16 @@
-from typing import IO
+import codecs
+import json
+from typing import IO, Any, Dict, Generator, Iterable, Iterator, List, Optional
 
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 
+READ_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_VALUE_TERMINATORS = _WHITESPACE + ",:]}"
+_JSON_DECODER = json.JSONDecoder()
+
 
 class S3Client:
     def __init__(self) -> None:
@@ -21,5 +29,180 @@ class S3Client:
             raise Exception(f"Failed to read s3://{bucket_name}/{key}", e) from e
         return str(data["Body"].read().decode("utf-8"))
 
+    def read_object_if_exists(self, bucket_name: str, key: str) -> Optional[str]:
+        try:
+            data = self._boto_s3.get_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchKey":
+                return None
+            raise Exception(f"Failed to read s3://{bucket_name}/{key}", e) from e
+        except BotoCoreError as e:
+            raise Exception(f"Failed to read s3://{bucket_name}/{key}", e) from e
+        return str(data["Body"].read().decode("utf-8"))
+
+    def write_object(self, bucket_name: str, key: str, body: str) -> None:
+        try:
+            self._boto_s3.put_object(Bucket=bucket_name, Key=key, Body=body.encode("utf-8"))
+        except (BotoCoreError, ClientError) as e:
+            raise Exception(f"Failed to write s3://{bucket_name}/{key}", e) from e
+
+    def iter_object_chunks(
+        self, bucket_name: str, key: str, chunk_size: int = READ_CHUNK_SIZE
+    ) -> Generator[bytes, None, None]:
+        try:
+            data = self._boto_s3.get_object(Bucket=bucket_name, Key=key)
+        except (BotoCoreError, ClientError) as e:
+            raise Exception(f"Failed to read s3://{bucket_name}/{key}", e) from e
+        body = data["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def iter_json_array(
+        self,
+        bucket_name: str,
+        key: str,
+        array_name: str,
+        chunk_size: int = READ_CHUNK_SIZE,
+        leading_members: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Any]:
+        # yields the items of a top level array one at a time without holding the whole document in memory
+        chunks = self.iter_object_chunks(bucket_name=bucket_name, key=key, chunk_size=chunk_size)
+        try:
+            yield from iter_json_array_items(chunks=chunks, array_name=array_name, leading_members=leading_members)
+        finally:
+            chunks.close()
+
     def file_from_path(self, filepath: str) -> IO[bytes]:
         return open(filepath, "rb")
+
+
+def iter_json_array_items(
+    chunks: Iterable[bytes], array_name: str, leading_members: Optional[Dict[str, Any]] = None
+) -> Iterator[Any]:
+    # members before the array are decoded into leading_members when it is given, and skipped otherwise
+    reader = _JsonChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        raise ValueError(f"JSON document has no '{array_name}' array")
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == array_name:
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.value()
+                if reader.peek() != ",":
+                    reader.expect("]")
+                    return
+                reader.expect(",")
+
+        if leading_members is not None:
+            leading_members[key] = reader.value()
+        else:
+            reader.skip()
+        if reader.peek() != ",":
+            reader.expect("}")
+            raise ValueError(f"JSON document has no '{array_name}' array")
+        reader.expect(",")
+
+
+class _JsonChunkReader:
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._exhausted:
+                return ""
+            self._fill()
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' but found '{found or 'end of document'}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        text = self._scan_value(keep=True)
+        value, end = _JSON_DECODER.raw_decode(text)
+        if end != len(text):
+            raise json.JSONDecodeError("Extra data", text, end)
+        return value
+
+    def skip(self) -> None:
+        self._scan_value(keep=False)
+
+    def _scan_value(self, keep: bool) -> str:
+        # finds the end of the next value in one pass, carrying the scan state across chunks, so a value spanning
+        # many chunks is only decoded once it is complete. Skipped values are never kept or decoded
+        self.peek()
+        parts: List[str] = []
+        depth = 0
+        in_string = False
+        escaped = False
+        start = self._pos
+        index = self._pos
+        while True:
+            buffer = self._buffer
+            while index < len(buffer):
+                char = buffer[index]
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == "\\":
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                        if depth == 0:
+                            index += 1
+                            break
+                elif char == '"':
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                elif char in "]}" and depth > 0:
+                    depth -= 1
+                    if depth == 0:
+                        index += 1
+                        break
+                elif depth == 0 and char in _VALUE_TERMINATORS:
+                    break
+                index += 1
+            else:
+                if not self._exhausted:
+                    if keep:
+                        parts.append(buffer[start:])
+                    self._buffer = ""
+                    self._pos = 0
+                    self._fill()
+                    start = 0
+                    index = 0
+                    continue
+
+            self._pos = index
+            parts.append(buffer[start:index])
+            return "".join(parts) if keep else ""
+
+    def _fill(self) -> None:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            text = self._decoder.decode(chunk)
+        pos = self._pos
+        self._buffer = self._buffer[pos:] + text
+        self._pos = 0
@@ -0,0 +1,33 @@
+import json
+from typing import Any, Dict, List
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# the most entries SQS accepts in one SendMessageBatch call
+SEND_MESSAGE_BATCH_SIZE = 10
+
+
+class SqsClient:
+    def __init__(self) -> None:
+        self._boto_sqs = boto3.client("sqs")
+
+    def send_message(self, queue_url: str, body: Dict[str, Any]) -> None:
+        try:
+            self._boto_sqs.send_message(QueueUrl=queue_url, MessageBody=json.dumps(body))
+        except (BotoCoreError, ClientError) as e:
+            raise Exception(f"Failed to send message to {queue_url}", e) from e
+
+    def send_messages(self, queue_url: str, bodies: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(bodies), SEND_MESSAGE_BATCH_SIZE):
+            end = start + SEND_MESSAGE_BATCH_SIZE
+            batch = bodies[start:end]
+            try:
+                response = self._boto_sqs.send_message_batch(
+                    QueueUrl=queue_url,
+                    Entries=[{"Id": str(index), "MessageBody": json.dumps(body)} for index, body in enumerate(batch)],
+                )
+            except (BotoCoreError, ClientError) as e:
+                raise Exception(f"Failed to send messages to {queue_url}", e) from e
+            if response.get("Failed"):
+                raise Exception(f"Failed to send {len(response['Failed'])} messages to {queue_url}", response["Failed"])
@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import FrozenSet, Iterable, Optional
+
+from bitwarden_manager.clients.json_store import JsonStore
+
+
+# Names of every user management team, kept in memory and in a store for ttl_seconds. The expiry is wall clock time
+# so the copy in the store stays valid for the next process in a warm Lambda container.
+class TeamDirectoryCache:
+    def __init__(self, ttl_seconds: float, store: JsonStore) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._teams: Optional[FrozenSet[str]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            now = time.time()
+            if self._teams is None or now >= self._expires_at:
+                self._teams = None
+                try:
+                    data = self.store.load()
+                except ValueError:
+                    data = None
+                if data is None or now >= float(data.get("expires_at", 0)):
+                    return None
+                self._teams = frozenset(data.get("teams", []))
+                self._expires_at = float(data["expires_at"])
+            return self._teams
+
+    def put(self, teams: Iterable[str]) -> FrozenSet[str]:
+        with self._lock:
+            self._teams = frozenset(teams)
+            self._expires_at = time.time() + self.ttl_seconds
+            self.store.save({"expires_at": self._expires_at, "teams": sorted(self._teams)})
+            return self._teams
+
+    def clear(self) -> None:
+        with self._lock:
+            self._teams = None
+            self._expires_at = 0.0
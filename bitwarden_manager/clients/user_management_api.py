@@ -1,21 +1,66 @@
+import os
+import tempfile
 from logging import Logger
-from typing import Dict, Any, List
+from typing import Dict, Any, FrozenSet, List, Optional
 from urllib.parse import quote
 from requests import get, post, HTTPError, Timeout
 
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.roster_cache import RosterCache
+from bitwarden_manager.clients.team_directory_cache import TeamDirectoryCache
+from bitwarden_manager.concurrency import run_concurrently
+
 # High timeout to handle large team
 # Main lambda timeout at 120 seconds
 REQUEST_TIMEOUT_SECONDS = 30
 
+ROSTER_CACHE_TTL_SECONDS = 300
+TEAM_DIRECTORY_TTL_SECONDS = 3600
+TEAM_DIRECTORY_FILENAME = "ump_team_directory.json"
+MAX_CONCURRENT_ROSTER_REQUESTS = 5
+
 API_URL = "https://user-management-backend-production.tools.tax.service.gov.uk/v2"
 AUTH_URL = "https://user-management-auth-production.tools.tax.service.gov.uk/v1/login"
 
+team_directory_cache = TeamDirectoryCache(
+    ttl_seconds=TEAM_DIRECTORY_TTL_SECONDS,
+    store=LocalJsonStore(path=os.path.join(tempfile.gettempdir(), TEAM_DIRECTORY_FILENAME)),
+)
+
+
+# The rosters of every team indexed by username, so the teams and roles of any user are answered from memory.
+# Teams whose roster could not be fetched are kept in failures rather than appearing empty.
+class UserTeamIndex:
+    def __init__(self, rosters: Dict[str, Dict[str, str]], failures: Optional[Dict[str, Exception]] = None) -> None:
+        self.rosters = rosters
+        self.failures = failures or {}
+        self.roles_by_user: Dict[str, Dict[str, str]] = {}
+        for team, roster in rosters.items():
+            for username, role in roster.items():
+                self.roles_by_user.setdefault(username, {})[team] = role
+
+    def teams_of(self, username: str) -> List[str]:
+        return list(self.roles_by_user.get(username, {}))
+
+    def roles_by_team(self, username: str) -> Dict[str, str]:
+        return dict(self.roles_by_user.get(username, {}))
+
 
 class UserManagementApi:
-    def __init__(self, logger: Logger, client_id: str, client_secret: str) -> None:
+    def __init__(
+        self,
+        logger: Logger,
+        client_id: str,
+        client_secret: str,
+        rosters: Optional[RosterCache] = None,
+        team_directory: Optional[TeamDirectoryCache] = None,
+    ) -> None:
         self.__logger = logger
         self.__client_secret = client_secret
         self.__client_id = client_id
+        # without a shared cache the rosters are only kept by this client
+        self.__rosters = rosters or RosterCache(ttl_seconds=ROSTER_CACHE_TTL_SECONDS)
+        self.__team_directory = team_directory or team_directory_cache
 
     def get_user_teams(self, username: str) -> List[str]:
         user_teams = []
@@ -47,7 +92,47 @@ class UserManagementApi:
         return user_teams
 
     def get_user_role_by_team(self, username: str, team: str) -> str:
+        roster = self.__rosters.get(team)
+        if roster is None or username not in roster:
+            # a cached roster may predate the user joining the team, so a miss is always fetched again
+            roster = self.__fetch_roster(team, timeout_message=f"Failed to get team members of {team} for {username}")
+        if username not in roster:
+            raise Exception(f"{username} is not a member of {team}")
+
+        return roster[username]
+
+    def get_team_members(self, team: str) -> Dict[str, str]:
+        # the whole roster of a team, mapping each member's username to their role in the team
+        return self.__get_roster(team, timeout_message=f"Failed to get team members of {team}")
+
+    def get_user_team_index(self, max_workers: int = MAX_CONCURRENT_ROSTER_REQUESTS) -> UserTeamIndex:
+        # one token is shared by the team listing and every roster not already cached
         bearer = self.__fetch_token()
+        teams = self.__get_teams(bearer=bearer)
+        rosters: Dict[str, Dict[str, str]] = {}
+        failures: Dict[str, Exception] = {}
+        for result in run_concurrently(
+            lambda team: self.__get_roster(
+                team, timeout_message=f"Failed to get team members of {team}", bearer=bearer
+            ),
+            teams,
+            max_workers,
+        ):
+            if result.error is not None:
+                failures[result.item] = result.error
+            else:
+                rosters[result.item] = result.value or {}
+        self.__logger.info(f"Loaded rosters of {len(rosters)} of {len(teams)} teams")
+        return UserTeamIndex(rosters=rosters, failures=failures)
+
+    def __get_roster(self, team: str, timeout_message: str, bearer: Optional[str] = None) -> Dict[str, str]:
+        roster = self.__rosters.get(team)
+        if roster is None:
+            roster = self.__fetch_roster(team, timeout_message=timeout_message, bearer=bearer)
+        return roster
+
+    def __fetch_roster(self, team: str, timeout_message: str, bearer: Optional[str] = None) -> Dict[str, str]:
+        bearer = bearer or self.__fetch_token()
         try:
             response = get(
                 f"{API_URL}/organisations/teams/{quote(team)}/members",
@@ -64,17 +149,17 @@ class UserManagementApi:
         except HTTPError as e:
             raise Exception(f"Failed to get team members of {team}", response.content, e) from e
         except Timeout:
-            raise Exception(f"Failed to get team members of {team} for {username} before the timeout")
+            raise Exception(f"{timeout_message} before the timeout")
 
         response_json: Dict[str, Any] = response.json()
-        roles: List[str] = [m["role"] for m in response_json.get("members", []) if m["username"] == username]
-        if len(roles) == 0:
-            raise Exception(f"{username} is not a member of {team}")
-
-        return roles[0]
+        roster = {m["username"]: m["role"] for m in response_json.get("members", [])}
+        self.__rosters.put(team, roster)
+        return roster
 
     def get_teams(self) -> List[str]:
-        bearer = self.__fetch_token()
+        return self.__get_teams(bearer=self.__fetch_token())
+
+    def __get_teams(self, bearer: str) -> List[str]:
         response = get(
             f"{API_URL}/organisations/teams",
             headers={
@@ -92,6 +177,13 @@ class UserManagementApi:
         response_json: Dict[str, Any] = response.json()
         return [t.get("team") for t in response_json.get("teams", [])]
 
+    def get_team_directory(self) -> FrozenSet[str]:
+        # every team name, cached as the directory rarely changes. Use get_teams when the list must be current
+        teams = self.__team_directory.get()
+        if teams is None:
+            teams = self.__team_directory.put(self.get_teams())
+        return teams
+
     def __fetch_token(self) -> str:
         response = post(
             AUTH_URL,
@@ -0,0 +1,37 @@
+import json
+import threading
+from typing import Any
+
+
+def canonical(value: Any) -> str:
+    # key order and list order are not meaningful to the Bitwarden API, ids and collections are compared as sets
+    return json.dumps(_normalise(value), sort_keys=True)
+
+
+def unchanged(desired: Any, current: Any) -> bool:
+    return canonical(desired) == canonical(current)
+
+
+def _normalise(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _normalise(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_normalise(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    return value
+
+
+# Counts the mutating requests sent to an API and those skipped because the current state already matched,
+# shared by every thread using the same client
+class WriteCounter:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def record_sent(self) -> None:
+        with self._lock:
+            self.sent += 1
+
+    def record_suppressed(self) -> None:
+        with self._lock:
+            self.suppressed += 1
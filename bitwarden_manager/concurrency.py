@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class TaskResult(Generic[T, R]):
+    item: T
+    value: Optional[R] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def run_concurrently(fn: Callable[[T], R], items: Iterable[T], max_workers: int) -> List[TaskResult[T, R]]:
+    # results are returned in the order of items, a failing item never stops the others
+    pending = list(items)
+    if not pending:
+        return []
+
+    results: List[TaskResult[T, R]] = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        futures = [(item, executor.submit(fn, item)) for item in pending]
+        for item, future in futures:
+            try:
+                results.append(TaskResult(item=item, value=future.result()))
+            except Exception as e:
+                results.append(TaskResult(item=item, error=e))
+    return results
@@ -0,0 +1,24 @@
+import time
+from typing import Any, Optional
+
+# left for the work in flight when the deadline is reached and for persisting progress and enqueueing a continuation
+DEFAULT_SAFETY_MARGIN_SECONDS = 60.0
+
+
+class Deadline:
+    def __init__(self, remaining_seconds: float, safety_margin: float = DEFAULT_SAFETY_MARGIN_SECONDS) -> None:
+        self._expires_at = time.monotonic() + remaining_seconds - safety_margin
+
+    @classmethod
+    def from_context(cls, context: Any) -> Optional["Deadline"]:
+        # the Lambda context reports the time left in the invocation, other callers have no deadline
+        get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining_time is None:
+            return None
+        return cls(remaining_seconds=get_remaining_time() / 1000)
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
@@ -1,13 +1,36 @@
 import os
 import tempfile
 
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from jsonschema import validate
+
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
 from bitwarden_manager.clients.s3_client import S3Client
 from datetime import datetime
 
 from bitwarden_manager.redacting_formatter import get_bitwarden_logger
 
+export_vault_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "export_vault",
+        },
+        "organisation_ids": {
+            "type": "array",
+            "description": "The organisations to export concurrently, defaults to the configured organisation",
+            "items": {"type": "string", "pattern": "^[\\w-]+$"},
+            "minItems": 1,
+            "uniqueItems": True,
+        },
+    },
+    "required": ["event_name"],
+}
+
 
 class ExportVault:
     def __init__(self, bitwarden_vault_client: BitwardenVaultClient, s3_client: S3Client):
@@ -16,10 +39,47 @@ class ExportVault:
         self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
 
     def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=export_vault_event_schema)
         self.__logger.info("Creating vault backup.")
 
         backup_name = f"bw_backup_{datetime.now().isoformat()}.json"
         bucket_name = os.environ["BITWARDEN_BACKUP_BUCKET"]
+
+        if "organisation_ids" in event:
+            self.export_organisations(
+                organisation_ids=event["organisation_ids"], bucket_name=bucket_name, backup_name=backup_name
+            )
+            return
+
         with tempfile.NamedTemporaryFile() as backup_file:
             self.bitwarden_vault_client.export_vault(file_path=backup_file.name)
             self.s3_client.write_file_to_s3(bucket_name=bucket_name, filepath=backup_file.name, filename=backup_name)
+
+    def export_organisations(self, organisation_ids: List[str], bucket_name: str, backup_name: str) -> None:
+        self.__logger.info(f"Exporting {len(organisation_ids)} organisations concurrently")
+        errors: List[Exception] = []
+        with ThreadPoolExecutor(max_workers=len(organisation_ids)) as executor:
+            futures = [
+                executor.submit(self._export_organisation, organisation_id, bucket_name, backup_name)
+                for organisation_id in organisation_ids
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+
+        if errors:
+            raise ExceptionGroup("Vault Export Errors: ", errors)
+
+    def _export_organisation(self, organisation_id: str, bucket_name: str, backup_name: str) -> None:
+        client = self.bitwarden_vault_client.for_organisation(organisation_id)
+        try:
+            with tempfile.NamedTemporaryFile() as backup_file:
+                client.export_vault(file_path=backup_file.name)
+                self.s3_client.write_file_to_s3(
+                    bucket_name=bucket_name, filepath=backup_file.name, filename=f"{organisation_id}/{backup_name}"
+                )
+            self.__logger.info(f"Exported organisation {organisation_id}")
+        finally:
+            client.logout()
@@ -1,9 +1,26 @@
-from typing import Dict, List
+from typing import AbstractSet, Any, Dict, List, Optional, Set
 
 
 def missing_collection_names(teams: List[str], existing_collections: Dict[str, Dict[str, str]]) -> List[str]:
     return [team for team in teams if not existing_collections.get(team)]
 
 
-def non_ump_based_group_ids(groups: Dict[str, str], teams: List[str]) -> List[str]:
+def non_ump_based_group_ids(groups: Dict[str, str], teams: AbstractSet[str]) -> List[str]:
     return [id for name, id in groups.items() if name not in teams]
+
+
+def manage_collection_changes(
+    current: List[Dict[str, Any]], desired_ids: Set[str], managed_ids: Set[str]
+) -> Optional[List[Dict[str, Any]]]:
+    # a member's collections with "can manage" granted on desired_ids and revoked on the rest of managed_ids,
+    # or None when they already match. Collections outside managed_ids are left untouched.
+    current_ids = {c.get("id") for c in current if c.get("id") in managed_ids and c.get("manage")}
+    changed_ids = current_ids ^ desired_ids
+    if not changed_ids:
+        return None
+    updated = [c for c in current if c.get("id") not in changed_ids]
+    updated += [
+        {"id": collection_id, "readOnly": False, "hidePasswords": False, "manage": True}
+        for collection_id in sorted(desired_ids - current_ids)
+    ]
+    return updated
@@ -1,13 +1,29 @@
-from typing import Dict, Any, List
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
-from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.activity_ledger import ActivityLedger, MemberIndex
+from bitwarden_manager.clients.bitwarden_public_api import (
+    EVENTS_TIMEOUT_SECONDS,
+    BitwardenEventsIncompleteException,
+    BitwardenPublicApi,
+)
+from bitwarden_manager.clients.json_store import JsonStore
+from bitwarden_manager.clients.sqs_client import SqsClient
+from bitwarden_manager.deadline import Deadline
 
 from jsonschema import validate
 
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
 from bitwarden_manager.redacting_formatter import get_bitwarden_logger
 
+# events can be delivered to the log late, so incremental scans re-read a little before the last checkpoint
+LEDGER_CHECKPOINT_OVERLAP = timedelta(hours=1)
+# removals are sent in chunks so the deadline is checked between them
+REMOVAL_CHUNK_SIZE = 50
+OFFBOARD_INACTIVE_USERS_PROGRESS_KEY = "offboard_inactive_users_progress.json"
+
 offboard_inactive_users_event_schema = {
     "$schema": "http://json-schema.org/draft-07/schema#",
     "type": "object",
@@ -18,25 +34,72 @@ offboard_inactive_users_event_schema = {
             "pattern": "offboard_inactive_users",
         },
         "inactivity_duration": {
+            "oneOf": [
+                {"type": "integer"},
+                {"type": "array", "items": {"type": "integer", "minimum": 1}, "minItems": 1, "uniqueItems": True},
+            ],
+            "description": "The number of days a user must be inactive for to be considered for removal, or a list of "
+            "thresholds to report together where the longest is used for removal",
+        },
+        "event_window_days": {
             "type": "integer",
-            "description": "The number of days a user must be inactive for to be considered for removal",
+            "minimum": 1,
+            "description": "Fetch events concurrently in windows of this many days instead of one sequential scan",
+        },
+        "use_activity_ledger": {
+            "type": "boolean",
+            "description": "Only fetch events since the last run and answer inactivity from the persisted ledger",
+            "default": False,
         },
         "dry_run": {
             "type": "boolean",
             "description": "Report or action the removal of inactive members",
             "default": True,
         },
+        "removal_shard_size": {
+            "type": "integer",
+            "minimum": 1,
+            "description": "Send the removals to the queue as remove_users events of this many members instead of "
+            "removing them in this invocation",
+        },
+        "resume": {
+            "type": "boolean",
+            "description": "Continue the run persisted by a previous invocation that ran out of time",
+            "default": False,
+        },
     },
     "required": ["event_name", "inactivity_duration"],
 }
 
 
+def _cutoff(now: datetime, days: int) -> datetime:
+    # inactivity is measured in whole days from midnight UTC, matching the date the events are fetched from
+    return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _fold_last_seen(last_seen: Dict[str, int], seen_by_member: Dict[str, int]) -> None:
+    for member_id, seen in seen_by_member.items():
+        if seen > last_seen.get(member_id, 0):
+            last_seen[member_id] = seen
+
+
 class OffboardInactiveUsers:
     def __init__(
-        self, bitwarden_api: BitwardenPublicApi, bitwarden_vault_client: BitwardenVaultClient, dry_run: bool = True
+        self,
+        bitwarden_api: BitwardenPublicApi,
+        bitwarden_vault_client: BitwardenVaultClient,
+        dry_run: bool = True,
+        activity_ledger_store: Optional[JsonStore] = None,
+        deadline: Optional[Deadline] = None,
+        progress_store: Optional[JsonStore] = None,
+        sqs_client: Optional[SqsClient] = None,
     ):
         self.bitwarden_api = bitwarden_api
         self.bitwarden_vault = bitwarden_vault_client
+        self.activity_ledger_store = activity_ledger_store
+        self.deadline = deadline
+        self.progress_store = progress_store
+        self.sqs_client = sqs_client
         self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
         self.dry_run = dry_run
 
@@ -46,41 +109,195 @@ class OffboardInactiveUsers:
         if event.get("dry_run") is not None:
             self.dry_run = bool(event.get("dry_run"))
 
-        inactivity_duration: int = event["inactivity_duration"]
+        progress = self._load_progress() if event.get("resume") else None
+        if progress is not None and progress["phase"] == "remove":
+            self.__logger.info(f"Resuming removal of {len(progress['remaining_removals'])} inactive members")
+            self._remove_members(progress["remaining_removals"], event)
+            return
+
+        durations = event["inactivity_duration"]
+        thresholds = sorted(durations) if isinstance(durations, list) else [durations]
+        inactivity_duration = thresholds[-1]
+        now = datetime.fromisoformat(progress["end_date"]) if progress else datetime.now(timezone.utc)
 
         self.__logger.info("Fetching organization members")
         members = self.bitwarden_api.get_users()
 
-        self.__logger.info("Fetching events")
-        events = self.bitwarden_api.get_events(
-            start_date=(datetime.now(timezone.utc) - timedelta(days=event["inactivity_duration"])).strftime("%Y-%m-%d")
-        )
+        # protected members are resolved from the same member list while the events are scanned
+        self.__logger.info("Compiling list of protected members")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            protected_members_future = executor.submit(self._get_protected_users, members)
+            last_seen = self._get_last_seen(
+                members=members, inactivity_duration=inactivity_duration, now=now, event=event, progress=progress
+            )
+            protected_members = protected_members_future.result()
 
-        # these aren't all users so numbers may be off after subtraction, but the result it right
-        self.__logger.info(f"Compiling list of active members for the last {inactivity_duration} days")
-        active_members = self._get_active_member_report(events, members)
+        if last_seen is None:
+            return
 
         all_members: dict[str, str] = {
             str(member["id"]): member["email"] for member in members if int(member["status"]) == 2
         }
 
-        self.__logger.info("Compiling list of protected members")
-        protected_members = self._get_protected_users()
-
         self.__logger.info("Compiling list of inactive members")
-        inactive_members = set(all_members) - set(active_members)
+        inactive_by_threshold = self._get_inactive_by_threshold(thresholds, last_seen, set(all_members), now)
+        inactive_members = inactive_by_threshold[inactivity_duration]
+        active_members = set(all_members) - inactive_members
+
+        if len(thresholds) > 1:
+            for threshold, inactive in inactive_by_threshold.items():
+                self.__logger.info(
+                    f"Inactive for {threshold} days: {len(inactive)} members "
+                    f"{sorted(all_members[member_id] for member_id in inactive)}"
+                )
 
         self.__logger.info(
             f"Total members: {len(all_members)}, Active members: {len(active_members)}, Inactive members: {len(inactive_members)}"  # noqa: E501
         )
 
         self.__logger.info(f"Removing {len(inactive_members)} inactive members from bitwarden")
-        self.offboard_users(inactive_members, all_members, protected_members)
+        self.offboard_users(inactive_members, all_members, protected_members, event=event)
+
+    def _get_last_seen(
+        self,
+        members: List[Dict[str, Any]],
+        inactivity_duration: int,
+        now: datetime,
+        event: Dict[str, Any],
+        progress: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, int]]:
+        window_days = event.get("event_window_days")
+        # one scan over the longest window gives each member's last activity, which answers every shorter threshold
+        if event.get("use_activity_ledger"):
+            return self._get_last_seen_from_ledger(
+                members=members,
+                since=_cutoff(now, inactivity_duration),
+                now=now,
+                window_days=window_days,
+                event=event,
+                progress=progress,
+            )
+
+        start_date = _cutoff(now, inactivity_duration).strftime("%Y-%m-%d")
+        if self._can_continue():
+            return self._scan_events_until_deadline(
+                members=members, start_date=start_date, now=now, event=event, progress=progress, window_days=window_days
+            )
+
+        # events are streamed page by page and folded into the last seen report, they are never held in memory
+        self.__logger.info("Fetching events")
+        events = self.bitwarden_api.iter_events(
+            start_date=start_date, window_days=window_days, timeout=self._scan_timeout()
+        )
+
+        # these aren't all users so numbers may be off after subtraction, but the result it right
+        self.__logger.info(f"Compiling list of active members for the last {inactivity_duration} days")
+        return self._get_last_seen_report(events, members, now)
+
+    def _scan_timeout(self) -> float:
+        # a scan that cannot be continued later still stops, and fails, before the invocation times out
+        return self.deadline.remaining() if self.deadline is not None else EVENTS_TIMEOUT_SECONDS
+
+    def _scan_events_until_deadline(
+        self,
+        members: List[Dict[str, Any]],
+        start_date: str,
+        now: datetime,
+        event: Dict[str, Any],
+        progress: Optional[Dict[str, Any]] = None,
+        window_days: Optional[int] = None,
+    ) -> Optional[Dict[str, int]]:
+        if window_days:
+            return self._scan_windows_until_deadline(
+                members=members,
+                start_date=start_date,
+                now=now,
+                event=event,
+                progress=progress,
+                window_days=window_days,
+            )
+
+        # pages are folded one at a time so the scan can stop at any page boundary and carry on in another invocation
+        last_seen: Dict[str, int] = dict(progress["last_seen"]) if progress else {}
+        continuation_token: Optional[str] = progress["continuation_token"] if progress else None
+        index = MemberIndex(members)
+        self.__logger.info(f"Fetching events for time range: {start_date} to {now.isoformat()}")
+
+        while True:
+            events, continuation_token = self.bitwarden_api.get_event_page(
+                start_date=start_date, end_date=now.isoformat(), continuation_token=continuation_token
+            )
+            _fold_last_seen(last_seen, index.last_seen(events, undated=int(now.timestamp())))
+
+            if not continuation_token:
+                return last_seen
+
+            if self.deadline is not None and self.deadline.expired():
+                self._continue_later(
+                    event,
+                    {
+                        "phase": "scan",
+                        "end_date": now.isoformat(),
+                        "continuation_token": continuation_token,
+                        "last_seen": last_seen,
+                    },
+                )
+                return None
+
+    def _scan_windows_until_deadline(
+        self,
+        members: List[Dict[str, Any]],
+        start_date: str,
+        now: datetime,
+        event: Dict[str, Any],
+        window_days: int,
+        progress: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, int]]:
+        # windows are folded as each one completes, the windows left when time runs out carry on in another invocation
+        last_seen: Dict[str, int] = dict(progress["last_seen"]) if progress else {}
+        remaining: List[Tuple[str, str]] = (
+            [(start, end) for start, end in progress["remaining_windows"]]
+            if progress
+            else BitwardenPublicApi.split_into_windows(
+                start_date=start_date, end_date=now.isoformat(), window_days=window_days
+            )
+        )
+        index = MemberIndex(members)
+        self.__logger.info(
+            f"Fetching events for time range: {start_date} to {now.isoformat()} in {len(remaining)} windows"
+        )
 
-    def offboard_users(self, inactive_users: set[str], all_users: dict[str, str], protected_users: set[str]) -> None:
+        try:
+            for window, events in self.bitwarden_api.iter_event_windows(
+                windows=list(remaining), timeout=self._scan_timeout()
+            ):
+                _fold_last_seen(last_seen, index.last_seen(events, undated=int(now.timestamp())))
+                remaining.remove(window)
+        except BitwardenEventsIncompleteException:
+            self._continue_later(
+                event,
+                {
+                    "phase": "scan",
+                    "end_date": now.isoformat(),
+                    "remaining_windows": [list(window) for window in remaining],
+                    "last_seen": last_seen,
+                },
+            )
+            return None
+
+        return last_seen
+
+    def offboard_users(
+        self,
+        inactive_users: set[str],
+        all_users: dict[str, str],
+        protected_users: set[str],
+        event: Optional[Dict[str, Any]] = None,
+    ) -> None:
         if self.dry_run:
             self.__logger.info(f"DRY RUN: Would have offboarded {len(inactive_users)} users")
 
+        removals: Dict[str, str] = {}
         for user_id in inactive_users:
             if user_id in protected_users:
                 self.__logger.info(f"Skipping protected user {all_users[user_id]}")
@@ -91,14 +308,143 @@ class OffboardInactiveUsers:
 
             else:
                 self.__logger.info(f"Removing user {all_users[user_id]} from bitwarden")
-                self.bitwarden_api.remove_user_by_id(
-                    user_id=user_id,
-                    username=all_users[user_id],
+                removals[user_id] = all_users[user_id]
+
+        shard_size = event.get("removal_shard_size") if event else None
+        if shard_size and removals:
+            self._fan_out_removals(removals, shard_size, event)
+            return
+
+        self._remove_members(removals, event)
+
+    def _fan_out_removals(
+        self, removals: Dict[str, str], shard_size: int, event: Optional[Dict[str, Any]] = None
+    ) -> None:
+        queue_url = os.environ.get("BITWARDEN_MANAGER_QUEUE_URL")
+        if self.sqs_client is None or not queue_url:
+            raise ValueError("An SQS client and BITWARDEN_MANAGER_QUEUE_URL must be configured to shard removals")
+
+        user_ids = sorted(removals)
+        shards: List[Dict[str, str]] = []
+        for start in range(0, len(user_ids), shard_size):
+            end = start + shard_size
+            shards.append({user_id: removals[user_id] for user_id in user_ids[start:end]})
+        self.sqs_client.send_messages(
+            queue_url=queue_url, bodies=[{"event_name": "remove_users", "members": shard} for shard in shards]
+        )
+        self.__logger.info(f"Queued removal of {len(removals)} inactive members in {len(shards)} remove_users events")
+        self._clear_progress(event)
+
+    def _remove_members(self, removals: Dict[str, str], event: Optional[Dict[str, Any]] = None) -> None:
+        if not removals:
+            self._clear_progress(event)
+            return
+
+        pending = sorted(removals)
+        attempted = 0
+        errors: List[Exception] = []
+        while pending:
+            if event is not None and self._can_continue() and self.deadline is not None and self.deadline.expired():
+                self._continue_later(
+                    event,
+                    {"phase": "remove", "remaining_removals": {user_id: removals[user_id] for user_id in pending}},
                 )
+                break
+
+            chunk, pending = pending[:REMOVAL_CHUNK_SIZE], pending[REMOVAL_CHUNK_SIZE:]
+            results = self.bitwarden_api.remove_users_by_id({user_id: removals[user_id] for user_id in chunk})
+            attempted += len(results)
+            for result in results:
+                if result.error is not None:
+                    self.__logger.warning(f"Failed to remove user {removals[result.item]} from bitwarden")
+                    errors.append(result.error)
+        else:
+            self._clear_progress(event)
+
+        self.__logger.info(f"Removed {attempted - len(errors)} of {attempted} inactive members from bitwarden")
+
+        if errors:
+            raise ExceptionGroup("Offboard Inactive Users Errors: ", errors)
+
+    def _can_continue(self) -> bool:
+        return (
+            self.deadline is not None
+            and self.progress_store is not None
+            and self.sqs_client is not None
+            and bool(os.environ.get("BITWARDEN_MANAGER_QUEUE_URL"))
+        )
 
-    def _get_active_member_report(
-        self, events: List[Dict[str, Any]] | None = None, members: List[Dict[str, Any]] | None = None
-    ) -> set[str]:
+    def _load_progress(self) -> Dict[str, Any]:
+        progress = self.progress_store.load() if self.progress_store is not None else None
+        if not progress:
+            raise ValueError("There is no offboarding progress to resume")
+        return progress
+
+    def _continue_later(self, event: Dict[str, Any], progress: Dict[str, Any]) -> None:
+        if self.progress_store is None or self.sqs_client is None:
+            raise ValueError("A progress store and SQS client must be configured to continue a run")
+        self.progress_store.save(progress)
+        self.sqs_client.send_message(queue_url=os.environ["BITWARDEN_MANAGER_QUEUE_URL"], body=dict(event, resume=True))
+        self.__logger.info(f"Running out of time, continuing the {progress['phase']} in another invocation")
+
+    def _clear_progress(self, event: Optional[Dict[str, Any]]) -> None:
+        # a completed resumed run leaves nothing behind for a later resume to pick up
+        if event is not None and event.get("resume") and self.progress_store is not None:
+            self.progress_store.save({})
+
+    def _get_last_seen_from_ledger(
+        self,
+        members: List[Dict[str, Any]],
+        since: datetime,
+        now: datetime,
+        window_days: Optional[int],
+        event: Dict[str, Any],
+        progress: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, int]]:
+        if self.activity_ledger_store is None:
+            raise ValueError("An activity ledger store must be configured to use the activity ledger")
+
+        ledger = ActivityLedger.load(self.activity_ledger_store)
+
+        if ledger.covers(since) and ledger.checkpoint is not None:
+            fetch_from = datetime.fromtimestamp(ledger.checkpoint, timezone.utc) - LEDGER_CHECKPOINT_OVERLAP
+            self.__logger.info(f"Updating activity ledger with events since {fetch_from.isoformat()}")
+        else:
+            fetch_from = since
+            self.__logger.info(f"Rebuilding activity ledger since {since.isoformat()}")
+
+        # the ledger is left as it was until the scan completes, so a resumed run fetches from the same checkpoint
+        if self._can_continue():
+            last_seen = self._scan_events_until_deadline(
+                members=members,
+                start_date=fetch_from.isoformat(),
+                now=now,
+                event=event,
+                progress=progress,
+                window_days=window_days,
+            )
+            if last_seen is None:
+                return None
+            ledger.record_last_seen(last_seen=last_seen, members=members, fetched_from=fetch_from, fetched_to=now)
+        else:
+            events = self.bitwarden_api.iter_events(
+                start_date=fetch_from.isoformat(),
+                end_date=now.isoformat(),
+                window_days=window_days,
+                timeout=self._scan_timeout(),
+            )
+            # a truncated fetch raises while the events are read, so the checkpoint only moves after a full scan
+            ledger.record(events=events, members=members, fetched_from=fetch_from, fetched_to=now)
+        ledger.save()
+
+        return ledger.last_seen
+
+    def _get_last_seen_report(
+        self,
+        events: Iterable[Dict[str, Any]] | None = None,
+        members: List[Dict[str, Any]] | None = None,
+        now: datetime | None = None,
+    ) -> Dict[str, int]:
 
         if events is None:
             raise ValueError("The current list of events must be provided")
@@ -106,43 +452,47 @@ class OffboardInactiveUsers:
         if members is None:
             raise ValueError("The current list of active members must be provided")
 
-        member_ids = {member["id"] for member in members if int(member["status"]) == 2}
-        user_ids = {str(member["userId"]): member["id"] for member in members if int(member["status"]) == 2}
-
-        active = set()
-
-        for event in events:
-            if event["memberId"] is not None and event["memberId"] in member_ids:
-                active.add(event["memberId"])
-                continue
-
-            if event["actingUserId"] is not None and user_ids.get(event["actingUserId"], None) is not None:
-                active.add(user_ids.get(event["actingUserId"]))
-                continue
-
-        return active
-
-    def _get_protected_users(self) -> set[str]:
+        undated = datetime.now(timezone.utc) if now is None else now
+        return MemberIndex(members).last_seen(events, undated=int(undated.timestamp()))
+
+    @staticmethod
+    def _get_inactive_by_threshold(
+        thresholds: List[int], last_seen: Dict[str, int], member_ids: set[str], now: datetime
+    ) -> Dict[int, set[str]]:
+        inactive_by_threshold = {}
+        for threshold in thresholds:
+            since = int(_cutoff(now, threshold).timestamp())
+            inactive_by_threshold[threshold] = {
+                member_id for member_id in member_ids if last_seen.get(member_id, 0) < since
+            }
+        return inactive_by_threshold
+
+    def _get_protected_users(self, members: List[Dict[str, Any]] | None = None) -> set[str]:
         # we are looking for all members that have access to the Root collection.
         # also members that are in the MDTP Platform Owners group
+        # the CLI collection lookup and the group lookups don't depend on each other so they run together
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            root_collection_future = executor.submit(self.bitwarden_vault.get_collection_id_by_name, "Root")
+            owners_future = executor.submit(self.bitwarden_api.get_users_by_group_name, "MDTP Platform Owners")
+            authorisers_future = executor.submit(self.bitwarden_api.get_users_by_group_name, "AWS Account Authorisers")
 
-        # get the Root collection id
-        root_collection_id = self.bitwarden_vault.get_collection_id_by_name("Root")
-        self.__logger.info(f"Root collection id: {root_collection_id}")
+            if members is None:
+                members = self.bitwarden_api.get_users()
 
-        users = set()
-        for user in self.bitwarden_api.get_users():
-            if len(user["collections"]) == 0:
-                continue
+            root_collection_id = root_collection_future.result()
+            self.__logger.info(f"Root collection id: {root_collection_id}")
+
+            users = set()
+            for user in members:
+                for user_collection in user.get("collections") or []:
+                    if user_collection["id"] == root_collection_id:
+                        users.add(user["userId"])
 
-            for user_collection in user["collections"]:
-                if user_collection["id"] == root_collection_id:
-                    users.add(user["userId"])
+            self.__logger.info(f"Root Collection Protected users: {len(users)}")
+            # and get all members of the MDTP Platform Owners group
+            owners = owners_future.result()
+            authorisers = authorisers_future.result()
 
-        self.__logger.info(f"Root Collection Protected users: {len(users)}")
-        # and get all members of the MDTP Platform Owners group
-        owners = self.bitwarden_api.get_users_by_group_name("MDTP Platform Owners")
-        authorisers = self.bitwarden_api.get_users_by_group_name("AWS Account Authorisers")
         protected = set(users) | set(owners) | set(authorisers)
         self.__logger.info(f"Protected users: {len(protected)}")
         return protected
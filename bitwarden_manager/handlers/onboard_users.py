@@ -0,0 +1,223 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from jsonschema import validate
+
+import bitwarden_manager.groups_and_collections as GroupsAndCollections
+from bitwarden_manager.clients.bitwarden_public_api import (
+    BitwardenNotFoundException,
+    BitwardenPublicApi,
+    BitwardenUserNotFoundException,
+    MemberUpdate,
+)
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.concurrency import run_concurrently
+from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.team_mapping import TeamMapping, get_groups_and_collections, rediscover_when_not_found
+from bitwarden_manager.user import UmpUser
+
+MAX_CONCURRENT_ONBOARDINGS = 5
+
+onboard_users_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "new_users",
+        },
+        "users": {
+            "type": "array",
+            "description": "The users to onboard, sharing one snapshot of groups, collections and teams",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "username": {"type": "string", "description": "the users ldap username"},
+                    "email": {
+                        "type": "string",
+                        "pattern": "^(.+)@(.+)$",
+                        "description": "The users full work email address",
+                    },
+                },
+                "required": ["username", "email"],
+            },
+            "minItems": 1,
+        },
+    },
+    "required": ["event_name", "users"],
+}
+
+
+class OnboardUsers:
+    def __init__(
+        self,
+        bitwarden_api: BitwardenPublicApi,
+        user_management_api: UserManagementApi,
+        bitwarden_vault_client: BitwardenVaultClient,
+        max_workers: int = MAX_CONCURRENT_ONBOARDINGS,
+        team_mapping: Optional[TeamMapping] = None,
+    ):
+        self.bitwarden_api = bitwarden_api
+        self.user_management_api = user_management_api
+        self.bitwarden_vault_client = bitwarden_vault_client
+        self.team_mapping = team_mapping
+        self.max_workers = max_workers
+        self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
+
+    def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=onboard_users_event_schema)
+        users = self._new_users(event["users"])
+        if not users:
+            self.__logger.info("All users already exist in bitwarden")
+            return
+
+        self.__logger.info(f"Onboarding {len(users)} users to bitwarden")
+        errors: List[Exception] = []
+        ump_users: List[Tuple[UmpUser, List[str]]] = []
+        for lookup in run_concurrently(self._get_ump_user, users, max_workers=self.max_workers):
+            if lookup.error is not None:
+                self.__logger.warning(f"Failed to acquire teams for user {lookup.item['username']}: {lookup.error}")
+                errors.append(lookup.error)
+            elif lookup.value is not None:
+                ump_users.append(lookup.value)
+
+        # the directory is read, and missing collections and groups created, once for the whole batch
+        teams = sorted({team for _, user_teams in ump_users for team in user_teams})
+        group_ids, collections, team_errors = rediscover_when_not_found(
+            self.team_mapping, lambda: self._prepare_teams(teams)
+        )
+        custom_group_ids = GroupsAndCollections.non_ump_based_group_ids(
+            groups=self.bitwarden_api.get_groups(), teams=self.user_management_api.get_team_directory()
+        )
+
+        invites = run_concurrently(
+            lambda ump_user: self._invite(
+                user=ump_user[0],
+                teams=ump_user[1],
+                group_ids=group_ids,
+                team_errors=team_errors,
+                custom_group_ids=custom_group_ids,
+            ),
+            ump_users,
+            max_workers=self.max_workers,
+        )
+        invited: List[Tuple[UmpUser, List[str], str]] = []
+        for invite in invites:
+            if invite.error is not None:
+                self.__logger.warning(f"Failed to onboard user {invite.item[0].username} to bitwarden: {invite.error}")
+                errors.append(invite.error)
+            elif invite.value is not None:
+                invited.append((invite.item[0], invite.item[1], invite.value))
+
+        # one member snapshot, taken after every invite, serves the permission updates of the whole batch
+        members = {member.get("id"): member for member in self.bitwarden_api.get_users()} if invited else {}
+        results = run_concurrently(
+            lambda invitee: self._grant_permissions(
+                user=invitee[0], teams=invitee[1], member=members.get(invitee[2]), collections=collections
+            ),
+            invited,
+            max_workers=self.max_workers,
+        )
+        for result in results:
+            username = result.item[0].username
+            if result.error is None:
+                self.__logger.info(f"Onboarded user {username} to bitwarden")
+            else:
+                self.__logger.warning(f"Failed to onboard user {username} to bitwarden: {result.error}")
+                errors.append(result.error)
+        self.__logger.info(f"Onboarded {len(users) - len(errors)} of {len(users)} users to bitwarden")
+
+        if errors:
+            raise ExceptionGroup("Onboard Users Errors: ", errors)
+
+    def _new_users(self, users: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        emails = [member.get("email", "") for member in self.bitwarden_api.get_users()]
+        new_users = []
+        for user in users:
+            if any(user["username"] in email for email in emails):
+                self.__logger.info(f"User {user['username']} already exists. Skipping.")
+            else:
+                new_users.append(user)
+        return new_users
+
+    def _get_ump_user(self, user: Dict[str, str]) -> Tuple[UmpUser, List[str]]:
+        teams = self.user_management_api.get_user_teams(username=user["username"])
+        roles_by_team = {
+            team: self.user_management_api.get_user_role_by_team(user["username"], team=team) for team in teams
+        }
+        return UmpUser(username=user["username"], email=user["email"], roles_by_team=roles_by_team), teams
+
+    def _prepare_teams(
+        self, teams: List[str]
+    ) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]], Dict[str, Exception]]:
+        existing_groups, collections = get_groups_and_collections(
+            bitwarden_api=self.bitwarden_api,
+            bitwarden_vault_client=self.bitwarden_vault_client,
+            teams=teams,
+            team_mapping=self.team_mapping,
+        )
+
+        # a team with duplicate groups or collections only fails the users in that team
+        group_ids: Dict[str, str] = {}
+        team_errors: Dict[str, Exception] = {}
+        assignments: List[Tuple[str, str, str]] = []
+        for team in teams:
+            try:
+                group_ids[team] = self.bitwarden_api.collate_user_group_ids(
+                    teams=[team], groups=existing_groups, collections=collections, pending_assignments=assignments
+                )[0]
+            except Exception as e:
+                team_errors[team] = e
+
+        # the groups of the whole batch are assigned in one pass, reading and writing each collection once
+        try:
+            self.bitwarden_api.assign_groups_to_collections(assignments)
+        except Exception as e:
+            if (
+                isinstance(e, BitwardenNotFoundException)
+                and self.team_mapping
+                and self.team_mapping.maps(e.resource_id)
+            ):
+                # a stale mapped collection is dropped by rediscover_when_not_found and the batch prepared again
+                raise
+            for team, _, _ in assignments:
+                team_errors.setdefault(team, e)
+        return group_ids, collections, team_errors
+
+    def _invite(
+        self,
+        user: UmpUser,
+        teams: List[str],
+        group_ids: Dict[str, str],
+        team_errors: Dict[str, Exception],
+        custom_group_ids: List[str],
+    ) -> str:
+        user_id = self.bitwarden_api.invite_user(user=user)
+
+        failed_teams: Set[str] = set(teams) & set(team_errors)
+        if failed_teams:
+            raise team_errors[sorted(failed_teams)[0]]
+
+        self.bitwarden_api.associate_user_to_groups(
+            user_id=user_id, managed_group_ids=[group_ids[team] for team in teams], custom_group_ids=custom_group_ids
+        )
+        return user_id
+
+    def _grant_permissions(
+        self,
+        user: UmpUser,
+        teams: List[str],
+        member: Optional[Dict[str, Any]],
+        collections: Dict[str, Dict[str, Any]],
+    ) -> None:
+        if member is None:
+            raise BitwardenUserNotFoundException(f"No user with email {user.email} found")
+        member_update = MemberUpdate(member)
+        self.bitwarden_api.grant_can_manage_permission_to_team_collections(
+            user=user, teams=teams, collections=collections, member_update=member_update
+        )
+        self.bitwarden_api.assign_custom_permissions_to_platsec_user(
+            user=user, teams=teams, member_update=member_update
+        )
+        self.bitwarden_api.update_member(member_update)
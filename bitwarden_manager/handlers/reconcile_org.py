@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Set, Union
+
+from jsonschema import validate
+
+import bitwarden_manager.groups_and_collections as GroupsAndCollections
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.concurrency import run_concurrently
+from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.user import UmpUser
+
+MAX_CONCURRENT_RECONCILE_REQUESTS = 5
+
+reconcile_org_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "reconcile_org",
+        },
+        "dry_run": {
+            "type": "boolean",
+            "description": "Only log the plan of writes, or apply it",
+            "default": True,
+        },
+    },
+    "required": ["event_name"],
+}
+
+
+@dataclass
+class GroupMembershipChange:
+    team: str
+    group_id: str
+    member_ids: List[str]
+    added: List[str]
+    removed: List[str]
+
+
+@dataclass
+class MemberCollectionsChange:
+    username: str
+    member: Dict[str, Any]
+    collections: List[Dict[str, Any]]
+
+
+@dataclass
+class ReconciliationPlan:
+    group_changes: List[GroupMembershipChange] = field(default_factory=list)
+    member_changes: List[MemberCollectionsChange] = field(default_factory=list)
+    unprovisioned_teams: List[str] = field(default_factory=list)
+    duplicate_teams: List[str] = field(default_factory=list)
+
+    @property
+    def changes(self) -> List[Union[GroupMembershipChange, MemberCollectionsChange]]:
+        return [*self.group_changes, *self.member_changes]
+
+
+def plan_reconciliation(
+    rosters: Dict[str, Dict[str, str]],
+    members: List[Dict[str, Any]],
+    groups: Dict[str, str],
+    collections: Dict[str, Dict[str, Any]],
+    group_members: Dict[str, List[str]],
+) -> ReconciliationPlan:
+    # the desired state of every team group and team collection, diffed against the snapshot in memory.
+    # rosters maps team to username and role, group_members maps team to the member ids currently in its group
+    plan = ReconciliationPlan()
+    members_by_username = {member["externalId"]: member for member in members if member.get("externalId")}
+    usernames_by_id = {str(member["id"]): username for username, member in members_by_username.items()}
+
+    managed_collection_ids: Set[str] = set()
+    can_manage: Dict[str, Set[str]] = {username: set() for username in members_by_username}
+    for team, roles in sorted(rosters.items()):
+        team_members = {username: role for username, role in roles.items() if username in members_by_username}
+        group_id = groups.get(team, "")
+        collection_id = collections.get(team, {}).get("id", "")
+        if "duplicate" in (group_id, collection_id):
+            plan.duplicate_teams.append(team)
+            continue
+        if not group_id or not collection_id:
+            if team_members:
+                plan.unprovisioned_teams.append(team)
+            continue
+
+        if team in group_members:
+            current = set(group_members[team])
+            desired = {str(members_by_username[username]["id"]) for username in team_members}
+            if current != desired:
+                plan.group_changes.append(
+                    GroupMembershipChange(
+                        team=team,
+                        group_id=group_id,
+                        member_ids=sorted(desired),
+                        added=sorted(usernames_by_id[member_id] for member_id in desired - current),
+                        removed=sorted(usernames_by_id.get(member_id, member_id) for member_id in current - desired),
+                    )
+                )
+
+        managed_collection_ids.add(collection_id)
+        for username, role in team_members.items():
+            if UmpUser(username=username, roles_by_team={team: role}).can_manage_team_collection(team=team):
+                can_manage[username].add(collection_id)
+
+    for username, member in sorted(members_by_username.items()):
+        updated = GroupsAndCollections.manage_collection_changes(
+            current=member.get("collections") or [],
+            desired_ids=can_manage[username],
+            managed_ids=managed_collection_ids,
+        )
+        if updated is not None:
+            plan.member_changes.append(MemberCollectionsChange(username=username, member=member, collections=updated))
+    return plan
+
+
+class ReconcileOrg:
+    def __init__(
+        self,
+        bitwarden_api: BitwardenPublicApi,
+        user_management_api: UserManagementApi,
+        max_workers: int = MAX_CONCURRENT_RECONCILE_REQUESTS,
+    ):
+        self.bitwarden_api = bitwarden_api
+        self.user_management_api = user_management_api
+        self.max_workers = max_workers
+        self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
+
+    def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=reconcile_org_event_schema)
+        dry_run = event.get("dry_run", True)
+        errors: List[Exception] = []
+
+        user_teams = self.user_management_api.get_user_team_index(max_workers=self.max_workers)
+        rosters = user_teams.rosters
+        for team, error in user_teams.failures.items():
+            self.__logger.warning(f"Failed to get team members of {team}, skipping it: {error}")
+            errors.append(error)
+
+        members = self.bitwarden_api.get_users()
+        groups = self.bitwarden_api.list_existing_groups(list(rosters))
+        collections = self.bitwarden_api.list_existing_collections(list(rosters))
+        membership = self.bitwarden_api.get_membership_index(max_workers=self.max_workers)
+        group_members: Dict[str, List[str]] = {}
+        for team, group_id in groups.items():
+            if group_id == "duplicate":
+                continue
+            if group_id in membership.failures:
+                error = membership.failures[group_id]
+                self.__logger.warning(f"Failed to get members of group {team}, skipping it: {error}")
+                errors.append(error)
+            else:
+                group_members[team] = membership.members_of(group_id)
+
+        plan = plan_reconciliation(
+            rosters=rosters, members=members, groups=groups, collections=collections, group_members=group_members
+        )
+        self._log_plan(plan)
+
+        if not dry_run:
+            errors += self._apply(plan)
+
+        if errors:
+            raise ExceptionGroup("Reconcile Org Errors: ", errors)
+
+    def _log_plan(self, plan: ReconciliationPlan) -> None:
+        for group_change in plan.group_changes:
+            self.__logger.info(
+                f"Plan: set members of group {group_change.team}, adding {group_change.added} "
+                f"and removing {group_change.removed}"
+            )
+        for member_change in plan.member_changes:
+            self.__logger.info(f"Plan: update collection permissions of user {member_change.username}")
+        if plan.unprovisioned_teams:
+            self.__logger.info(f"Teams without a Bitwarden group or collection: {plan.unprovisioned_teams}")
+        if plan.duplicate_teams:
+            self.__logger.warning(f"Teams with duplicate groups or collections: {plan.duplicate_teams}")
+        self.__logger.info(
+            f"Reconciliation plan has {len(plan.changes)} writes: {len(plan.group_changes)} group memberships "
+            f"and {len(plan.member_changes)} member collection permissions"
+        )
+
+    def _apply(self, plan: ReconciliationPlan) -> List[Exception]:
+        results = run_concurrently(self._apply_change, plan.changes, self.max_workers)
+        errors: List[Exception] = []
+        for result in results:
+            if result.error is not None:
+                self.__logger.warning(f"Failed to apply {self._describe(result.item)}: {result.error}")
+                errors.append(result.error)
+        self.__logger.info(f"Applied {len(results) - len(errors)} of {len(results)} writes")
+        return errors
+
+    def _apply_change(self, change: Union[GroupMembershipChange, MemberCollectionsChange]) -> None:
+        if isinstance(change, GroupMembershipChange):
+            self.bitwarden_api.update_group_members(group_id=change.group_id, member_ids=change.member_ids)
+        else:
+            self.bitwarden_api.update_member_collections(member=change.member, collections=change.collections)
+
+    @staticmethod
+    def _describe(change: Union[GroupMembershipChange, MemberCollectionsChange]) -> str:
+        if isinstance(change, GroupMembershipChange):
+            return f"membership of group {change.team}"
+        return f"collection permissions of user {change.username}"
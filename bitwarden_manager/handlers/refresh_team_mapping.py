@@ -0,0 +1,45 @@
+from typing import Any, Dict
+
+from jsonschema import validate
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.team_mapping import TeamMapping
+
+refresh_team_mapping_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "refresh_team_mapping",
+        },
+    },
+    "required": ["event_name"],
+}
+
+
+class RefreshTeamMapping:
+    def __init__(
+        self,
+        bitwarden_api: BitwardenPublicApi,
+        user_management_api: UserManagementApi,
+        team_mapping: TeamMapping,
+    ):
+        self.bitwarden_api = bitwarden_api
+        self.user_management_api = user_management_api
+        self.team_mapping = team_mapping
+        self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
+
+    def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=refresh_team_mapping_event_schema)
+
+        teams = self.user_management_api.get_teams()
+        self.team_mapping.refresh(
+            groups=self.bitwarden_api.list_existing_groups(teams),
+            collections=self.bitwarden_api.list_existing_collections(teams),
+        )
+        self.team_mapping.save()
+        self.__logger.info(f"Mapped {len(self.team_mapping.teams)} of {len(teams)} teams to a group and collection")
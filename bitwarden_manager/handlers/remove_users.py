@@ -0,0 +1,79 @@
+from typing import Any, Dict, List
+
+from jsonschema import validate
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+
+remove_users_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "remove_users",
+        },
+        "members": {
+            "type": "object",
+            "description": "The member ids to remove, mapped to their username for logging",
+            "additionalProperties": {"type": "string"},
+            "minProperties": 1,
+        },
+        "usernames": {
+            "type": "array",
+            "description": "The ldap usernames of the members to remove, resolved against one member list",
+            "items": {"type": "string"},
+            "minItems": 1,
+            "uniqueItems": True,
+        },
+    },
+    "required": ["event_name"],
+    "anyOf": [{"required": ["members"]}, {"required": ["usernames"]}],
+}
+
+
+class RemoveUsers:
+    def __init__(self, bitwarden_api: BitwardenPublicApi):
+        self.bitwarden_api = bitwarden_api
+        self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
+
+    def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=remove_users_event_schema)
+        members: Dict[str, str] = dict(event.get("members", {}))
+        if "usernames" in event:
+            members.update(self._resolve_usernames(event["usernames"]))
+
+        if not members:
+            self.__logger.info("None of the members to remove are in the Bitwarden organisation")
+            return
+
+        self.__logger.info(f"Removing {len(members)} members from bitwarden")
+        results = self.bitwarden_api.remove_users_by_id(members)
+
+        errors: List[Exception] = []
+        for result in results:
+            if result.error is None:
+                self.__logger.info(f"Removed user {members[result.item]} from bitwarden")
+            else:
+                self.__logger.warning(f"Failed to remove user {members[result.item]} from bitwarden: {result.error}")
+                errors.append(result.error)
+        self.__logger.info(f"Removed {len(results) - len(errors)} of {len(members)} members from bitwarden")
+
+        if errors:
+            raise ExceptionGroup("Remove Users Errors: ", errors)
+
+    def _resolve_usernames(self, usernames: List[str]) -> Dict[str, str]:
+        # one member list download resolves every username, rather than one per removal
+        member_ids = {
+            member["externalId"]: str(member["id"])
+            for member in self.bitwarden_api.get_users()
+            if member.get("externalId")
+        }
+        resolved = {}
+        for username in usernames:
+            if username in member_ids:
+                resolved[member_ids[username]] = username
+            else:
+                self.__logger.info(f"User {username} not found in the Bitwarden organisation")
+        return resolved
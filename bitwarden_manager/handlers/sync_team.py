@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from jsonschema import validate
+
+import bitwarden_manager.groups_and_collections as GroupsAndCollections
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.team_mapping import TeamMapping, get_groups_and_collections, rediscover_when_not_found
+from bitwarden_manager.user import UmpUser
+
+sync_team_event_schema = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "event_name": {
+            "type": "string",
+            "description": "name of the current event",
+            "pattern": "sync_team",
+        },
+        "team": {"type": "string", "description": "the user management team to sync", "minLength": 1},
+    },
+    "required": ["event_name", "team"],
+}
+
+
+class SyncTeam:
+    def __init__(
+        self,
+        bitwarden_api: BitwardenPublicApi,
+        user_management_api: UserManagementApi,
+        bitwarden_vault_client: BitwardenVaultClient,
+        team_mapping: Optional[TeamMapping] = None,
+    ):
+        self.bitwarden_api = bitwarden_api
+        self.user_management_api = user_management_api
+        self.bitwarden_vault_client = bitwarden_vault_client
+        self.team_mapping = team_mapping
+        self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
+
+    def run(self, event: Dict[str, Any]) -> None:
+        validate(instance=event, schema=sync_team_event_schema)
+        team = event["team"]
+
+        roles = self.user_management_api.get_team_members(team)
+        self.__logger.info(f"Syncing {len(roles)} members of team {team}")
+        members = {
+            member["externalId"]: member
+            for member in self.bitwarden_api.get_users()
+            if member.get("externalId") in roles
+        }
+        for username in sorted(set(roles) - set(members)):
+            self.__logger.info(f"User {username} not found in the Bitwarden organisation")
+
+        collection_id = rediscover_when_not_found(
+            self.team_mapping, lambda: self._sync_group(team=team, member_ids=[m["id"] for m in members.values()])
+        )
+        if collection_id:
+            self._sync_manage_permissions(team=team, collection_id=collection_id, members=members, roles=roles)
+
+    def _sync_group(self, team: str, member_ids: List[str]) -> Optional[str]:
+        group_id, collection_id = self._get_team_group_and_collection(team)
+        self._sync_group_members(team=team, group_id=group_id, member_ids=member_ids)
+        return collection_id
+
+    def _get_team_group_and_collection(self, team: str) -> Tuple[str, Optional[str]]:
+        existing_groups, collections = get_groups_and_collections(
+            bitwarden_api=self.bitwarden_api,
+            bitwarden_vault_client=self.bitwarden_vault_client,
+            teams=[team],
+            team_mapping=self.team_mapping,
+        )
+        group_id = self.bitwarden_api.collate_user_group_ids(
+            teams=[team], groups=existing_groups, collections=collections
+        )[0]
+        if not group_id:
+            raise Exception(f"Failed to find or create a group for {team}")
+        return group_id, collections.get(team, {}).get("id")
+
+    def _sync_group_members(self, team: str, group_id: str, member_ids: List[str]) -> None:
+        current = set(self.bitwarden_api.get_users_in_group(group_id))
+        desired = set(member_ids)
+        if current == desired:
+            self.__logger.info(f"Group {team} membership is already in sync")
+            return
+        self.bitwarden_api.update_group_members(group_id=group_id, member_ids=sorted(desired))
+        self.__logger.info(
+            f"Updated group {team} membership: added {len(desired - current)}, removed {len(current - desired)}"
+        )
+
+    def _sync_manage_permissions(
+        self, team: str, collection_id: str, members: Dict[str, Dict[str, Any]], roles: Dict[str, str]
+    ) -> None:
+        # only members whose manage permission on the team collection differs from their team role are written
+        errors: List[Exception] = []
+        updated = 0
+        for username, member in sorted(members.items()):
+            can_manage = UmpUser(username=username, roles_by_team={team: roles[username]}).can_manage_team_collection(
+                team=team
+            )
+            updated_collections = GroupsAndCollections.manage_collection_changes(
+                current=member.get("collections") or [],
+                desired_ids={collection_id} if can_manage else set(),
+                managed_ids={collection_id},
+            )
+            if updated_collections is None:
+                continue
+            try:
+                self.bitwarden_api.update_member_collections(member=member, collections=updated_collections)
+                updated += 1
+            except Exception as e:
+                self.__logger.warning(f"Failed to update collection permissions of user {username}: {e}")
+                errors.append(e)
+        self.__logger.info(f"Updated collection permissions of {updated} members of team {team}")
+
+        if errors:
+            raise ExceptionGroup("Sync Team Errors: ", errors)
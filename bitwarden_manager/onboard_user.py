@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from jsonschema import validate
 
 from bitwarden_manager.clients.user_management_api import UserManagementApi
@@ -10,6 +10,7 @@ from bitwarden_manager.clients.bitwarden_public_api import (
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
 import bitwarden_manager.groups_and_collections as GroupsAndCollections
 from bitwarden_manager.redacting_formatter import get_bitwarden_logger
+from bitwarden_manager.team_mapping import TeamMapping, get_groups_and_collections, rediscover_when_not_found
 from bitwarden_manager.user import UmpUser
 
 onboard_user_event_schema = {
@@ -38,10 +39,12 @@ class OnboardUser:
         bitwarden_api: BitwardenPublicApi,
         user_management_api: UserManagementApi,
         bitwarden_vault_client: BitwardenVaultClient,
+        team_mapping: Optional[TeamMapping] = None,
     ):
         self.bitwarden_api = bitwarden_api
         self.user_management_api = user_management_api
         self.bitwarden_vault_client = bitwarden_vault_client
+        self.team_mapping = team_mapping
         self.__logger = get_bitwarden_logger(extra_redaction_patterns=[])
 
     def run(self, event: Dict[str, Any]) -> None:
@@ -69,26 +72,30 @@ class OnboardUser:
         self.__logger.info(f"Sending bitwarden invite to user {event['username']}'")
         user_id = self.bitwarden_api.invite_user(user=user)
 
-        existing_groups = self.bitwarden_api.list_existing_groups(teams)
-        existing_collections = self.bitwarden_api.list_existing_collections(teams)
-        self.bitwarden_vault_client.create_collections(
-            GroupsAndCollections.missing_collection_names(teams, existing_collections)
-        )
-
-        collections = self.bitwarden_api.list_existing_collections(teams)
-        managed_group_ids = self.bitwarden_api.collate_user_group_ids(
-            teams=teams,
-            groups=existing_groups,
-            collections=collections,
-        )
+        managed_group_ids = rediscover_when_not_found(self.team_mapping, lambda: self._collate_group_ids(teams))
 
         custom_group_ids = GroupsAndCollections.non_ump_based_group_ids(
-            groups=self.bitwarden_api.get_groups(), teams=self.user_management_api.get_teams()
+            groups=self.bitwarden_api.get_groups(), teams=self.user_management_api.get_team_directory()
         )
 
         self.bitwarden_api.associate_user_to_groups(
             user_id=user_id, managed_group_ids=managed_group_ids, custom_group_ids=custom_group_ids
         )
 
-        self.bitwarden_api.grant_can_manage_permission_to_team_collections(user=user, teams=teams)
-        self.bitwarden_api.assign_custom_permissions_to_platsec_user(user=user, teams=teams)
+        member_update = self.bitwarden_api.get_member_update(email=event["email"])
+        self.bitwarden_api.grant_can_manage_permission_to_team_collections(
+            user=user, teams=teams, member_update=member_update
+        )
+        self.bitwarden_api.assign_custom_permissions_to_platsec_user(
+            user=user, teams=teams, member_update=member_update
+        )
+        self.bitwarden_api.update_member(member_update)
+
+    def _collate_group_ids(self, teams: List[str]) -> List[str]:
+        existing_groups, collections = get_groups_and_collections(
+            bitwarden_api=self.bitwarden_api,
+            bitwarden_vault_client=self.bitwarden_vault_client,
+            teams=teams,
+            team_mapping=self.team_mapping,
+        )
+        return self.bitwarden_api.collate_user_group_ids(teams=teams, groups=existing_groups, collections=collections)
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import bitwarden_manager.groups_and_collections as GroupsAndCollections
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenNotFoundException, BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.json_store import JsonStore
+
+TEAM_MAPPING_KEY = "team_mapping.json"
+
+T = TypeVar("T")
+
+
+# The Bitwarden group id and collection id of each user management team, as [group_id, collection_id]. Only teams
+# with exactly one group and one collection are mapped, anything else is left to live discovery.
+class TeamMapping:
+    def __init__(self, store: JsonStore, teams: Optional[Dict[str, List[str]]] = None) -> None:
+        self.store = store
+        self.teams: Dict[str, List[str]] = teams or {}
+
+    @classmethod
+    def load(cls, store: JsonStore) -> "TeamMapping":
+        data = store.load()
+        if data is None:
+            return cls(store=store)
+        return cls(store=store, teams={str(team): list(ids) for team, ids in data.get("teams", {}).items()})
+
+    def save(self) -> None:
+        self.store.save({"teams": self.teams})
+
+    def resolve(self, team: str) -> Optional[Tuple[str, str]]:
+        ids = self.teams.get(team)
+        return (ids[0], ids[1]) if ids else None
+
+    def maps(self, resource_id: str) -> bool:
+        return any(resource_id in ids for ids in self.teams.values())
+
+    def forget(self, resource_id: str) -> bool:
+        # drops, and saves the mapping without, every team mapped to a group or collection that no longer exists
+        stale = [team for team, ids in self.teams.items() if resource_id in ids]
+        for team in stale:
+            del self.teams[team]
+        if stale:
+            self.save()
+        return bool(stale)
+
+    def refresh(self, groups: Dict[str, str], collections: Dict[str, Dict[str, Any]]) -> None:
+        self.teams = {
+            team: [group_id, collections[team]["id"]]
+            for team, group_id in groups.items()
+            if group_id and group_id != "duplicate" and collections.get(team, {}).get("id") not in (None, "duplicate")
+        }
+
+
+def get_groups_and_collections(
+    bitwarden_api: BitwardenPublicApi,
+    bitwarden_vault_client: BitwardenVaultClient,
+    teams: List[str],
+    team_mapping: Optional[TeamMapping] = None,
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    # the groups and collections of teams, shaped as list_existing_groups and list_existing_collections return them.
+    # Mapped teams are answered from the mapping, the rest are discovered and have their collection created if missing
+    groups: Dict[str, str] = {}
+    collections: Dict[str, Dict[str, Any]] = {}
+    unmapped: List[str] = []
+    for team in teams:
+        ids = team_mapping.resolve(team) if team_mapping else None
+        if ids is None:
+            unmapped.append(team)
+            continue
+        groups[team] = ids[0]
+        collections[team] = {"id": ids[1], "externalId": BitwardenPublicApi.external_id_base64_encoded(team)}
+
+    if unmapped:
+        groups.update(bitwarden_api.list_existing_groups(unmapped))
+        existing_collections = bitwarden_api.list_existing_collections(unmapped)
+        bitwarden_vault_client.create_collections(
+            GroupsAndCollections.missing_collection_names(unmapped, existing_collections)
+        )
+        collections.update(bitwarden_api.list_existing_collections(unmapped))
+    return groups, collections
+
+
+def rediscover_when_not_found(team_mapping: Optional[TeamMapping], action: Callable[[], T]) -> T:
+    # mapped ids are used without checking them, so a 404 on one drops its team from the mapping and the action is
+    # retried with that team discovered live
+    while True:
+        try:
+            return action()
+        except BitwardenNotFoundException as error:
+            if team_mapping is None or not team_mapping.forget(error.resource_id):
+                raise
@@ -7,11 +7,13 @@ from typing import Any, Dict, List
 
 from jsonschema import validate
 from requests import HTTPError
-from bitwarden_manager.clients.bitwarden_public_api import API_URL, REQUEST_TIMEOUT_SECONDS, BitwardenPublicApi, session
+from bitwarden_manager.clients.bitwarden_public_api import API_URL, BitwardenPublicApi, send_rate_limited
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient, BitwardenVaultClientError
 from bitwarden_manager.clients.s3_client import S3Client
+from bitwarden_manager.concurrency import run_concurrently
 
 CLI_TIMEOUT = 60
+MAX_CONCURRENT_UPDATES = 5
 BITWARDEN_DATA_EXPORT_FILENAME = "bitwarden-data-export-US-org.json"
 
 update_collection_external_ids_event_schema = {
@@ -57,6 +59,12 @@ class BitwardenCollection:
     externalId: str = ""
 
 
+@dataclass
+class ExternalIdUpdate:
+    collection: BitwardenCollection
+    external_id: str
+
+
 class UpdateCollectionExternalIds:
 
     def __init__(
@@ -75,7 +83,16 @@ class UpdateCollectionExternalIds:
     def get_external_ids_from_data_export(self) -> List[BitwardenCollection]:
         bucket_name = os.environ["BITWARDEN_BACKUP_BUCKET"]
 
-        json_data = json.loads(self.s3_client.read_object(bucket_name=bucket_name, key=BITWARDEN_DATA_EXPORT_FILENAME))
+        # only the members up to the end of the collections array are read, the items that follow never are
+        json_data: Dict[str, Any] = {}
+        json_data["collections"] = list(
+            self.s3_client.iter_json_array(
+                bucket_name=bucket_name,
+                key=BITWARDEN_DATA_EXPORT_FILENAME,
+                array_name="collections",
+                leading_members=json_data,
+            )
+        )
         validate(instance=json_data, schema=data_export_schema)
 
         return [BitwardenCollection(name=c["name"], externalId=c["externalId"]) for c in json_data["collections"]]
@@ -103,30 +120,60 @@ class UpdateCollectionExternalIds:
             raise BitwardenVaultClientError(e)
 
         data: List[Dict[str, Any]] = json.loads(output)
-        return [BitwardenCollection(name=c["name"], id=c["id"]) for c in data]
+        return [BitwardenCollection(name=c["name"], id=c["id"], externalId=c.get("externalId") or "") for c in data]
 
     def update_collection_external_id(self, collection_id: str, external_id: str) -> None:
-        response = session.put(
+        response = send_rate_limited(
+            "PUT",
             f"{API_URL}/collections/{collection_id}",
             json={
                 "externalId": external_id,
                 "groups": [],  # not a problem when run just after import
             },
-            timeout=REQUEST_TIMEOUT_SECONDS,
         )
         try:
             response.raise_for_status()
         except HTTPError as error:
             raise Exception("Failed to update the collection externalId") from error
 
+    @staticmethod
+    def plan_external_id_updates(
+        from_data_export_collections: List[BitwardenCollection], org_collections: List[BitwardenCollection]
+    ) -> List[ExternalIdUpdate]:
+        org_collections_by_name: Dict[str, List[BitwardenCollection]] = {}
+        for org_c in org_collections:
+            org_collections_by_name.setdefault(org_c.name, []).append(org_c)
+
+        # keyed by collection id so a name repeated in the export results in a single update, the last one wins
+        updates: Dict[str, ExternalIdUpdate] = {}
+        for c in from_data_export_collections:
+            for org_c in org_collections_by_name.get(c.name, []):
+                updates.pop(org_c.id, None)
+                if org_c.externalId != (c.externalId or ""):
+                    updates[org_c.id] = ExternalIdUpdate(collection=org_c, external_id=c.externalId)
+        return list(updates.values())
+
     def reconcile_collection_external_ids(
         self, from_data_export_collections: List[BitwardenCollection], org_collections: List[BitwardenCollection]
     ) -> None:
         self.bitwarden_api._BitwardenPublicApi__fetch_token()  # type: ignore
-        for c in from_data_export_collections:
-            for org_c in org_collections:
-                if c.name == org_c.name:
-                    self.update_collection_external_id(collection_id=org_c.id, external_id=c.externalId)
+        planned = self.plan_external_id_updates(from_data_export_collections, org_collections)
+        self.logger.info(f"Planned {len(planned)} collection externalId updates")
+
+        results = run_concurrently(
+            lambda update: self.update_collection_external_id(
+                collection_id=update.collection.id, external_id=update.external_id
+            ),
+            planned,
+            max_workers=MAX_CONCURRENT_UPDATES,
+        )
+        errors = [result.error for result in results if result.error is not None]
+        self.logger.info(
+            f"Applied {len(planned) - len(errors)} of {len(planned)} planned collection externalId updates"
+        )
+
+        if errors:
+            raise ExceptionGroup("Collection externalId Update Errors: ", errors)
 
     def run(self, event: Dict[str, Any]) -> None:
         validate(instance=event, schema=update_collection_external_ids_event_schema)
@@ -3,7 +3,9 @@ import csv
 
 import requests
 import certifi
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 bw_vault_uri = "https://api.bitwarden.eu"
 bw_client_id = "CLIENT_ID"
@@ -16,6 +18,38 @@ protected_user_emails = [
     "nerea.harries@digital.hmrc.gov.uk",
 ]
 USE_API = len(bw_client_id) > 10 and len(bw_client_secret) == 10
+REQUESTS_PER_SECOND = 10.0
+MAX_CONCURRENT_DELETES = 5
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+class RateLimiter:
+    # token bucket shared by the delete threads, a 429 pauses every thread for the Retry-After period
+    def __init__(self, requests_per_second, burst):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.requests_per_second)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
 
 
 def get_active_users():
@@ -115,28 +149,41 @@ def offboard_inactive_members(_all_members, inactive_member_emails):
             print(f"Member {member['email']} in protected user list")
 
     auth_token = get_auth_token()
-    for user in users_to_offboard:
-        print(f"Offboarding user {user['email']}")
-        uid = user['id']
-        response = requests.delete(
-            bw_vault_uri + "/public/members/" + uid,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "Authorization": f"Bearer {auth_token}"
-            }
-        )
+    rate_limiter = RateLimiter(requests_per_second=REQUESTS_PER_SECOND, burst=int(REQUESTS_PER_SECOND))
 
-        if response.status_code != requests.codes.ok:
+    def offboard(user):
+        print(f"Offboarding user {user['email']}")
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            rate_limiter.acquire()
             try:
-                json_response = response.json()
-            except Exception:
-                raise Exception(f"Error offboarding user {user['email']}: {response.text}")
+                response = requests.delete(
+                    bw_vault_uri + "/public/members/" + user['id'],
+                    headers={
+                        "Content-Type": "application/json",
+                        "Accept": "application/json",
+                        "Authorization": f"Bearer {auth_token}"
+                    },
+                    timeout=30,
+                )
+            except requests.RequestException as e:
+                return f"Error offboarding user {user['email']}: {e}"
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            rate_limiter.pause(float(response.headers.get("Retry-After", 60)))
 
-            raise Exception(json_response)
+        if response.status_code != requests.codes.ok:
+            return f"Error offboarding user {user['email']}: {response.status_code} {response.text}"
 
         print(f"Offboarding user {user['email']} complete")
-        time.sleep(3)
+        return None
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DELETES) as executor:
+        results = list(zip(users_to_offboard, executor.map(offboard, users_to_offboard)))
+
+    failures = [error for _, error in results if error is not None]
+    for error in failures:
+        print(error)
+    print(f"Offboarded {len(results) - len(failures)} of {len(results)} users, {len(failures)} failed")
 
 
 if __name__ == "__main__":
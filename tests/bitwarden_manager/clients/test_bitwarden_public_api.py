@@ -1,6 +1,7 @@
 import base64
+import json
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import os
 from unittest.mock import patch, Mock
@@ -10,12 +11,20 @@ import responses
 from _pytest.logging import LogCaptureFixture
 from mock import MagicMock
 from requests import HTTPError
+from freezegun import freeze_time
 from responses import matchers
 
-from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi, BitwardenUserNotFoundException
+from bitwarden_manager.clients.bitwarden_public_api import (
+    BitwardenAPIException,
+    BitwardenEventsIncompleteException,
+    BitwardenNotFoundException,
+    BitwardenPublicApi,
+    BitwardenUserNotFoundException,
+    MemberUpdate,
+    send_rate_limited,
+)
 from bitwarden_manager.user import UmpUser
 
-
 MOCKED_LOGIN = responses.Response(
     method="POST",
     url="https://identity.bitwarden.eu/connect/token",
@@ -462,7 +471,7 @@ def test_grant_can_manage_permission_to_team_collections_to_team_admin() -> None
             json={"error": "error"},
         )
 
-        with pytest.raises(Exception, match='Failed to grant "can manage" permission to user'):
+        with pytest.raises(Exception, match="Failed to update member test.user02"):
             client.grant_can_manage_permission_to_team_collections(
                 user=user,
                 teams=teams,
@@ -525,6 +534,25 @@ def test_grant_can_manage_permission_to_team_collections_to_regular_user() -> No
         assert rsps.calls[1].request.method != "PUT"
 
 
+def test_grant_can_manage_permission_to_team_collections_uses_collections_snapshot() -> None:
+    user = UmpUser(username="test.user02", email="test.user02@example.com", roles_by_team={"team-one": "user"})
+    collections = {
+        "team-one": {"id": "team-one-id", "externalId": "dGVhbS1vbmU="},
+        "team-two": {"id": "duplicate", "externalId": "dGVhbS10d28="},
+    }
+
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.grant_can_manage_permission_to_team_collections(user=user, teams=["team-one"], collections=collections)
+
+        assert len(rsps.calls) == 1
+
+
 def test_assign_custom_permissions_to_platsec_user() -> None:
     member_id = "22222222"
     teams = ["Platform Security", "team-two"]
@@ -546,6 +574,12 @@ def test_assign_custom_permissions_to_platsec_user() -> None:
                 matchers.json_params_matcher(
                     {
                         "type": 4,
+                        "externalId": "test.user02",
+                        "resetPasswordEnrolled": False,
+                        "collections": [
+                            {"id": "id-manager-created", "readOnly": True, "hidePasswords": False, "manage": False},
+                            {"id": "id-manually-created", "readOnly": False, "hidePasswords": False, "manage": True},
+                        ],
                         "permissions": {
                             "accessEventLogs": True,
                             "accessImportExport": False,
@@ -587,13 +621,74 @@ def test_assign_custom_permissions_to_platsec_user() -> None:
             json={"error": "error"},
         )
 
-        with pytest.raises(Exception, match="Failed to grant custom permissions to PlatSec user"):
+        with pytest.raises(Exception, match="Failed to update member test.user02"):
             client.assign_custom_permissions_to_platsec_user(
                 user=user,
                 teams=teams,
             )
 
 
+def test_member_update_coalesces_collection_and_permission_changes() -> None:
+    teams = ["Platform Security"]
+    user = UmpUser(
+        username="test.user02",
+        email="test.user02@example.com",
+        roles_by_team={"Platform Security": "team_admin"},
+    )
+    collections = {"Platform Security": {"id": "platsec-collection", "externalId": "UGxhdGZvcm0gU2VjdXJpdHk="}}
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(MOCKED_GET_MEMBERS)
+        for collection in [
+            _collection_object_with_base64_encoded_external_id("manager-created", groups=[]),
+            _collection_object_with_empty_external_id("manually-created", groups=[]),
+        ]:
+            rsps.add(
+                status=200,
+                content_type="application/json",
+                method=rsps.GET,
+                url=f"https://api.bitwarden.eu/public/collections/{collection['id']}",
+                json=collection,
+            )
+        put = rsps.add(status=200, method=rsps.PUT, url="https://api.bitwarden.eu/public/members/22222222")
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        member_update = client.get_member_update(email=str(user.email))
+        client.grant_can_manage_permission_to_team_collections(
+            user=user, teams=teams, collections=collections, member_update=member_update
+        )
+        client.assign_custom_permissions_to_platsec_user(user=user, teams=teams, member_update=member_update)
+        assert put.call_count == 0
+
+        client.update_member(member_update)
+
+        assert put.call_count == 1
+        body = json.loads(put.calls[0].request.body or "{}")
+        assert body["type"] == 4
+        assert body["permissions"]["manageUsers"] is True
+        assert body["collections"] == [
+            {"id": "platsec-collection", "readOnly": False, "hidePasswords": False, "manage": True},
+            {"id": "id-manually-created", "readOnly": False, "hidePasswords": False, "manage": True},
+        ]
+
+
+def test_update_member_without_changes_sends_nothing() -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.update_member(MemberUpdate({"id": "11111111", "type": 2, "permissions": None, "collections": None}))
+
+        assert len(rsps.calls) == 1
+
+
 def test_assign_custom_permissions_to_platsec_admin() -> None:
     teams = ["Platform Security", "team-two"]
     user = UmpUser(
@@ -952,7 +1047,7 @@ def test_get_collections_failure() -> None:
 
         with pytest.raises(
             Exception,
-            match="Failed to get collections",
+            match="Failed to get collection",
         ):
             client.update_collection_groups(
                 collection_name=collection_name,
@@ -1056,6 +1151,8 @@ def test_get_groups() -> None:
         )
 
         assert {"team-one": "id-team-one", "team-two": "id-team-two"} == client.get_groups()
+        assert {"team-one": "id-team-one", "team-two": "id-team-two"} == client.get_groups()
+        assert len(rsps.calls) == 2
 
         rsps.add(
             status=400,
@@ -1066,7 +1163,39 @@ def test_get_groups() -> None:
         )
 
         with pytest.raises(Exception, match="Failed to get groups"):
-            client.get_groups()
+            BitwardenPublicApi(logger=logging.getLogger(), client_id="foo", client_secret="bar").get_groups()
+
+
+def test_group_lookups_share_one_group_listing() -> None:
+    groups = [
+        {"name": "team-one", "id": "id-team-one"},
+        {"name": "team-two", "id": "id-team-two"},
+        {"name": "team-two", "id": "id-team-two-copy"},
+    ]
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        listing = rsps.add(responses.GET, "https://api.bitwarden.eu/public/groups", json={"data": groups})
+        rsps.add(responses.POST, "https://api.bitwarden.eu/public/groups", json={"id": "id-team-three"})
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        assert client.get_groups() == {"team-one": "id-team-one", "team-two": "id-team-two-copy"}
+        assert client.list_existing_groups(["team-one", "team-two"]) == {
+            "team-one": "id-team-one",
+            "team-two": "duplicate",
+        }
+        assert client.get_group_id_by_name("team-two") == "id-team-two"
+        assert client.get_group_directory().name_by_id("id-team-one") == "team-one"
+        assert client.get_group_directory().name_by_id("id-unknown") == ""
+        assert listing.call_count == 1
+
+        client.create_group(group_name="team-three", collection_id="")
+        client.get_group_id_by_name("team-three")
+        assert listing.call_count == 2
 
 
 def test_user_custom_group_ids() -> None:
@@ -1127,6 +1256,33 @@ def test_associate_user_to_group_no_custom_group() -> None:
         )
 
 
+def test_associate_user_to_groups_suppresses_reordered_group_ids() -> None:
+    user_id = "id-test-user01"
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            status=200,
+            content_type="application/json",
+            method="GET",
+            url=f"https://api.bitwarden.eu/public/members/{user_id}/group-ids",
+            json=["id-custom", "id-team-two", "id-team-one"],
+        )
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.associate_user_to_groups(
+            user_id=user_id, managed_group_ids=["id-team-one", "id-team-two"], custom_group_ids=["id-custom"]
+        )
+        client.update_member(MemberUpdate({"id": "11111111", "type": 2, "permissions": None, "collections": None}))
+
+        assert len(rsps.calls) == 2
+        assert client.write_counter.sent == 0
+        assert client.write_counter.suppressed == 2
+
+
 def test_associate_user_to_group_multiple_custom_groups() -> None:
     user_id = "id-test-user01"
     managed_group_ids = ["id-managed-team-1", "id-managed-team-2"]
@@ -1267,46 +1423,6 @@ def test_update_manually_created_collection_group() -> None:
         )
 
 
-def test_get_collection_external_id() -> None:
-    collection_name = "Team One"
-    collection_id = _collection_id(collection_name)
-    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
-        rsps.add(MOCKED_LOGIN)
-
-        client = BitwardenPublicApi(
-            logger=logging.getLogger(),
-            client_id="foo",
-            client_secret="bar",
-        )
-
-        rsps.add(
-            status=200,
-            content_type="application/json",
-            method="GET",
-            url=f"https://api.bitwarden.eu/public/collections/{collection_id}",
-            json={
-                "externalId": "Team Name One",
-                "object": "collection",
-                "id": collection_id,
-                "groups": [],
-            },
-        )
-
-        assert "Team Name One" == client._BitwardenPublicApi__get_collection_external_id(collection_id)  # type: ignore
-
-        rsps.add(
-            status=500,
-            method="GET",
-            url=f"https://api.bitwarden.eu/public/collections/{collection_id}",
-            json={
-                "error": "Failed to get collections",
-            },
-        )
-
-        with pytest.raises(Exception, match="Failed to get collections"):
-            client._BitwardenPublicApi__get_collection_external_id(collection_id)  # type: ignore
-
-
 def test_failed_to_update_collection_group() -> None:
     collection_name = "Team Name One"
     collection_id = _collection_id(collection_name)
@@ -1409,11 +1525,66 @@ def test_update_collection_groups_success() -> None:
             group_id="XXXXXXXX",
         )
 
-        assert len(rsps.calls) == 5
+        assert len(rsps.calls) == 3
         assert rsps.calls[-1].request.method == "PUT"
         assert rsps.calls[-1].request.url == f"https://api.bitwarden.eu/public/collections/{collection_id}"
 
 
+def test_assign_groups_to_collections_merges_groups_per_collection() -> None:
+    team_one_id = _collection_id("Team One")
+    team_two_id = _collection_id("Team Two")
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        team_one = rsps.add(
+            responses.GET,
+            f"https://api.bitwarden.eu/public/collections/{team_one_id}",
+            json=_collection_object_with_base64_encoded_external_id(
+                "Team One", groups=[{"id": "WWWWWWWW", "readOnly": False}]
+            ),
+        )
+        rsps.add(
+            responses.GET,
+            f"https://api.bitwarden.eu/public/collections/{team_two_id}",
+            json=_collection_object_with_base64_encoded_external_id(
+                "Team Two", groups=[{"id": "ZZZZZZZZ", "readOnly": False}]
+            ),
+        )
+        put = rsps.add(
+            responses.PUT,
+            f"https://api.bitwarden.eu/public/collections/{team_one_id}",
+            match=[
+                matchers.json_params_matcher(
+                    {
+                        "externalId": _external_id_base64_encoded("Team One"),
+                        "groups": [
+                            {"id": "WWWWWWWW", "readOnly": False},
+                            {"id": "XXXXXXXX", "readOnly": False},
+                            {"id": "YYYYYYYY", "readOnly": False},
+                        ],
+                    }
+                )
+            ],
+        )
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.assign_groups_to_collections(
+            [
+                ("Team One", team_one_id, "XXXXXXXX"),
+                ("Team Two", team_two_id, "ZZZZZZZZ"),
+                ("Team One", team_one_id, "YYYYYYYY"),
+            ]
+        )
+
+        assert team_one.call_count == 1
+        assert put.call_count == 1
+        assert client.write_counter.sent == 1
+        assert client.write_counter.suppressed == 1
+
+
 def test_list_existing_collections_duplicate() -> None:
     team_one_name = "Team Name One"
     teams = [team_one_name]
@@ -1708,6 +1879,61 @@ def test_collate_user_group_ids_duplicates() -> None:
             client.collate_user_group_ids(teams=teams, groups=groups, collections=collections)
 
 
+def test_collate_user_group_ids_duplicates_are_not_hidden_by_a_failed_assignment() -> None:
+    teams = ["Team Name One", "Team Name Two"]
+    groups = {"Team Name One": "AAAAAAAA", "Team Name Two": "duplicate"}
+    collections = {"Team Name One": {"id": "ZZZZZZZZ", "externalID": ""}}
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with (
+            patch.object(
+                client, "assign_groups_to_collections", side_effect=Exception("Failed to update the collection")
+            ) as assign_groups_to_collections,
+            pytest.raises(Exception, match="There are duplicate groups or collections for Team Name Two") as error,
+        ):
+            client.collate_user_group_ids(teams=teams, groups=groups, collections=collections)
+
+        assign_groups_to_collections.assert_called_once_with([("Team Name One", "ZZZZZZZZ", "AAAAAAAA")])
+        assert error.value.__cause__ is None
+        assert error.value.__notes__ == [
+            "Assigning the groups collated before the failure also failed: Failed to update the collection"
+        ]
+
+
+def test_collate_user_group_ids_leaves_pending_assignments_to_the_caller() -> None:
+    groups = {"Team Name One": "AAAAAAAA"}
+    collections = {"Team Name One": {"id": "ZZZZZZZZ", "externalID": ""}}
+    pending_assignments = [("Team Name Two", "YYYYYYYY", "BBBBBBBB")]
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with patch.object(client, "assign_groups_to_collections") as assign_groups_to_collections:
+            group_ids = client.collate_user_group_ids(
+                teams=["Team Name One"],
+                groups=groups,
+                collections=collections,
+                pending_assignments=pending_assignments,
+            )
+
+        assert group_ids == ["AAAAAAAA"]
+        assign_groups_to_collections.assert_not_called()
+        assert pending_assignments == [
+            ("Team Name Two", "YYYYYYYY", "BBBBBBBB"),
+            ("Team Name One", "ZZZZZZZZ", "AAAAAAAA"),
+        ]
+
+
 def test_remove_user(caplog: LogCaptureFixture) -> None:
     username = "test.user02"
     with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
@@ -1950,7 +2176,7 @@ def test_get_group_id_by_name() -> None:
         rsps.add(MOCKED_LOGIN)
         rsps.add(
             responses.GET,
-            "https://api.bitwarden.eu/public/groups/",
+            "https://api.bitwarden.eu/public/groups",
             json={
                 "object": "list",
                 "data": [
@@ -1986,7 +2212,7 @@ def test_get_group_id_by_name_not_found() -> None:
         rsps.add(MOCKED_LOGIN)
         rsps.add(
             responses.GET,
-            "https://api.bitwarden.eu/public/groups/",
+            "https://api.bitwarden.eu/public/groups",
             json={"object": "list", "data": [{}]},
             status=200,
             content_type="application/json",
@@ -2007,7 +2233,7 @@ def test_get_group_id_by_name_failure() -> None:
         rsps.add(MOCKED_LOGIN)
         rsps.add(
             responses.GET,
-            "https://api.bitwarden.eu/public/groups/",
+            "https://api.bitwarden.eu/public/groups",
             body=b'{"object":"error","message":"The request\'s model state is invalid."}',
             status=400,
             content_type="application/json",
@@ -2040,6 +2266,70 @@ def test_get_users_in_group() -> None:
         assert client.get_users_in_group("539a36c5-e0d2-4cf9-979e-51ecf5cf6593") == ["11111111"]
 
 
+def test_update_group_members() -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            responses.PUT,
+            "https://api.bitwarden.eu/public/groups/group-id/member-ids",
+            match=[matchers.json_params_matcher({"memberIds": ["11111111", "22222222"]})],
+            status=200,
+        )
+        rsps.add(
+            responses.PUT,
+            "https://api.bitwarden.eu/public/groups/other-group-id/member-ids",
+            status=400,
+        )
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.update_group_members(group_id="group-id", member_ids=["11111111", "22222222"])
+        with pytest.raises(Exception, match="Failed to update group members"):
+            client.update_group_members(group_id="other-group-id", member_ids=[])
+
+
+def test_update_member_collections() -> None:
+    member = {
+        "id": "11111111",
+        "type": 2,
+        "externalId": "test.user01",
+        "resetPasswordEnrolled": True,
+        "permissions": None,
+    }
+    collections = [{"id": "collection-id", "readOnly": False, "hidePasswords": False, "manage": True}]
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            responses.PUT,
+            "https://api.bitwarden.eu/public/members/11111111",
+            match=[
+                matchers.json_params_matcher(
+                    {
+                        "type": 2,
+                        "externalId": "test.user01",
+                        "resetPasswordEnrolled": True,
+                        "permissions": None,
+                        "collections": collections,
+                    }
+                )
+            ],
+            status=200,
+        )
+        rsps.add(responses.PUT, "https://api.bitwarden.eu/public/members/11111111", status=400)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        client.update_member_collections(member=member, collections=collections)
+        with pytest.raises(Exception, match="Failed to update member test.user01"):
+            client.update_member_collections(member=member, collections=collections)
+
+
 def test_get_users_in_group_failure() -> None:
     with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
         rsps.add(MOCKED_LOGIN)
@@ -2059,6 +2349,55 @@ def test_get_users_in_group_failure() -> None:
             client.get_users_in_group("539a36c5-e0d2-4cf9-979e-51ecf5cf6593")
 
 
+def test_get_users_in_group_not_found() -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            responses.GET,
+            "https://api.bitwarden.eu/public/groups/539a36c5-e0d2-4cf9-979e-51ecf5cf6593/member-ids",
+            status=404,
+        )
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        with pytest.raises(BitwardenNotFoundException) as error:
+            client.get_users_in_group("539a36c5-e0d2-4cf9-979e-51ecf5cf6593")
+
+        assert error.value.resource_id == "539a36c5-e0d2-4cf9-979e-51ecf5cf6593"
+
+
+def test_get_membership_index() -> None:
+    groups = [
+        {"name": "team-one", "id": "group-one"},
+        {"name": "team-two", "id": "group-two"},
+        {"name": "x", "id": "bad"},
+    ]
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(responses.GET, "https://api.bitwarden.eu/public/groups", json={"data": groups})
+        rsps.add(
+            responses.GET, "https://api.bitwarden.eu/public/groups/group-one/member-ids", json=["11111111", "22222222"]
+        )
+        rsps.add(responses.GET, "https://api.bitwarden.eu/public/groups/group-two/member-ids", json=["22222222"])
+        rsps.add(responses.GET, "https://api.bitwarden.eu/public/groups/bad/member-ids", status=500)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        index = client.get_membership_index(max_workers=2)
+
+    assert index.members_of("group-one") == ["11111111", "22222222"]
+    assert index.members_of("bad") == []
+    assert sorted(index.groups_of("22222222")) == ["group-one", "group-two"]
+    assert index.groups_of("33333333") == []
+    assert list(index.failures) == ["bad"]
+    assert "Failed to get users in group" in str(index.failures["bad"])
+
+
 def test_get_users_in_group_with_empty(caplog: LogCaptureFixture) -> None:
     with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
         rsps.add(MOCKED_LOGIN)
@@ -2157,3 +2496,341 @@ def _user_collection(
     name: str, readOnly: bool = True, hidePasswords: bool = False, manage: bool = False
 ) -> Dict[str, Any]:
     return {"id": _collection_id(name), "readOnly": readOnly, "hidePasswords": hidePasswords, "manage": manage}
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_send_rate_limited_retries_after_rate_limit(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(
+            method=responses.PUT,
+            url="https://api.bitwarden.eu/public/collections/id-one",
+            status=429,
+            headers={"Retry-After": "2"},
+        )
+        rsps.add(method=responses.PUT, url="https://api.bitwarden.eu/public/collections/id-one", status=200)
+
+        response = send_rate_limited(
+            "PUT", "https://api.bitwarden.eu/public/collections/id-one", json={"externalId": "one"}
+        )
+
+        assert response.status_code == 200
+        assert len(rsps.calls) == 2
+        assert mock_rate_limiter.acquire.call_count == 2
+        mock_rate_limiter.pause.assert_called_once_with(2.0)
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_send_rate_limited_gives_up_after_max_retries(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(method=responses.GET, url="https://api.bitwarden.eu/public/members", status=429)
+
+        response = send_rate_limited("GET", "https://api.bitwarden.eu/public/members")
+
+        assert response.status_code == 429
+        assert len(rsps.calls) == 5
+        assert mock_rate_limiter.pause.call_count == 4
+        mock_rate_limiter.pause.assert_called_with(60.0)
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.session.get")
+def test_iter_event_pages_yields_each_page_as_it_arrives(mock_get: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        response_1 = MagicMock(status_code=200)
+        response_1.json.return_value = {"data": [{"id": "event_1"}, {"id": "event_2"}], "continuationToken": "page_2"}
+        response_2 = MagicMock(status_code=200)
+        response_2.json.return_value = {"data": [{"id": "event_3"}], "continuationToken": None}
+        mock_get.side_effect = [response_1, response_2]
+
+        pages = client.iter_event_pages(start_date="2026-01-01", end_date="2026-01-31")
+
+        assert next(pages) == [{"id": "event_1"}, {"id": "event_2"}]
+        assert mock_get.call_count == 1
+        assert next(pages) == [{"id": "event_3"}]
+        assert list(pages) == []
+
+        assert mock_get.call_args_list[0].kwargs["params"] == {
+            "start": "2026-01-01",
+            "end": "2026-01-31",
+            "continuationToken": "page_2",
+        }
+        response_1.json.assert_called_once()
+        response_2.json.assert_called_once()
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.session.get")
+def test_iter_event_pages_fails_when_the_timeout_passes_with_pages_left(mock_get: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"data": [{"id": "event_1"}], "continuationToken": "page_2"}
+        mock_get.return_value = response
+
+        with patch("bitwarden_manager.clients.bitwarden_public_api.time") as mock_time:
+            mock_time.time.side_effect = [0.0, 0.0, 601.0]
+            pages = client.iter_event_pages(start_date="2026-01-01", end_date="2026-01-31")
+
+            assert next(pages) == [{"id": "event_1"}]
+            with pytest.raises(
+                BitwardenEventsIncompleteException,
+                match="Ran out of time fetching events for time range: 2026-01-01 to 2026-01-31",
+            ):
+                next(pages)
+
+        assert mock_get.call_count == 1
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.session.get")
+def test_iter_events_yields_events_across_pages(mock_get: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+
+        mock_logger = MagicMock()
+        client = BitwardenPublicApi(
+            logger=mock_logger,
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        mock_get.side_effect = [
+            MagicMock(status_code=200, json=lambda: {"data": [{"id": "event_1"}], "continuationToken": "page_2"}),
+            MagicMock(status_code=200, json=lambda: {"data": [{"id": "event_2"}], "continuationToken": None}),
+        ]
+
+        events = client.iter_events(start_date="2026-01-01")
+
+        assert [event["id"] for event in events] == ["event_1", "event_2"]
+        mock_logger.info.assert_any_call("Retrieved 1 total events")
+        mock_logger.info.assert_any_call("Retrieved 2 total events")
+        mock_logger.info.assert_called_with("Successfully fetched 2 events for time range: 2026-01-01 to now")
+
+
+def test_split_into_windows() -> None:
+    assert BitwardenPublicApi.split_into_windows(
+        start_date="2026-01-01", end_date="2026-01-08T12:00:00+00:00", window_days=3
+    ) == [
+        ("2026-01-01T00:00:00+00:00", "2026-01-03T23:59:59.999000+00:00"),
+        ("2026-01-04T00:00:00+00:00", "2026-01-06T23:59:59.999000+00:00"),
+        ("2026-01-07T00:00:00+00:00", "2026-01-08T12:00:00+00:00"),
+    ]
+
+
+@freeze_time("2026-01-03T06:00:00")
+def test_split_into_windows_defaults_to_now() -> None:
+    assert BitwardenPublicApi.split_into_windows(start_date="2026-01-02", end_date=None, window_days=7) == [
+        ("2026-01-02T00:00:00+00:00", "2026-01-03T06:00:00+00:00"),
+    ]
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_iter_events_in_windows(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[
+                matchers.query_param_matcher(
+                    {"start": "2026-01-01T00:00:00+00:00", "end": "2026-01-01T23:59:59.999000+00:00"}
+                )
+            ],
+            json={"data": [{"id": "day_1_event_1"}], "continuationToken": "day_1_page_2"},
+        )
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[
+                matchers.query_param_matcher(
+                    {
+                        "start": "2026-01-01T00:00:00+00:00",
+                        "end": "2026-01-01T23:59:59.999000+00:00",
+                        "continuationToken": "day_1_page_2",
+                    }
+                )
+            ],
+            json={"data": [{"id": "day_1_event_2"}], "continuationToken": None},
+        )
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[
+                matchers.query_param_matcher({"start": "2026-01-02T00:00:00+00:00", "end": "2026-01-02T12:00:00+00:00"})
+            ],
+            status=429,
+            headers={"Retry-After": "1"},
+        )
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[
+                matchers.query_param_matcher({"start": "2026-01-02T00:00:00+00:00", "end": "2026-01-02T12:00:00+00:00"})
+            ],
+            json={"data": [{"id": "day_2_event_1"}], "continuationToken": None},
+        )
+
+        mock_logger = MagicMock()
+        client = BitwardenPublicApi(
+            logger=mock_logger,
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        events = client.iter_events(start_date="2026-01-01", end_date="2026-01-02T12:00:00", window_days=1)
+
+        assert sorted(event["id"] for event in events) == ["day_1_event_1", "day_1_event_2", "day_2_event_1"]
+        mock_rate_limiter.pause.assert_called_once_with(1.0)
+        mock_logger.info.assert_any_call(
+            "Fetching events for time range: 2026-01-01 to 2026-01-02T12:00:00 in 2 windows"
+        )
+        mock_logger.info.assert_called_with(
+            "Successfully fetched 3 events for time range: 2026-01-01 to 2026-01-02T12:00:00"
+        )
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_iter_events_in_windows_fails(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(method=responses.GET, url="https://api.bitwarden.eu/public/events", status=500)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with pytest.raises(Exception, match="Failed to retrieve events report"):
+            list(client.iter_events(start_date="2026-01-01", end_date="2026-01-01T12:00:00", window_days=1))
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_iter_events_in_windows_fails_when_the_deadline_passes_before_any_window(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with pytest.raises(BitwardenEventsIncompleteException, match="Ran out of time fetching events for window"):
+            list(client.iter_events(start_date="2026-01-01", end_date="2026-01-03", window_days=1, timeout=0))
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.time")
+def test_iter_events_in_windows_fails_when_the_deadline_passes_mid_range(mock_time: Mock) -> None:
+    now = [1000.0]
+    mock_time.time.side_effect = lambda: now[0]
+    pages: Dict[Tuple[str, Optional[str]], Tuple[List[Dict[str, Any]], Optional[str]]] = {
+        ("2026-01-01T00:00:00+00:00", None): ([{"id": "day_1_event_1"}], None),
+        ("2026-01-02T00:00:00+00:00", None): ([{"id": "day_2_event_1"}], "day_2_page_2"),
+    }
+
+    def get_event_page(
+        start_date: str, end_date: str, continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if start_date == "2026-01-02T00:00:00+00:00":
+            # the second window uses up the time left before its continuation page is fetched
+            now[0] += 61
+        return pages[(start_date, continuation_token)]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+    with patch.object(BitwardenPublicApi, "get_event_page", side_effect=get_event_page) as get_event_page_mock:
+        events = client.iter_events_in_windows(
+            start_date="2026-01-01", end_date="2026-01-04", window_days=1, timeout=60, max_workers=1
+        )
+        with pytest.raises(BitwardenEventsIncompleteException, match="window: 2026-01-02T00:00:00"):
+            list(events)
+
+    assert get_event_page_mock.call_count == 2
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_remove_users_by_id(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/11111111", status=200)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/22222222", status=429)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/22222222", status=200)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/33333333", status=500)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/44444444", status=404)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        results = client.remove_users_by_id(
+            {
+                "33333333": "test.user03",
+                "11111111": "test.user01",
+                "22222222": "test.user02",
+                "44444444": "test.user04",
+            }
+        )
+
+        assert [result.item for result in results] == ["11111111", "22222222", "33333333", "44444444"]
+        assert [result.succeeded for result in results] == [True, True, False, True]
+        assert isinstance(results[2].error, BitwardenAPIException)
+        assert "Failed to delete user test.user03" in str(results[2].error)
+        assert mock_rate_limiter.acquire.call_count == 5
+        mock_rate_limiter.pause.assert_called_once_with(60.0)
+
+
+@patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+def test_get_event_page(mock_rate_limiter: Mock) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[matchers.query_param_matcher({"start": "2026-01-01", "end": "2026-04-01T00:00:00+00:00"})],
+            json={"data": [{"id": "event_1"}], "continuationToken": "page_2"},
+        )
+        rsps.add(
+            method=responses.GET,
+            url="https://api.bitwarden.eu/public/events",
+            match=[
+                matchers.query_param_matcher(
+                    {"start": "2026-01-01", "end": "2026-04-01T00:00:00+00:00", "continuationToken": "page_2"}
+                )
+            ],
+            json={"data": [{"id": "event_2"}], "continuationToken": None},
+        )
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        assert client.get_event_page(start_date="2026-01-01", end_date="2026-04-01T00:00:00+00:00") == (
+            [{"id": "event_1"}],
+            "page_2",
+        )
+        assert client.get_event_page(
+            start_date="2026-01-01", end_date="2026-04-01T00:00:00+00:00", continuation_token="page_2"
+        ) == ([{"id": "event_2"}], None)
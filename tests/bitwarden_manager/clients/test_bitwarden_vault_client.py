@@ -176,3 +176,17 @@ def test_get_collection_id_by_name_not_found(client: BitwardenVaultClient) -> No
 def test_get_collection_id_by_name_failed(failing_client: BitwardenVaultClient) -> None:
     with pytest.raises(BitwardenVaultClientError, match="'list', 'org-collections'"):
         failing_client.get_collection_id_by_name("Root")
+
+
+def test_for_organisation_uses_an_isolated_cli_profile(client: BitwardenVaultClient) -> None:
+    org_client = client.for_organisation("org-two")
+
+    assert org_client.organisation_id == "org-two"
+    assert org_client.cli_config_dir == "/tmp/.config-org-two"
+    assert client.cli_config_dir == "/tmp/.config"
+    assert org_client.cli_executable_path == client.cli_executable_path
+
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        org_client.export_vault(file_path=tmpfile.name)
+        file_content = tmpfile.readlines()
+    assert b'{"test": "foo"}' in file_content
@@ -0,0 +1,40 @@
+import json
+import os
+
+import boto3
+from moto import mock_aws
+
+from bitwarden_manager.clients.json_store import LocalJsonStore, S3JsonStore
+from bitwarden_manager.clients.s3_client import S3Client
+from tests.bitwarden_manager.clients.test_s3_client import create_bucket_in_local_region
+
+
+def test_local_json_store(tmp_path: str) -> None:
+    store = LocalJsonStore(path=os.path.join(tmp_path, "ledger.json"))
+
+    assert store.load() is None
+
+    store.save({"b": [1, 2], "a": "café"})
+
+    assert store.load() == {"a": "café", "b": [1, 2]}
+    with open(os.path.join(tmp_path, "ledger.json"), encoding="utf-8") as f:
+        assert f.read() == '{"a":"caf\\u00e9","b":[1,2]}'
+    assert os.listdir(tmp_path) == ["ledger.json"]
+
+
+@mock_aws
+def test_s3_json_store() -> None:
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+    store = S3JsonStore(s3_client=S3Client(), bucket_name=bucket_name, key="ledger.json")
+
+    assert store.load() is None
+
+    store.save({"checkpoint": 1, "last_seen": {"11111111": 1}})
+
+    assert store.load() == {"checkpoint": 1, "last_seen": {"11111111": 1}}
+    assert json.loads(s3.get_object(Bucket=bucket_name, Key="ledger.json")["Body"].read()) == {
+        "checkpoint": 1,
+        "last_seen": {"11111111": 1},
+    }
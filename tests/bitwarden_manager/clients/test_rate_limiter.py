@@ -0,0 +1,41 @@
+from unittest.mock import Mock, patch
+
+from freezegun import freeze_time
+
+from bitwarden_manager.clients.rate_limiter import RateLimiter
+
+
+@freeze_time("2026-01-01", tick=False)
+def test_acquire_allows_a_burst_without_waiting() -> None:
+    limiter = RateLimiter(requests_per_second=2, burst=3)
+
+    with patch("bitwarden_manager.clients.rate_limiter.time.sleep") as sleep_mock:
+        for _ in range(3):
+            limiter.acquire()
+
+    sleep_mock.assert_not_called()
+
+
+def test_acquire_waits_for_a_token_once_the_burst_is_spent() -> None:
+    with freeze_time("2026-01-01") as frozen_time:
+        limiter = RateLimiter(requests_per_second=2, burst=1)
+        sleep_mock = Mock(side_effect=lambda seconds: frozen_time.tick(seconds))
+
+        with patch("bitwarden_manager.clients.rate_limiter.time.sleep", sleep_mock):
+            limiter.acquire()
+            limiter.acquire()
+
+    sleep_mock.assert_called_once_with(0.5)
+
+
+def test_pause_holds_back_callers_until_the_retry_after_period_has_passed() -> None:
+    with freeze_time("2026-01-01") as frozen_time:
+        limiter = RateLimiter(requests_per_second=10, burst=10)
+        sleep_mock = Mock(side_effect=lambda seconds: frozen_time.tick(seconds))
+
+        with patch("bitwarden_manager.clients.rate_limiter.time.sleep", sleep_mock):
+            limiter.pause(30)
+            limiter.pause(5)
+            limiter.acquire()
+
+    sleep_mock.assert_called_once_with(30)
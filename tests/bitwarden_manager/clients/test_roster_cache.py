@@ -0,0 +1,32 @@
+from freezegun import freeze_time
+
+from bitwarden_manager.clients.roster_cache import RosterCache
+
+
+def test_rosters_expire_after_the_ttl() -> None:
+    with freeze_time("2026-01-01") as frozen_time:
+        cache = RosterCache(ttl_seconds=60)
+        cache.put("team-one", {"john.doe": "user"})
+
+        frozen_time.tick(59)
+        assert cache.get("team-one") == {"john.doe": "user"}
+
+        frozen_time.tick(1)
+        assert cache.get("team-one") is None
+        assert cache.get("team-two") is None
+
+
+def test_cached_rosters_are_copies() -> None:
+    cache = RosterCache(ttl_seconds=60)
+    roster = {"john.doe": "user"}
+    cache.put("team-one", roster)
+    roster["foo.bar"] = "team_admin"
+
+    cached = cache.get("team-one")
+    assert cached == {"john.doe": "user"}
+    assert cached is not None
+    cached["foo.bar"] = "team_admin"
+    assert cache.get("team-one") == {"john.doe": "user"}
+
+    cache.clear()
+    assert cache.get("team-one") is None
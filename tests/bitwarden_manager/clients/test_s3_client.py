@@ -1,13 +1,16 @@
 import gzip
 import json
+from typing import Any, Dict, List
+from unittest.mock import patch
 
 import boto3
 import pytest
 from boto3_type_annotations import s3
+from botocore.exceptions import BotoCoreError
 from mock import MagicMock
 from moto import mock_aws
 
-from bitwarden_manager.clients.s3_client import S3Client
+from bitwarden_manager.clients.s3_client import S3Client, iter_json_array_items
 
 
 @mock_aws
@@ -82,3 +85,173 @@ def test_read_object_fails() -> None:
     # s3.put_object(Bucket=bucket_name, Key=filename, Body="Hello Bitwarden")
     with pytest.raises(Exception, match=f"Failed to read s3://{bucket_name}/{filename}"):
         client.read_object(bucket_name, filename)
+
+
+@mock_aws
+def test_read_object_if_exists() -> None:
+    client = S3Client()
+
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+    s3.put_object(Bucket=bucket_name, Key="present.json", Body="Hello Bitwarden")
+
+    assert client.read_object_if_exists(bucket_name, "present.json") == "Hello Bitwarden"
+    assert client.read_object_if_exists(bucket_name, "missing.json") is None
+
+
+@mock_aws
+def test_read_object_if_exists_fails() -> None:
+    client = S3Client()
+
+    with pytest.raises(Exception, match="Failed to read s3://missing_bucket/missing.json"):
+        client.read_object_if_exists("missing_bucket", "missing.json")
+
+
+def test_read_object_if_exists_fails_on_botocore_error() -> None:
+    client = S3Client()
+    client._boto_s3 = MagicMock(get_object=MagicMock(side_effect=BotoCoreError()))
+
+    with pytest.raises(Exception, match="Failed to read s3://test_bucket/missing.json"):
+        client.read_object_if_exists("test_bucket", "missing.json")
+
+
+@mock_aws
+def test_write_object() -> None:
+    client = S3Client()
+
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+
+    client.write_object(bucket_name, "ledger.json", '{"café": 1}')
+
+    assert s3.get_object(Bucket=bucket_name, Key="ledger.json")["Body"].read().decode("utf-8") == '{"café": 1}'
+
+
+@mock_aws
+def test_write_object_fails() -> None:
+    client = S3Client()
+
+    with pytest.raises(Exception, match="Failed to write s3://missing_bucket/ledger.json"):
+        client.write_object("missing_bucket", "ledger.json", "{}")
+
+
+@mock_aws
+def test_iter_object_chunks() -> None:
+    client = S3Client()
+
+    filename = "bw_backup_2023.json"
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+    s3.put_object(Bucket=bucket_name, Key=filename, Body="Hello Bitwarden")
+
+    chunks = list(client.iter_object_chunks(bucket_name, filename, chunk_size=4))
+
+    assert chunks == [b"Hell", b"o Bi", b"twar", b"den"]
+
+
+@mock_aws
+def test_iter_object_chunks_fails() -> None:
+    client = S3Client()
+
+    filename = "bw_backup_2023.json"
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+    with pytest.raises(Exception, match=f"Failed to read s3://{bucket_name}/{filename}"):
+        list(client.iter_object_chunks(bucket_name, filename))
+
+
+@mock_aws
+def test_iter_json_array() -> None:
+    client = S3Client()
+
+    filename = "bitwarden-data-export.json"
+    bucket_name = "test_bucket"
+    s3 = boto3.client("s3")
+    create_bucket_in_local_region(s3, bucket_name)
+    document = {
+        "encrypted": False,
+        "folders": [{"id": "folder-1", "name": "Ünïcödé folder"}],
+        "collections": [{"id": f"id-{i}", "name": f"collection-{i}", "externalId": None} for i in range(50)],
+        "items": [{"id": "item-1", "notes": "x" * 1000}],
+    }
+    s3.put_object(Bucket=bucket_name, Key=filename, Body=json.dumps(document, indent=2).encode("utf-8"))
+
+    collections = client.iter_json_array(bucket_name, filename, array_name="collections", chunk_size=7)
+
+    assert list(collections) == document["collections"]
+
+
+def test_iter_json_array_items_across_chunk_boundaries() -> None:
+    document = '{"total": 12345, "name": "café ☃", "values": [1234567, -0.5e3, "é", null, {"a": [true]}]}'
+    encoded = document.encode("utf-8")
+
+    for chunk_size in range(1, len(encoded) + 1):
+        chunks = _chunked(encoded, chunk_size)
+        assert list(iter_json_array_items(chunks, array_name="values")) == [1234567, -500.0, "é", None, {"a": [True]}]
+
+
+def test_iter_json_array_items_records_the_members_before_the_array() -> None:
+    document = (
+        '{"encrypted": false, "notes": "a \\"quoted\\" [value]", "nested": {"x": [1, {"y": "}"}]}, "values": [1]}'
+    )
+    leading_members: Dict[str, Any] = {}
+
+    items = iter_json_array_items(_chunked(document.encode("utf-8"), 3), "values", leading_members=leading_members)
+
+    assert list(items) == [1]
+    assert leading_members == {"encrypted": False, "notes": 'a "quoted" [value]', "nested": {"x": [1, {"y": "}"}]}}
+
+
+def test_iter_json_array_items_decodes_a_value_spanning_many_chunks_once() -> None:
+    document = json.dumps({"notes": "x" * 100000, "values": [{"id": "y" * 100000}]}).encode("utf-8")
+
+    with patch("bitwarden_manager.clients.s3_client._JSON_DECODER") as decoder:
+        decoder.raw_decode.side_effect = json.JSONDecoder().raw_decode
+        assert list(iter_json_array_items(_chunked(document, 64), "values")) == [{"id": "y" * 100000}]
+
+    # the keys and the one array item, the skipped notes are never decoded
+    assert decoder.raw_decode.call_count == 3
+
+
+def test_iter_json_array_items_with_empty_array() -> None:
+    assert list(iter_json_array_items([b'{"collections": [ ], "items": []}'], array_name="collections")) == []
+
+
+def test_iter_json_array_items_stops_reading_after_the_array() -> None:
+    chunks = iter([b'{"collections": [1, 2]', b', "items": [', b"this is never read"])
+
+    assert list(iter_json_array_items(chunks, array_name="collections")) == [1, 2]
+    assert next(chunks) == b', "items": ['
+
+
+def test_iter_json_array_items_missing_array() -> None:
+    with pytest.raises(ValueError, match="JSON document has no 'collections' array"):
+        list(iter_json_array_items([b'{"encrypted": true, "data": "abc"}'], array_name="collections"))
+
+    with pytest.raises(ValueError, match="JSON document has no 'collections' array"):
+        list(iter_json_array_items([b"{}"], array_name="collections"))
+
+
+def test_iter_json_array_items_invalid_json() -> None:
+    with pytest.raises(ValueError, match="expected '{' but found '\\['"):
+        list(iter_json_array_items([b"[]"], array_name="collections"))
+
+    with pytest.raises(ValueError, match="expected '\\[' but found '\"'"):
+        list(iter_json_array_items([b'{"collections": "abc"}'], array_name="collections"))
+
+    with pytest.raises(ValueError, match="expected '\\]' but found 'end of document'"):
+        list(iter_json_array_items([b'{"collections": [1, 2'], array_name="collections"))
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array_items([b'{"collections": [1, {"a": '], array_name="collections"))
+
+    with pytest.raises(json.JSONDecodeError, match="Extra data"):
+        list(iter_json_array_items([b'{"collections": [1x]}'], array_name="collections"))
+
+
+def _chunked(data: bytes, size: int) -> List[bytes]:
+    return [data[start:end] for start, end in zip(range(0, len(data), size), range(size, len(data) + size, size))]
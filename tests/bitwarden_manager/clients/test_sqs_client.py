@@ -0,0 +1,68 @@
+import json
+import os
+from typing import List
+from unittest import mock
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from bitwarden_manager.clients.sqs_client import SqsClient
+
+
+@mock.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "eu-west-2"})
+@mock_aws
+def test_send_message() -> None:
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="bitwarden-manager")["QueueUrl"]
+
+    SqsClient().send_message(queue_url=queue_url, body={"event_name": "offboard_inactive_users", "resume": True})
+
+    messages = sqs.receive_message(QueueUrl=queue_url)["Messages"]
+    assert [json.loads(message["Body"]) for message in messages] == [
+        {"event_name": "offboard_inactive_users", "resume": True}
+    ]
+
+
+@mock.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "eu-west-2"})
+@mock_aws
+def test_send_message_fails() -> None:
+    with pytest.raises(Exception, match="Failed to send message to https://sqs.eu-west-2.amazonaws.com/1/missing"):
+        SqsClient().send_message(queue_url="https://sqs.eu-west-2.amazonaws.com/1/missing", body={})
+
+
+@mock.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "eu-west-2"})
+@mock_aws
+def test_send_messages_in_batches() -> None:
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="bitwarden-manager")["QueueUrl"]
+    client = SqsClient()
+    client._boto_sqs = MagicMock(wraps=client._boto_sqs)
+
+    client.send_messages(queue_url=queue_url, bodies=[{"shard": i} for i in range(12)])
+
+    assert client._boto_sqs.send_message_batch.call_count == 2
+    received: List[int] = []
+    while messages := sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages"):
+        received.extend(json.loads(message["Body"])["shard"] for message in messages)
+        sqs.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{"Id": m["MessageId"], "ReceiptHandle": m["ReceiptHandle"]} for m in messages],
+        )
+    assert sorted(received) == list(range(12))
+
+
+@mock.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "eu-west-2"})
+@mock_aws
+def test_send_messages_fails() -> None:
+    with pytest.raises(Exception, match="Failed to send messages to https://sqs.eu-west-2.amazonaws.com/1/missing"):
+        SqsClient().send_messages(queue_url="https://sqs.eu-west-2.amazonaws.com/1/missing", bodies=[{}])
+
+
+def test_send_messages_reports_failed_entries() -> None:
+    client = SqsClient.__new__(SqsClient)
+    client._boto_sqs = MagicMock(send_message_batch=MagicMock(return_value={"Failed": [{"Id": "0"}]}))
+
+    with pytest.raises(Exception, match="Failed to send 1 messages to queue-url"):
+        client.send_messages(queue_url="queue-url", bodies=[{}])
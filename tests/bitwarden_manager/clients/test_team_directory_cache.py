@@ -0,0 +1,37 @@
+from freezegun import freeze_time
+
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.team_directory_cache import TeamDirectoryCache
+
+
+def test_team_directory_expires_after_the_ttl(tmp_path: str) -> None:
+    with freeze_time("2026-01-01") as frozen_time:
+        cache = TeamDirectoryCache(ttl_seconds=60, store=LocalJsonStore(path=f"{tmp_path}/teams.json"))
+        assert cache.get() is None
+
+        assert cache.put(["team-one", "team-two"]) == frozenset(["team-one", "team-two"])
+        frozen_time.tick(59)
+        assert cache.get() == frozenset(["team-one", "team-two"])
+
+        frozen_time.tick(1)
+        assert cache.get() is None
+
+
+def test_team_directory_is_shared_through_the_store(tmp_path: str) -> None:
+    store = LocalJsonStore(path=f"{tmp_path}/teams.json")
+    with freeze_time("2026-01-01") as frozen_time:
+        TeamDirectoryCache(ttl_seconds=60, store=store).put(["team-one"])
+
+        warm_cache = TeamDirectoryCache(ttl_seconds=60, store=store)
+        assert warm_cache.get() == frozenset(["team-one"])
+
+        warm_cache.clear()
+        frozen_time.tick(60)
+        assert warm_cache.get() is None
+
+
+def test_unreadable_team_directory_is_a_miss(tmp_path: str) -> None:
+    with open(f"{tmp_path}/teams.json", "w", encoding="utf-8") as f:
+        f.write('{"teams": ["team-')
+
+    assert TeamDirectoryCache(ttl_seconds=60, store=LocalJsonStore(path=f"{tmp_path}/teams.json")).get() is None
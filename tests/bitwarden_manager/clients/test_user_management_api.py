@@ -6,6 +6,9 @@ from requests.exceptions import ConnectTimeout
 from _pytest.logging import LogCaptureFixture
 from urllib.parse import quote
 
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.roster_cache import RosterCache
+from bitwarden_manager.clients.team_directory_cache import TeamDirectoryCache
 from bitwarden_manager.clients.user_management_api import UserManagementApi
 
 API_URL = "https://user-management-backend-production.tools.tax.service.gov.uk/v2"
@@ -190,6 +193,11 @@ def test_get_user_role_by_team() -> None:
         with pytest.raises(Exception, match=f"fake.user is not a member of {team}"):
             client.get_user_role_by_team("fake.user", team)
 
+        client = UserManagementApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
         rsps.add(
             status=400,
             content_type="application/json",
@@ -234,6 +242,118 @@ def test_get_user_role_by_team_timeout() -> None:
             client.get_user_role_by_team(user, team)
 
 
+def test_get_team_members() -> None:
+    team = "Cloud Security"
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            status=200,
+            content_type="application/json",
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            json={
+                "members": [
+                    {"role": "user", "username": "john.doe"},
+                    {"role": "team_admin", "username": "foo.bar"},
+                ],
+                "team": "Cloud Security",
+            },
+        )
+
+        client = UserManagementApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        assert client.get_team_members(team) == {"john.doe": "user", "foo.bar": "team_admin"}
+
+        client = UserManagementApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+        rsps.add(
+            status=400,
+            content_type="application/json",
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            json={"error": "error"},
+        )
+
+        with pytest.raises(Exception, match=f"Failed to get team members of {team}"):
+            client.get_team_members(team)
+
+
+def test_rosters_are_cached_across_clients() -> None:
+    team = "Cloud Security"
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        roster = rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            json={"members": [{"role": "user", "username": "john.doe"}]},
+        )
+        rosters = RosterCache(ttl_seconds=60)
+
+        client = UserManagementApi(logger=logging.getLogger(), client_id="foo", client_secret="bar", rosters=rosters)
+        assert client.get_team_members(team) == {"john.doe": "user"}
+        other_client = UserManagementApi(
+            logger=logging.getLogger(), client_id="foo", client_secret="bar", rosters=rosters
+        )
+        assert other_client.get_user_role_by_team("john.doe", team) == "user"
+        assert roster.call_count == 1
+
+        with pytest.raises(Exception, match=f"new.user is not a member of {team}"):
+            other_client.get_user_role_by_team("new.user", team)
+        assert roster.call_count == 2
+
+
+def test_rosters_are_not_shared_by_clients_by_default() -> None:
+    team = "Cloud Security"
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            json={"members": [{"role": "user", "username": "john.doe"}]},
+        )
+        rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            json={"members": [{"role": "team_admin", "username": "john.doe"}]},
+        )
+
+        client = UserManagementApi(logger=logging.getLogger(), client_id="foo", client_secret="bar")
+        assert client.get_user_role_by_team("john.doe", team) == "user"
+        assert client.get_team_members(team) == {"john.doe": "user"}
+
+        # a later event gets a new client, which sees the promotion straight away
+        other_client = UserManagementApi(logger=logging.getLogger(), client_id="foo", client_secret="bar")
+        assert other_client.get_user_role_by_team("john.doe", team) == "team_admin"
+
+
+def test_get_team_members_timeout() -> None:
+    team = "fake team"
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            content_type="application/json",
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote(team)}/members",
+            body=ConnectTimeout(),
+        )
+
+        client = UserManagementApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with pytest.raises(Exception, match=f"Failed to get team members of {team} before the timeout"):
+            client.get_team_members(team)
+
+
 def test_get_teams() -> None:
     with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
         rsps.add(MOCKED_LOGIN)
@@ -271,3 +391,57 @@ def test_get_teams() -> None:
 
         with pytest.raises(Exception):
             client.get_teams()
+
+
+def test_get_team_directory_is_cached(tmp_path: str) -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        teams = rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams",
+            json={"teams": [{"team": "team-one"}, {"team": "team-two"}]},
+        )
+        team_directory = TeamDirectoryCache(ttl_seconds=60, store=LocalJsonStore(path=f"{tmp_path}/teams.json"))
+
+        for _ in range(2):
+            client = UserManagementApi(
+                logger=logging.getLogger(), client_id="foo", client_secret="bar", team_directory=team_directory
+            )
+            assert client.get_team_directory() == {"team-one", "team-two"}
+
+        assert teams.call_count == 1
+        assert len(rsps.calls) == 2
+
+
+def test_get_user_team_index() -> None:
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams",
+            json={"teams": [{"team": "team-one"}, {"team": "team two"}, {"team": "team-three"}, {"team": "team-four"}]},
+        )
+        rsps.add(
+            method=responses.GET,
+            url=f"{API_URL}/organisations/teams/{quote('team two')}/members",
+            json={"members": [{"role": "user", "username": "john.doe"}, {"role": "user", "username": "foo.bar"}]},
+        )
+        rsps.add(method=responses.GET, url=f"{API_URL}/organisations/teams/team-three/members", status=500)
+        rosters = RosterCache(ttl_seconds=60)
+        rosters.put("team-one", {"john.doe": "team_admin"})
+        rosters.put("team-four", {})
+
+        client = UserManagementApi(logger=logging.getLogger(), client_id="foo", client_secret="bar", rosters=rosters)
+        index = client.get_user_team_index(max_workers=2)
+
+        assert len(rsps.calls) == 4
+    assert index.rosters == {
+        "team-one": {"john.doe": "team_admin"},
+        "team two": {"john.doe": "user", "foo.bar": "user"},
+        "team-four": {},
+    }
+    assert index.roles_by_team("john.doe") == {"team-one": "team_admin", "team two": "user"}
+    assert index.teams_of("foo.bar") == ["team two"]
+    assert index.teams_of("new.user") == []
+    assert list(index.failures) == ["team-three"]
+    assert rosters.get("team two") == {"john.doe": "user", "foo.bar": "user"}
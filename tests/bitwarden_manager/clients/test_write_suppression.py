@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from bitwarden_manager.clients.write_suppression import WriteCounter, canonical, unchanged
+
+
+def test_canonical_ignores_key_and_list_order() -> None:
+    assert canonical({"b": [2, 1], "a": {"d": 1, "c": 2}}) == canonical({"a": {"c": 2, "d": 1}, "b": [1, 2]})
+    assert (
+        canonical([{"id": "two", "manage": False}, {"id": "one"}]) == '[{"id": "one"}, {"id": "two", "manage": false}]'
+    )
+
+
+def test_unchanged() -> None:
+    assert unchanged(["id-one", "id-two"], ["id-two", "id-one"])
+    assert unchanged([{"id": "one", "manage": True}], [{"manage": True, "id": "one"}])
+    assert not unchanged([{"id": "one", "manage": True}], [{"id": "one", "manage": False}])
+    assert not unchanged(["id-one"], ["id-one", "id-two"])
+
+
+def test_write_counter_is_shared_between_threads() -> None:
+    counter = WriteCounter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(100):
+            executor.submit(counter.record_sent)
+            executor.submit(counter.record_suppressed)
+
+    assert counter.sent == 100
+    assert counter.suppressed == 100
@@ -1,8 +1,12 @@
+from typing import Any, Dict, List
 from unittest import mock
 from unittest.mock import Mock, MagicMock, call
 
+import pytest
+
 from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.concurrency import TaskResult
 from bitwarden_manager.handlers.offboard_inactive_users import OffboardInactiveUsers
 
 
@@ -20,6 +24,7 @@ def test_offboard_users(logger_mock: Mock) -> None:
 
     mock_logger.info.assert_any_call("Removing user user1@example.com from bitwarden")
     mock_logger.info.assert_any_call("Removing user user2@example.com from bitwarden")
+    mock_api.remove_users_by_id.assert_called_once_with(all_users)
 
 
 @mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
@@ -61,5 +66,50 @@ def test__get_protected_users(logger_mock: Mock) -> None:
     mock_client.get_collection_id_by_name.assert_called_once_with("Root")
     mock_api.get_users.assert_called_once()
     mock_api.get_users_by_group_name.assert_has_calls(
-        calls=[call("MDTP Platform Owners"), call("AWS Account Authorisers")]
+        calls=[call("MDTP Platform Owners"), call("AWS Account Authorisers")], any_order=True
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test__get_protected_users_reuses_the_member_list(logger_mock: Mock) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users_by_group_name.return_value = []
+    mock_client = MagicMock(spec=BitwardenVaultClient)
+    mock_client.get_collection_id_by_name.return_value = "root-id"
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client, dry_run=True)
+
+    members: List[Dict[str, Any]] = [
+        {"userId": "1", "email": "user1@example.com", "collections": [{"id": "root-id"}]},
+        {"userId": "2", "email": "user2@example.com", "collections": None},
+    ]
+
+    assert offboard_handler._get_protected_users(members) == {"1"}
+    mock_api.get_users.assert_not_called()
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_offboard_users_reports_failed_removals(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+
+    error = Exception("Failed to delete user user2@example.com")
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.remove_users_by_id.return_value = [
+        TaskResult(item="11111111"),
+        TaskResult(item="22222222", error=error),
+    ]
+    mock_client = MagicMock(spec=BitwardenVaultClient)
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client, dry_run=False)
+    all_users = {"11111111": "user1@example.com", "22222222": "user2@example.com", "33333333": "user3@example.com"}
+
+    with pytest.raises(ExceptionGroup, match="Offboard Inactive Users Errors") as exc_info:
+        offboard_handler.offboard_users({"11111111", "22222222", "33333333"}, all_users, {"33333333"})
+
+    assert exc_info.value.exceptions == (error,)
+    mock_api.remove_users_by_id.assert_called_once_with(
+        {"11111111": "user1@example.com", "22222222": "user2@example.com"}
     )
+    mock_logger.warning.assert_called_once_with("Failed to remove user user2@example.com from bitwarden")
+    mock_logger.info.assert_any_call("Removed 1 of 2 inactive members from bitwarden")
@@ -0,0 +1,258 @@
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+from unittest.mock import MagicMock, Mock, call
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenNotFoundException, BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.handlers.onboard_users import OnboardUsers
+from bitwarden_manager.team_mapping import TeamMapping
+from bitwarden_manager.user import UmpUser
+
+USER_TEAMS = {"test.user01": ["team-one"], "test.user02": ["team-one", "team-two"]}
+
+
+def _user_management_api() -> Mock:
+    return MagicMock(
+        spec=UserManagementApi,
+        get_user_teams=Mock(side_effect=lambda username: USER_TEAMS[username]),
+        get_user_role_by_team=Mock(return_value="user"),
+        get_team_directory=Mock(return_value=frozenset(["team-one", "team-two"])),
+    )
+
+
+def _collate_user_group_ids(
+    teams: List[str],
+    groups: Dict[str, str],
+    collections: Dict[str, Any],
+    pending_assignments: List[Tuple[str, str, str]],
+) -> List[str]:
+    pending_assignments.append((teams[0], collections[teams[0]]["id"], f"group-{teams[0]}"))
+    return [f"group-{teams[0]}"]
+
+
+def _member(user_id: str) -> Dict[str, Any]:
+    return {"id": user_id, "email": f"{user_id.removeprefix('id-')}@example.com", "type": 2, "permissions": None}
+
+
+def _bitwarden_api(existing_emails: List[str]) -> Mock:
+    collections = {
+        "team-one": {"id": "collection-one", "externalId": "dGVhbS1vbmU="},
+        "team-two": {"id": "collection-two", "externalId": "dGVhbS10d28="},
+    }
+    return MagicMock(
+        spec=BitwardenPublicApi,
+        get_users=Mock(
+            side_effect=[
+                [{"email": email} for email in existing_emails],
+                [_member("id-test.user01"), _member("id-test.user02")],
+            ]
+        ),
+        list_existing_groups=Mock(return_value={"team-one": "group-one"}),
+        list_existing_collections=Mock(return_value=collections),
+        collate_user_group_ids=Mock(side_effect=_collate_user_group_ids),
+        get_groups=Mock(return_value={"team-one": "group-team-one", "custom": "custom-group"}),
+        invite_user=Mock(side_effect=lambda user: f"id-{user.username}"),
+    )
+
+
+def _users(*usernames: str) -> List[Dict[str, str]]:
+    return [{"username": username, "email": f"{username}@example.com"} for username in usernames]
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_shares_one_directory_snapshot(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(existing_emails=["test.user03@example.com"])
+    mock_ump = _user_management_api()
+    mock_vault = MagicMock(spec=BitwardenVaultClient)
+
+    OnboardUsers(bitwarden_api=mock_bitwarden, user_management_api=mock_ump, bitwarden_vault_client=mock_vault).run(
+        {"event_name": "new_users", "users": _users("test.user01", "test.user02", "test.user03")}
+    )
+
+    # once for the users that already exist, once for the members invited by this batch
+    assert mock_bitwarden.get_users.call_count == 2
+    mock_bitwarden.get_member_update.assert_not_called()
+    mock_bitwarden.list_existing_groups.assert_called_once_with(["team-one", "team-two"])
+    mock_bitwarden.get_groups.assert_called_once()
+    mock_ump.get_team_directory.assert_called_once()
+    mock_vault.create_collections.assert_called_once_with([])
+    assert mock_bitwarden.collate_user_group_ids.call_count == 2
+    mock_bitwarden.assign_groups_to_collections.assert_called_once_with(
+        [("team-one", "collection-one", "group-team-one"), ("team-two", "collection-two", "group-team-two")]
+    )
+
+    user01 = UmpUser(username="test.user01", email="test.user01@example.com", roles_by_team={"team-one": "user"})
+    mock_bitwarden.invite_user.assert_has_calls([call(user=user01)], any_order=True)
+    assert mock_bitwarden.invite_user.call_count == 2
+    mock_bitwarden.associate_user_to_groups.assert_has_calls(
+        [
+            call(user_id="id-test.user01", managed_group_ids=["group-team-one"], custom_group_ids=["custom-group"]),
+            call(
+                user_id="id-test.user02",
+                managed_group_ids=["group-team-one", "group-team-two"],
+                custom_group_ids=["custom-group"],
+            ),
+        ],
+        any_order=True,
+    )
+    mock_bitwarden.grant_can_manage_permission_to_team_collections.assert_any_call(
+        user=user01,
+        teams=["team-one"],
+        collections=mock_bitwarden.list_existing_collections.return_value,
+        member_update=mock.ANY,
+    )
+    member_updates = [update.args[0] for update in mock_bitwarden.update_member.call_args_list]
+    assert sorted(update.member["id"] for update in member_updates) == ["id-test.user01", "id-test.user02"]
+    assert mock_bitwarden.update_member.call_count == 2
+    mock_logger.info.assert_any_call("User test.user03 already exists. Skipping.")
+    mock_logger.info.assert_any_call("Onboarded 2 of 2 users to bitwarden")
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_reports_each_failure(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(existing_emails=[])
+    duplicate = Exception("There are duplicate groups or collections for team-two")
+    ump_error = Exception("Failed to get teams for user")
+
+    def collate_user_group_ids(
+        teams: List[str],
+        groups: Dict[str, str],
+        collections: Dict[str, Any],
+        pending_assignments: List[Tuple[str, str, str]],
+    ) -> List[str]:
+        if teams == ["team-two"]:
+            raise duplicate
+        return _collate_user_group_ids(teams, groups, collections, pending_assignments)
+
+    def get_user_teams(username: str) -> List[str]:
+        if username == "test.user03":
+            raise ump_error
+        return USER_TEAMS[username]
+
+    mock_bitwarden.collate_user_group_ids.side_effect = collate_user_group_ids
+    mock_ump = _user_management_api()
+    mock_ump.get_user_teams.side_effect = get_user_teams
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        OnboardUsers(
+            bitwarden_api=mock_bitwarden,
+            user_management_api=mock_ump,
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "new_users", "users": _users("test.user01", "test.user02", "test.user03")})
+
+    assert exc_info.value.exceptions == (ump_error, duplicate)
+    mock_bitwarden.associate_user_to_groups.assert_called_once_with(
+        user_id="id-test.user01", managed_group_ids=["group-team-one"], custom_group_ids=["custom-group"]
+    )
+    mock_logger.warning.assert_has_calls(
+        [
+            call(f"Failed to acquire teams for user test.user03: {ump_error}"),
+            call(f"Failed to onboard user test.user02 to bitwarden: {duplicate}"),
+        ]
+    )
+    mock_logger.info.assert_any_call("Onboarded 1 of 3 users to bitwarden")
+    mock_bitwarden.assign_groups_to_collections.assert_called_once_with(
+        [("team-one", "collection-one", "group-team-one")]
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_fails_the_teams_whose_collections_were_not_assigned(logger_mock: Mock) -> None:
+    logger_mock.return_value = MagicMock()
+    mock_bitwarden = _bitwarden_api(existing_emails=[])
+    assign_error = Exception("Failed to update the collection groups")
+    mock_bitwarden.assign_groups_to_collections.side_effect = assign_error
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        OnboardUsers(
+            bitwarden_api=mock_bitwarden,
+            user_management_api=_user_management_api(),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "new_users", "users": _users("test.user01", "test.user02")})
+
+    assert exc_info.value.exceptions == (assign_error, assign_error)
+    mock_bitwarden.associate_user_to_groups.assert_not_called()
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_rediscovers_a_team_whose_mapped_collection_is_not_found(
+    logger_mock: Mock, tmp_path: str
+) -> None:
+    logger_mock.return_value = MagicMock()
+    mock_bitwarden = _bitwarden_api(existing_emails=[])
+    mock_bitwarden.assign_groups_to_collections.side_effect = [
+        BitwardenNotFoundException("deleted-collection", "Collection deleted-collection not found"),
+        None,
+    ]
+    mapping = TeamMapping(
+        store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json"),
+        teams={"team-one": ["group-team-one", "deleted-collection"]},
+    )
+
+    OnboardUsers(
+        bitwarden_api=mock_bitwarden,
+        user_management_api=_user_management_api(),
+        bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        team_mapping=mapping,
+    ).run({"event_name": "new_users", "users": _users("test.user01")})
+
+    assert mock_bitwarden.assign_groups_to_collections.call_args_list == [
+        call([("team-one", "deleted-collection", "group-team-one")]),
+        call([("team-one", "collection-one", "group-team-one")]),
+    ]
+    mock_bitwarden.list_existing_groups.assert_called_once_with(["team-one"])
+    assert mapping.teams == {}
+    mock_bitwarden.update_member.assert_called_once()
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_when_all_users_exist(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(existing_emails=["test.user01@example.com"])
+
+    OnboardUsers(
+        bitwarden_api=mock_bitwarden,
+        user_management_api=_user_management_api(),
+        bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+    ).run({"event_name": "new_users", "users": _users("test.user01")})
+
+    mock_bitwarden.invite_user.assert_not_called()
+    mock_logger.info.assert_called_with("All users already exist in bitwarden")
+
+
+@mock.patch("bitwarden_manager.handlers.onboard_users.get_bitwarden_logger")
+def test_onboard_users_fails_users_missing_from_the_member_snapshot(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(existing_emails=[])
+    mock_bitwarden.get_users.side_effect = [[], [_member("id-test.user01")]]
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        OnboardUsers(
+            bitwarden_api=mock_bitwarden,
+            user_management_api=_user_management_api(),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "new_users", "users": _users("test.user01", "test.user02")})
+
+    assert [str(error) for error in exc_info.value.exceptions] == ["No user with email test.user02@example.com found"]
+    mock_bitwarden.update_member.assert_called_once()
+    mock_logger.info.assert_any_call("Onboarded 1 of 2 users to bitwarden")
+
+
+def test_onboard_users_rejects_bad_events() -> None:
+    with pytest.raises(ValidationError):
+        OnboardUsers(
+            bitwarden_api=MagicMock(spec=BitwardenPublicApi),
+            user_management_api=MagicMock(spec=UserManagementApi),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "new_users", "users": []})
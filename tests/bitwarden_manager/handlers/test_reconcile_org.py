@@ -0,0 +1,215 @@
+from typing import Any, Dict, List
+from unittest import mock
+from unittest.mock import MagicMock, Mock, call
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi, MembershipIndex
+from bitwarden_manager.clients.user_management_api import UserManagementApi, UserTeamIndex
+from bitwarden_manager.handlers.reconcile_org import (
+    GroupMembershipChange,
+    MemberCollectionsChange,
+    ReconcileOrg,
+    plan_reconciliation,
+)
+
+MANAGE_ONE = {"id": "collection-one", "readOnly": False, "hidePasswords": False, "manage": True}
+MANAGE_TWO = {"id": "collection-two", "readOnly": False, "hidePasswords": False, "manage": True}
+MANUAL = {"id": "manual-collection", "readOnly": False, "hidePasswords": False, "manage": True}
+
+ROSTERS = {
+    "team-one": {"test.admin": "team_admin", "test.user": "user"},
+    "team-two": {"test.user": "user", "test.missing": "user"},
+    "team-three": {"test.user": "user"},
+    "team-four": {"test.admin": "user"},
+    "team-five": {"test.missing": "user"},
+}
+GROUPS = {"team-one": "group-one", "team-two": "group-two", "team-four": "duplicate"}
+COLLECTIONS = {
+    "team-one": {"id": "collection-one", "externalId": "dGVhbS1vbmU="},
+    "team-two": {"id": "collection-two", "externalId": "dGVhbS10d28="},
+    "team-three": {"id": "collection-three", "externalId": "dGVhbS10aHJlZQ=="},
+}
+
+
+def _member(member_id: str, username: str, collections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": member_id,
+        "type": 2,
+        "externalId": username,
+        "resetPasswordEnrolled": True,
+        "permissions": None,
+        "collections": collections,
+    }
+
+
+def _members() -> List[Dict[str, Any]]:
+    return [
+        _member("11111111", "test.admin", [MANUAL]),
+        _member("22222222", "test.user", [MANAGE_TWO]),
+        _member("33333333", "test.synced", [MANAGE_ONE]),
+        {"id": "44444444", "externalId": None},
+    ]
+
+
+def test_plan_reconciliation() -> None:
+    plan = plan_reconciliation(
+        rosters=ROSTERS,
+        members=_members(),
+        groups=GROUPS,
+        collections=COLLECTIONS,
+        group_members={"team-one": ["22222222", "33333333", "99999999"], "team-two": ["22222222"]},
+    )
+
+    assert plan.group_changes == [
+        GroupMembershipChange(
+            team="team-one",
+            group_id="group-one",
+            member_ids=["11111111", "22222222"],
+            added=["test.admin"],
+            removed=["99999999", "test.synced"],
+        )
+    ]
+    assert plan.member_changes == [
+        MemberCollectionsChange(username="test.admin", member=_members()[0], collections=[MANUAL, MANAGE_ONE]),
+        MemberCollectionsChange(username="test.synced", member=_members()[2], collections=[]),
+        MemberCollectionsChange(username="test.user", member=_members()[1], collections=[]),
+    ]
+    assert plan.unprovisioned_teams == ["team-three"]
+    assert plan.duplicate_teams == ["team-four"]
+    assert len(plan.changes) == 4
+
+
+def _user_management_api() -> Mock:
+    return MagicMock(
+        spec=UserManagementApi,
+        get_user_team_index=Mock(return_value=UserTeamIndex(rosters=dict(ROSTERS))),
+    )
+
+
+def _bitwarden_api() -> Mock:
+    return MagicMock(
+        spec=BitwardenPublicApi,
+        get_users=Mock(return_value=_members()),
+        list_existing_groups=Mock(side_effect=lambda teams: {t: g for t, g in GROUPS.items() if t in teams}),
+        list_existing_collections=Mock(side_effect=lambda teams: {t: c for t, c in COLLECTIONS.items() if t in teams}),
+        get_membership_index=Mock(
+            return_value=MembershipIndex(
+                {"group-one": ["11111111", "22222222"], "group-two": [], "custom-group": ["11111111"]}
+            )
+        ),
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.reconcile_org.get_bitwarden_logger")
+def test_reconcile_org_dry_run_only_logs_the_plan(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api()
+
+    ReconcileOrg(bitwarden_api=mock_bitwarden, user_management_api=_user_management_api()).run(
+        {"event_name": "reconcile_org"}
+    )
+
+    mock_bitwarden.get_users.assert_called_once()
+    mock_bitwarden.list_existing_groups.assert_called_once_with(list(ROSTERS))
+    mock_bitwarden.get_membership_index.assert_called_once_with(max_workers=5)
+    mock_bitwarden.update_group_members.assert_not_called()
+    mock_bitwarden.update_member_collections.assert_not_called()
+    mock_logger.info.assert_has_calls(
+        [
+            call("Plan: set members of group team-two, adding ['test.user'] and removing []"),
+            call("Plan: update collection permissions of user test.admin"),
+            call("Plan: update collection permissions of user test.synced"),
+            call("Plan: update collection permissions of user test.user"),
+            call("Teams without a Bitwarden group or collection: ['team-three']"),
+            call(
+                "Reconciliation plan has 4 writes: 1 group memberships and 3 member collection permissions",
+            ),
+        ]
+    )
+    mock_logger.warning.assert_called_once_with("Teams with duplicate groups or collections: ['team-four']")
+
+
+@mock.patch("bitwarden_manager.handlers.reconcile_org.get_bitwarden_logger")
+def test_reconcile_org_applies_the_plan(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api()
+
+    ReconcileOrg(bitwarden_api=mock_bitwarden, user_management_api=_user_management_api()).run(
+        {"event_name": "reconcile_org", "dry_run": False}
+    )
+
+    mock_bitwarden.update_group_members.assert_called_once_with(group_id="group-two", member_ids=["22222222"])
+    mock_bitwarden.update_member_collections.assert_has_calls(
+        [
+            call(member=_members()[0], collections=[MANUAL, MANAGE_ONE]),
+            call(member=_members()[2], collections=[]),
+            call(member=_members()[1], collections=[]),
+        ],
+        any_order=True,
+    )
+    mock_logger.info.assert_called_with("Applied 4 of 4 writes")
+
+
+@mock.patch("bitwarden_manager.handlers.reconcile_org.get_bitwarden_logger")
+def test_reconcile_org_reports_failures_after_applying_the_rest(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_ump = _user_management_api()
+    roster_error = Exception("Failed to get team members of team-one")
+    mock_ump.get_user_team_index.return_value = UserTeamIndex(
+        rosters={team: roster for team, roster in ROSTERS.items() if team != "team-one"},
+        failures={"team-one": roster_error},
+    )
+    mock_bitwarden = _bitwarden_api()
+    group_error = Exception("Failed to get users in group")
+    mock_bitwarden.get_membership_index.return_value = MembershipIndex(
+        {"group-one": ["11111111", "22222222"]}, failures={"group-two": group_error}
+    )
+    write_error = Exception("Failed to update collections of user test.user")
+    mock_bitwarden.update_member_collections.side_effect = write_error
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        ReconcileOrg(bitwarden_api=mock_bitwarden, user_management_api=mock_ump).run(
+            {"event_name": "reconcile_org", "dry_run": False}
+        )
+
+    assert exc_info.value.exceptions == (roster_error, group_error, write_error)
+    mock_bitwarden.update_group_members.assert_not_called()
+    mock_logger.warning.assert_has_calls(
+        [
+            call(f"Failed to get team members of team-one, skipping it: {roster_error}"),
+            call(f"Failed to get members of group team-two, skipping it: {group_error}"),
+            call("Teams with duplicate groups or collections: ['team-four']"),
+            call(f"Failed to apply collection permissions of user test.user: {write_error}"),
+        ]
+    )
+    mock_logger.info.assert_called_with("Applied 0 of 1 writes")
+
+
+@mock.patch("bitwarden_manager.handlers.reconcile_org.get_bitwarden_logger")
+def test_reconcile_org_reports_failed_group_writes(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api()
+    error = Exception("Failed to update group members")
+    mock_bitwarden.update_group_members.side_effect = error
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        ReconcileOrg(bitwarden_api=mock_bitwarden, user_management_api=_user_management_api()).run(
+            {"event_name": "reconcile_org", "dry_run": False}
+        )
+
+    assert exc_info.value.exceptions == (error,)
+    mock_logger.warning.assert_called_with(f"Failed to apply membership of group team-two: {error}")
+    mock_logger.info.assert_called_with("Applied 3 of 4 writes")
+
+
+def test_reconcile_org_rejects_bad_events() -> None:
+    with pytest.raises(ValidationError):
+        ReconcileOrg(
+            bitwarden_api=MagicMock(spec=BitwardenPublicApi), user_management_api=MagicMock(spec=UserManagementApi)
+        ).run({"event_name": "reconcile_org", "dry_run": "no"})
@@ -0,0 +1,41 @@
+from unittest import mock
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.handlers.refresh_team_mapping import RefreshTeamMapping
+from bitwarden_manager.team_mapping import TeamMapping
+
+
+@mock.patch("bitwarden_manager.handlers.refresh_team_mapping.get_bitwarden_logger")
+def test_refresh_team_mapping(logger_mock: Mock, tmp_path: str) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    store = LocalJsonStore(path=f"{tmp_path}/team_mapping.json")
+    mock_bitwarden = MagicMock(
+        spec=BitwardenPublicApi,
+        list_existing_groups=Mock(return_value={"team-one": "group-one", "team-two": "group-two"}),
+        list_existing_collections=Mock(return_value={"team-one": {"id": "collection-one", "externalId": "x"}}),
+    )
+    mock_ump = MagicMock(spec=UserManagementApi, get_teams=Mock(return_value=["team-one", "team-two"]))
+
+    RefreshTeamMapping(
+        bitwarden_api=mock_bitwarden, user_management_api=mock_ump, team_mapping=TeamMapping.load(store)
+    ).run({"event_name": "refresh_team_mapping"})
+
+    mock_bitwarden.list_existing_groups.assert_called_once_with(["team-one", "team-two"])
+    assert TeamMapping.load(store).teams == {"team-one": ["group-one", "collection-one"]}
+    mock_logger.info.assert_called_once_with("Mapped 1 of 2 teams to a group and collection")
+
+
+def test_refresh_team_mapping_rejects_bad_events(tmp_path: str) -> None:
+    with pytest.raises(ValidationError):
+        RefreshTeamMapping(
+            bitwarden_api=MagicMock(spec=BitwardenPublicApi),
+            user_management_api=MagicMock(spec=UserManagementApi),
+            team_mapping=TeamMapping(store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json")),
+        ).run({"event_name": 1})
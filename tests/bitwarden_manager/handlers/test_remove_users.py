@@ -0,0 +1,124 @@
+import logging
+from unittest import mock
+from unittest.mock import MagicMock, Mock
+
+import pytest
+import responses
+from jsonschema.exceptions import ValidationError
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.concurrency import TaskResult
+from bitwarden_manager.handlers.remove_users import RemoveUsers
+from tests.bitwarden_manager.clients.test_bitwarden_public_api import MOCKED_LOGIN
+
+
+@mock.patch("bitwarden_manager.handlers.remove_users.get_bitwarden_logger")
+def test_remove_users(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.remove_users_by_id.return_value = [TaskResult(item="11111111"), TaskResult(item="22222222")]
+    members = {"11111111": "test.user01", "22222222": "test.user02"}
+
+    RemoveUsers(bitwarden_api=mock_api).run({"event_name": "remove_users", "members": members})
+
+    mock_api.remove_users_by_id.assert_called_once_with(members)
+    mock_logger.info.assert_any_call("Removed user test.user01 from bitwarden")
+    mock_logger.info.assert_any_call("Removed user test.user02 from bitwarden")
+    mock_logger.info.assert_any_call("Removed 2 of 2 members from bitwarden")
+
+
+@mock.patch("bitwarden_manager.handlers.remove_users.get_bitwarden_logger")
+def test_remove_users_reports_failures(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    error = Exception("Failed to delete user test.user02")
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.remove_users_by_id.return_value = [TaskResult(item="11111111"), TaskResult(item="22222222", error=error)]
+
+    with pytest.raises(ExceptionGroup, match="Remove Users Errors") as exc_info:
+        RemoveUsers(bitwarden_api=mock_api).run(
+            {"event_name": "remove_users", "members": {"11111111": "test.user01", "22222222": "test.user02"}}
+        )
+
+    assert exc_info.value.exceptions == (error,)
+    mock_logger.warning.assert_called_once_with(
+        "Failed to remove user test.user02 from bitwarden: Failed to delete user test.user02"
+    )
+    mock_logger.info.assert_any_call("Removed 1 of 2 members from bitwarden")
+
+
+@mock.patch("bitwarden_manager.clients.bitwarden_public_api.rate_limiter")
+@mock.patch("bitwarden_manager.handlers.remove_users.get_bitwarden_logger")
+def test_remove_users_completes_a_redelivered_shard(logger_mock: Mock, _: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        # the first delivery removed test.user01 before failing, so its member is already gone
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/11111111", status=404)
+        rsps.add(responses.DELETE, "https://api.bitwarden.eu/public/members/22222222", status=200)
+        bitwarden_api = BitwardenPublicApi(logger=logging.getLogger(), client_id="foo", client_secret="bar")
+
+        RemoveUsers(bitwarden_api=bitwarden_api).run(
+            {"event_name": "remove_users", "members": {"11111111": "test.user01", "22222222": "test.user02"}}
+        )
+
+    mock_logger.warning.assert_not_called()
+    mock_logger.info.assert_any_call("Removed 2 of 2 members from bitwarden")
+
+
+def test_remove_users_rejects_bad_events() -> None:
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+
+    with pytest.raises(ValidationError):
+        RemoveUsers(bitwarden_api=mock_api).run({"event_name": "remove_users", "members": {}})
+
+    mock_api.remove_users_by_id.assert_not_called()
+
+
+@mock.patch("bitwarden_manager.handlers.remove_users.get_bitwarden_logger")
+def test_remove_users_by_username_uses_one_member_snapshot(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users.return_value = [
+        {"id": "11111111", "externalId": "test.user01"},
+        {"id": "22222222", "externalId": "test.user02"},
+        {"id": "33333333", "externalId": None},
+    ]
+    mock_api.remove_users_by_id.side_effect = lambda members: [TaskResult(item=member_id) for member_id in members]
+
+    RemoveUsers(bitwarden_api=mock_api).run(
+        {
+            "event_name": "remove_users",
+            "usernames": ["test.user01", "test.user02", "test.user", "unknown.user"],
+            "members": {"44444444": "test.user04"},
+        }
+    )
+
+    mock_api.get_users.assert_called_once()
+    mock_api.remove_users_by_id.assert_called_once_with(
+        {"44444444": "test.user04", "11111111": "test.user01", "22222222": "test.user02"}
+    )
+    mock_logger.info.assert_any_call("User test.user not found in the Bitwarden organisation")
+    mock_logger.info.assert_any_call("User unknown.user not found in the Bitwarden organisation")
+    mock_logger.info.assert_any_call("Removed 3 of 3 members from bitwarden")
+
+
+@mock.patch("bitwarden_manager.handlers.remove_users.get_bitwarden_logger")
+def test_remove_users_with_no_members_in_the_organisation(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users.return_value = []
+
+    RemoveUsers(bitwarden_api=mock_api).run({"event_name": "remove_users", "usernames": ["unknown.user"]})
+
+    mock_api.remove_users_by_id.assert_not_called()
+    mock_logger.info.assert_any_call("None of the members to remove are in the Bitwarden organisation")
+
+
+def test_remove_users_requires_members_or_usernames() -> None:
+    with pytest.raises(ValidationError):
+        RemoveUsers(bitwarden_api=MagicMock(spec=BitwardenPublicApi)).run({"event_name": "remove_users"})
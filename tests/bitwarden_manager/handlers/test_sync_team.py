@@ -0,0 +1,186 @@
+from typing import Any, Dict, List
+from unittest import mock
+from unittest.mock import MagicMock, Mock, call
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenNotFoundException, BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.user_management_api import UserManagementApi
+from bitwarden_manager.handlers.sync_team import SyncTeam
+from bitwarden_manager.team_mapping import TeamMapping
+
+MANAGE = {"id": "collection-one", "readOnly": False, "hidePasswords": False, "manage": True}
+OTHER = {"id": "other-collection", "readOnly": True, "hidePasswords": False, "manage": False}
+
+
+def _member(member_id: str, username: str, collections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "id": member_id,
+        "type": 2,
+        "externalId": username,
+        "resetPasswordEnrolled": True,
+        "permissions": None,
+        "collections": collections,
+    }
+
+
+def _bitwarden_api(group_member_ids: List[str], collection_id: str = "collection-one") -> Mock:
+    return MagicMock(
+        spec=BitwardenPublicApi,
+        get_users=Mock(
+            return_value=[
+                _member("11111111", "test.admin", [OTHER]),
+                _member("22222222", "test.user", [MANAGE, OTHER]),
+                _member("33333333", "test.synced", []),
+                _member("44444444", "other.team", []),
+            ]
+        ),
+        list_existing_groups=Mock(return_value={"team-one": "group-one"}),
+        list_existing_collections=Mock(
+            return_value={"team-one": {"id": collection_id, "externalId": "dGVhbS1vbmU="}} if collection_id else {}
+        ),
+        collate_user_group_ids=Mock(return_value=["group-one"]),
+        get_users_in_group=Mock(return_value=group_member_ids),
+    )
+
+
+def _user_management_api() -> Mock:
+    return MagicMock(
+        spec=UserManagementApi,
+        get_team_members=Mock(
+            return_value={
+                "test.admin": "team_admin",
+                "test.user": "user",
+                "test.synced": "user",
+                "test.missing": "user",
+            }
+        ),
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.sync_team.get_bitwarden_logger")
+def test_sync_team_writes_only_what_differs(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(group_member_ids=["22222222", "33333333", "44444444"])
+    mock_ump = _user_management_api()
+
+    SyncTeam(
+        bitwarden_api=mock_bitwarden,
+        user_management_api=mock_ump,
+        bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+    ).run({"event_name": "sync_team", "team": "team-one"})
+
+    mock_ump.get_team_members.assert_called_once_with("team-one")
+    mock_bitwarden.get_users.assert_called_once()
+    mock_bitwarden.update_group_members.assert_called_once_with(
+        group_id="group-one", member_ids=["11111111", "22222222", "33333333"]
+    )
+    mock_bitwarden.update_member_collections.assert_has_calls(
+        [
+            call(member=_member("11111111", "test.admin", [OTHER]), collections=[OTHER, MANAGE]),
+            call(member=_member("22222222", "test.user", [MANAGE, OTHER]), collections=[OTHER]),
+        ]
+    )
+    assert mock_bitwarden.update_member_collections.call_count == 2
+    mock_logger.info.assert_has_calls(
+        [
+            call("Syncing 4 members of team team-one"),
+            call("User test.missing not found in the Bitwarden organisation"),
+            call("Updated group team-one membership: added 1, removed 1"),
+            call("Updated collection permissions of 2 members of team team-one"),
+        ]
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.sync_team.get_bitwarden_logger")
+def test_sync_team_already_in_sync(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(group_member_ids=["33333333", "22222222", "11111111"], collection_id="")
+
+    SyncTeam(
+        bitwarden_api=mock_bitwarden,
+        user_management_api=_user_management_api(),
+        bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+    ).run({"event_name": "sync_team", "team": "team-one"})
+
+    mock_bitwarden.update_group_members.assert_not_called()
+    mock_bitwarden.update_member_collections.assert_not_called()
+    mock_logger.info.assert_any_call("Group team-one membership is already in sync")
+
+
+@mock.patch("bitwarden_manager.handlers.sync_team.get_bitwarden_logger")
+def test_sync_team_reports_failed_permission_updates(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+    mock_bitwarden = _bitwarden_api(group_member_ids=["11111111", "22222222", "33333333"])
+    error = Exception("Failed to update collections of user test.admin")
+    mock_bitwarden.update_member_collections.side_effect = [error, None]
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        SyncTeam(
+            bitwarden_api=mock_bitwarden,
+            user_management_api=_user_management_api(),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "sync_team", "team": "team-one"})
+
+    assert exc_info.value.exceptions == (error,)
+    mock_logger.warning.assert_called_once_with(f"Failed to update collection permissions of user test.admin: {error}")
+    mock_logger.info.assert_any_call("Updated collection permissions of 1 members of team team-one")
+
+
+def test_sync_team_without_a_group() -> None:
+    mock_bitwarden = _bitwarden_api(group_member_ids=[])
+    mock_bitwarden.collate_user_group_ids.return_value = [""]
+
+    with pytest.raises(Exception, match="Failed to find or create a group for team-one"):
+        SyncTeam(
+            bitwarden_api=mock_bitwarden,
+            user_management_api=_user_management_api(),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "sync_team", "team": "team-one"})
+
+
+def test_sync_team_rejects_bad_events() -> None:
+    with pytest.raises(ValidationError):
+        SyncTeam(
+            bitwarden_api=MagicMock(spec=BitwardenPublicApi),
+            user_management_api=MagicMock(spec=UserManagementApi),
+            bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        ).run({"event_name": "sync_team", "team": ""})
+
+
+@mock.patch("bitwarden_manager.handlers.sync_team.get_bitwarden_logger")
+def test_sync_team_rediscovers_a_team_whose_mapped_group_is_not_found(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+    mock_bitwarden = _bitwarden_api(group_member_ids=[])
+
+    def get_users_in_group(group_id: str) -> List[str]:
+        if group_id == "deleted-group":
+            raise BitwardenNotFoundException(group_id, f"Group {group_id} not found")
+        return []
+
+    mock_bitwarden.get_users_in_group.side_effect = get_users_in_group
+    mock_bitwarden.collate_user_group_ids.side_effect = lambda teams, groups, collections: [groups[teams[0]]]
+    mapping = TeamMapping(
+        store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json"),
+        teams={"team-one": ["deleted-group", "collection-one"]},
+    )
+
+    SyncTeam(
+        bitwarden_api=mock_bitwarden,
+        user_management_api=_user_management_api(),
+        bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient),
+        team_mapping=mapping,
+    ).run({"event_name": "sync_team", "team": "team-one"})
+
+    assert mock_bitwarden.get_users_in_group.call_args_list == [call("deleted-group"), call("group-one")]
+    mock_bitwarden.list_existing_groups.assert_called_once_with(["team-one"])
+    mock_bitwarden.update_group_members.assert_called_once_with(
+        group_id="group-one", member_ids=["11111111", "22222222", "33333333"]
+    )
+    assert mapping.teams == {}
@@ -1,20 +1,28 @@
 import logging
 import os
 import pathlib
-from unittest.mock import Mock, patch
+from typing import List
+from unittest.mock import ANY, Mock, patch
 
 import pytest
 import responses
+from _pytest.logging import LogCaptureFixture
+from jsonschema import ValidationError
 
 from bitwarden_manager.bitwarden_manager import BitwardenManager
 from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient, BitwardenVaultClientError
+from bitwarden_manager.clients.s3_client import iter_json_array_items
 from bitwarden_manager.temp.update_collection_external_ids import BitwardenCollection, UpdateCollectionExternalIds
 from responses import matchers
 
 from tests.bitwarden_manager.clients.test_bitwarden_public_api import MOCKED_LOGIN
 
 
+def _chunked(data: bytes, size: int) -> List[bytes]:
+    return [data[start:end] for start, end in zip(range(0, len(data), size), range(size, len(data) + size, size))]
+
+
 @pytest.fixture
 def client() -> BitwardenVaultClient:
     return BitwardenVaultClient(
@@ -32,8 +40,11 @@ def client() -> BitwardenVaultClient:
 @patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "bitwarden-backup-bucket"})
 def test_get_external_ids_from_data_export() -> None:
     s3_client = Mock()
-    with open(pathlib.Path(__file__).parent.joinpath("./data_export.json"), "r") as f:
-        s3_client.read_object.return_value = f.read()
+    with open(pathlib.Path(__file__).parent.joinpath("./data_export.json"), "rb") as f:
+        data_export = f.read()
+    s3_client.iter_json_array.side_effect = lambda bucket_name, key, array_name, leading_members: (
+        iter_json_array_items(chunks=_chunked(data_export, 16), array_name=array_name, leading_members=leading_members)
+    )
 
     expected = [
         BitwardenCollection(name="test-col01", externalId="extId-test-col01"),
@@ -44,13 +55,49 @@ def test_get_external_ids_from_data_export() -> None:
         bitwarden_api=Mock(), bitwarden_vault_client=Mock(), s3_client=s3_client
     ).get_external_ids_from_data_export()
     assert expected == got
+    s3_client.iter_json_array.assert_called_once_with(
+        bucket_name="bitwarden-backup-bucket",
+        key="bitwarden-data-export-US-org.json",
+        array_name="collections",
+        leading_members=ANY,
+    )
+    s3_client.read_object.assert_not_called()
+
+
+@patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "bitwarden-backup-bucket"})
+def test_get_external_ids_from_data_export_requires_the_encrypted_flag() -> None:
+    data_export = b'{"collections": [{"name": "test-col01", "externalId": "extId-test-col01"}], "items": []}'
+    s3_client = Mock()
+    s3_client.iter_json_array.side_effect = lambda bucket_name, key, array_name, leading_members: (
+        iter_json_array_items(chunks=[data_export], array_name=array_name, leading_members=leading_members)
+    )
+
+    with pytest.raises(ValidationError, match="'encrypted' is a required property"):
+        UpdateCollectionExternalIds(
+            bitwarden_api=Mock(), bitwarden_vault_client=Mock(), s3_client=s3_client
+        ).get_external_ids_from_data_export()
+
+
+@patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "bitwarden-backup-bucket"})
+def test_get_external_ids_from_data_export_rejects_invalid_collections() -> None:
+    s3_client = Mock()
+    s3_client.iter_json_array.return_value = iter([{"name": "test-col01", "externalId": 1}])
+
+    with pytest.raises(ValidationError):
+        UpdateCollectionExternalIds(
+            bitwarden_api=Mock(), bitwarden_vault_client=Mock(), s3_client=s3_client
+        ).get_external_ids_from_data_export()
 
 
 def test_get_org_collections(client: BitwardenVaultClient) -> None:
     expected = [
-        BitwardenCollection(id="id-test-collection-01", name="test-collection-01"),
-        BitwardenCollection(id="id-test-collection-02", name="test-collection-02"),
-        BitwardenCollection(id="id-test-collection", name="test collection"),
+        BitwardenCollection(
+            id="id-test-collection-01", name="test-collection-01", externalId="TURUUCBBcHByZW50aWNlcw=="
+        ),
+        BitwardenCollection(
+            id="id-test-collection-02", name="test-collection-02", externalId="UGxhdGZvcm0gU2VjdXJpdHk="
+        ),
+        BitwardenCollection(id="id-test-collection", name="test collection", externalId="UGxhdGZvcm0gU2VjdXJpdHk="),
     ]
 
     assert (
@@ -164,6 +211,108 @@ def test_reconcile_collection_external_ids() -> None:
         assert rsps.calls[-1].request.method == "PUT"
 
 
+def test_reconcile_collection_external_ids_skips_collections_already_up_to_date(caplog: LogCaptureFixture) -> None:
+    from_export_data_collections = [
+        BitwardenCollection(name="up-to-date", externalId="ext-id-up-to-date"),
+        BitwardenCollection(name="out-of-date", externalId="ext-id-out-of-date"),
+        BitwardenCollection(name="not-in-org", externalId="ext-id-not-in-org"),
+    ]
+
+    org_collections = [
+        BitwardenCollection(name="up-to-date", id="id-up-to-date", externalId="ext-id-up-to-date"),
+        BitwardenCollection(name="out-of-date", id="id-out-of-date", externalId="stale"),
+        BitwardenCollection(name="not-in-export", id="id-not-in-export", externalId=""),
+    ]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(
+            method=responses.PUT,
+            url="https://api.bitwarden.eu/public/collections/id-out-of-date",
+            status=200,
+            match=[matchers.json_params_matcher({"externalId": "ext-id-out-of-date", "groups": []})],
+        )
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with caplog.at_level(logging.INFO):
+            UpdateCollectionExternalIds(
+                bitwarden_api=client, bitwarden_vault_client=Mock(), s3_client=Mock()
+            ).reconcile_collection_external_ids(
+                from_data_export_collections=from_export_data_collections, org_collections=org_collections
+            )
+
+        assert len(rsps.calls) == 2
+        assert "Planned 1 collection externalId updates" in caplog.text
+        assert "Applied 1 of 1 planned collection externalId updates" in caplog.text
+
+
+def test_reconcile_collection_external_ids_reports_failed_updates(caplog: LogCaptureFixture) -> None:
+    from_export_data_collections = [
+        BitwardenCollection(name="test-collection-01", externalId="ext-id-01"),
+        BitwardenCollection(name="test-collection-02", externalId="ext-id-02"),
+    ]
+
+    org_collections = [
+        BitwardenCollection(name="test-collection-01", id="id-01"),
+        BitwardenCollection(name="test-collection-02", id="id-02"),
+    ]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        rsps.add(method=responses.PUT, url="https://api.bitwarden.eu/public/collections/id-01", status=200)
+        rsps.add(method=responses.PUT, url="https://api.bitwarden.eu/public/collections/id-02", status=500)
+
+        client = BitwardenPublicApi(
+            logger=logging.getLogger(),
+            client_id="foo",
+            client_secret="bar",
+        )
+
+        with caplog.at_level(logging.INFO):
+            with pytest.raises(ExceptionGroup, match="Collection externalId Update Errors: ") as exception_group:
+                UpdateCollectionExternalIds(
+                    bitwarden_api=client, bitwarden_vault_client=Mock(), s3_client=Mock()
+                ).reconcile_collection_external_ids(
+                    from_data_export_collections=from_export_data_collections, org_collections=org_collections
+                )
+
+        assert exception_group.group_contains(Exception, match="Failed to update the collection externalId")
+        assert "Applied 1 of 2 planned collection externalId updates" in caplog.text
+
+
+def test_plan_external_id_updates() -> None:
+    from_export_data_collections = [
+        BitwardenCollection(name="duplicated", externalId="first"),
+        BitwardenCollection(name="duplicated", externalId="second"),
+        BitwardenCollection(name="shared-name", externalId="ext-id-shared"),
+        BitwardenCollection(name="reverted", externalId="changed"),
+        BitwardenCollection(name="reverted", externalId="current"),
+        BitwardenCollection(name="no-external-id", externalId=None),  # type: ignore
+    ]
+
+    org_collections = [
+        BitwardenCollection(name="duplicated", id="id-duplicated"),
+        BitwardenCollection(name="shared-name", id="id-shared-1"),
+        BitwardenCollection(name="shared-name", id="id-shared-2", externalId="ext-id-shared"),
+        BitwardenCollection(name="shared-name", id="id-shared-3", externalId="other"),
+        BitwardenCollection(name="reverted", id="id-reverted", externalId="current"),
+        BitwardenCollection(name="no-external-id", id="id-no-external-id"),
+    ]
+
+    planned = UpdateCollectionExternalIds.plan_external_id_updates(from_export_data_collections, org_collections)
+
+    assert [(update.collection.id, update.external_id) for update in planned] == [
+        ("id-duplicated", "second"),
+        ("id-shared-1", "ext-id-shared"),
+        ("id-shared-3", "ext-id-shared"),
+    ]
+
+
 @patch("bitwarden_manager.temp.update_collection_external_ids.UpdateCollectionExternalIds.get_org_collections")
 @patch(
     "bitwarden_manager.temp.update_collection_external_ids.UpdateCollectionExternalIds.get_external_ids_from_data_export"  # noqa: E501
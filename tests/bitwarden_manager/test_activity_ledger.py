@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from bitwarden_manager.activity_ledger import ActivityLedger, MemberIndex
+from bitwarden_manager.clients.json_store import LocalJsonStore
+
+MEMBERS: List[Dict[str, Any]] = [
+    {"id": "member-1", "userId": "user-1", "status": 2},
+    {"id": "member-2", "userId": "user-2", "status": 2},
+    {"id": "member-3", "userId": "user-3", "status": 0},
+]
+
+
+def _date(day: int) -> datetime:
+    return datetime(2026, 1, day, tzinfo=timezone.utc)
+
+
+def test_member_index_resolves_events_to_confirmed_members() -> None:
+    index = MemberIndex(MEMBERS)
+
+    assert len(index) == 2
+    assert index.resolve({"memberId": "member-2", "actingUserId": "user-1"}) == 1
+    assert index.resolve({"memberId": None, "actingUserId": "user-1"}) == 0
+    assert index.resolve({"memberId": "unknown", "actingUserId": "user-2"}) == 1
+    assert index.resolve({"memberId": "member-3", "actingUserId": "user-3"}) == -1
+    assert index.resolve({"memberId": None, "actingUserId": None}) == -1
+
+
+def test_member_index_last_seen() -> None:
+    events = iter(
+        [
+            {"memberId": None, "actingUserId": "user-2", "date": "2026-01-02T00:00:00Z"},
+            {"memberId": "member-3", "actingUserId": None, "date": "2026-01-04T00:00:00Z"},
+            {"memberId": None, "actingUserId": "user-2"},
+            {"memberId": "member-2", "actingUserId": None, "date": "2026-01-01T00:00:00Z"},
+        ]
+    )
+
+    assert MemberIndex(MEMBERS).last_seen(events, undated=int(_date(3).timestamp())) == {
+        "member-2": int(_date(3).timestamp())
+    }
+
+
+def test_record_keeps_the_latest_activity_per_member(tmp_path: str) -> None:
+    ledger = ActivityLedger(store=LocalJsonStore(path=f"{tmp_path}/ledger.json"))
+
+    ledger.record(
+        events=[
+            {"memberId": "member-1", "actingUserId": None, "date": "2026-01-03T10:00:00.1234567Z"},
+            {"memberId": None, "actingUserId": "user-1", "date": "2026-01-02T10:00:00Z"},
+            {"memberId": None, "actingUserId": "user-2", "date": "2026-01-04T00:00:00"},
+            {"memberId": "member-3", "actingUserId": None, "date": "2026-01-04T00:00:00Z"},
+            {"memberId": None, "actingUserId": None, "date": "2026-01-04T00:00:00Z"},
+        ],
+        members=MEMBERS,
+        fetched_from=_date(1),
+        fetched_to=_date(5),
+    )
+
+    assert ledger.last_seen == {
+        "member-1": int(datetime(2026, 1, 3, 10, tzinfo=timezone.utc).timestamp()),
+        "member-2": int(_date(4).timestamp()),
+    }
+    assert ledger.covered_from == int(_date(1).timestamp())
+    assert ledger.checkpoint == int(_date(5).timestamp())
+
+
+def test_record_treats_undated_events_as_seen_at_the_end_of_the_fetch(tmp_path: str) -> None:
+    ledger = ActivityLedger(store=LocalJsonStore(path=f"{tmp_path}/ledger.json"))
+
+    ledger.record(
+        events=[{"memberId": "member-1", "actingUserId": None}],
+        members=MEMBERS,
+        fetched_from=_date(1),
+        fetched_to=_date(5),
+    )
+
+    assert ledger.last_seen == {"member-1": int(_date(5).timestamp())}
+
+
+def test_incremental_record_keeps_coverage_and_drops_departed_members(tmp_path: str) -> None:
+    ledger = ActivityLedger(
+        store=LocalJsonStore(path=f"{tmp_path}/ledger.json"),
+        last_seen={"member-1": int(_date(2).timestamp()), "departed": int(_date(3).timestamp())},
+        checkpoint=int(_date(5).timestamp()),
+        covered_from=int(_date(1).timestamp()),
+    )
+
+    assert ledger.covers(_date(1))
+    assert not ledger.covers(datetime(2025, 12, 31, tzinfo=timezone.utc))
+
+    ledger.record(
+        events=[{"memberId": "member-2", "actingUserId": None, "date": "2026-01-06T00:00:00Z"}],
+        members=MEMBERS,
+        fetched_from=_date(4),
+        fetched_to=_date(7),
+    )
+
+    assert ledger.last_seen == {"member-1": int(_date(2).timestamp()), "member-2": int(_date(6).timestamp())}
+    assert ledger.covered_from == int(_date(1).timestamp())
+    assert ledger.checkpoint == int(_date(7).timestamp())
+
+
+def test_save_and_load(tmp_path: str) -> None:
+    store = LocalJsonStore(path=f"{tmp_path}/ledger.json")
+
+    empty = ActivityLedger.load(store)
+    assert empty.last_seen == {}
+    assert not empty.covers(_date(1))
+
+    ActivityLedger(store=store, last_seen={"member-1": 100}, checkpoint=200, covered_from=50).save()
+    ledger = ActivityLedger.load(store)
+
+    assert ledger.last_seen == {"member-1": 100}
+    assert ledger.checkpoint == 200
+    assert ledger.covered_from == 50
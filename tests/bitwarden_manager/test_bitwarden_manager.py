@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 from unittest import mock
@@ -11,9 +12,13 @@ import responses
 from bitwarden_manager.bitwarden_manager import BitwardenManager
 from bitwarden_manager.clients.bitwarden_public_api import BitwardenUserAlreadyExistsException
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.json_store import LocalJsonStore, S3JsonStore
+from bitwarden_manager.clients.user_management_api import API_URL as UMP_API_URL
 from bitwarden_manager.confirm_user import BitwardenConfirmUserInvalidDomain
+from bitwarden_manager.handlers.sync_team import SyncTeam
 
 from tests.bitwarden_manager.clients.test_bitwarden_public_api import MOCKED_LOGIN
+from tests.bitwarden_manager.clients.test_user_management_api import MOCKED_LOGIN as UMP_MOCKED_LOGIN
 
 
 @mock.patch("boto3.client")
@@ -190,3 +195,119 @@ def test_invalid_bw_cli_timeout(mock_secretsmanager: Mock) -> None:
     mock_secretsmanager.return_value = Mock(get_secret_value=get_secret_value)
 
     assert BitwardenManager()._get_bitwarden_cli_timeout() == 20.0
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+@mock.patch("boto3.client")
+def test_activity_ledger_store_is_kept_in_the_backup_bucket(mock_secretsmanager: Mock) -> None:
+    store = BitwardenManager._get_backup_bucket_store("activity_ledger.json")
+
+    assert store is not None
+    assert store.bucket_name == "test-bucket"
+    assert store.key == "activity_ledger.json"
+
+
+@mock.patch.dict(os.environ, {}, clear=True)
+def test_activity_ledger_store_is_not_configured_without_a_backup_bucket() -> None:
+    assert BitwardenManager._get_backup_bucket_store("activity_ledger.json") is None
+
+
+@pytest.fixture(autouse=True)
+def uncached_team_mapping(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("bitwarden_manager.bitwarden_manager._team_mapping_cache", None)
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+@mock.patch("boto3.client")
+@mock.patch.object(S3JsonStore, "load", return_value={"teams": {"team-one": ["group-one", "collection-one"]}})
+def test_team_mapping_is_kept_in_the_backup_bucket(_: Mock, mock_secretsmanager: Mock) -> None:
+    mock_secretsmanager.return_value = Mock(get_secret_value=Mock(return_value={"SecretString": "secret"}))
+
+    mapping = BitwardenManager()._get_team_mapping()
+
+    assert isinstance(mapping.store, S3JsonStore)
+    assert mapping.store.key == "team_mapping.json"
+    assert mapping.resolve("team-one") == ("group-one", "collection-one")
+
+
+@mock.patch.dict(os.environ, {}, clear=True)
+@mock.patch("boto3.client")
+@mock.patch("bitwarden_manager.bitwarden_manager.tempfile.gettempdir")
+def test_team_mapping_is_kept_in_the_temp_dir_without_a_backup_bucket(
+    gettempdir: Mock, mock_secretsmanager: Mock, tmp_path: str
+) -> None:
+    mock_secretsmanager.return_value = Mock(get_secret_value=Mock(return_value={"SecretString": "secret"}))
+    gettempdir.return_value = str(tmp_path)
+
+    mapping = BitwardenManager()._get_team_mapping()
+
+    assert isinstance(mapping.store, LocalJsonStore)
+    assert mapping.store.path == f"{tmp_path}/team_mapping.json"
+    assert mapping.teams == {}
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+@mock.patch("boto3.client")
+@mock.patch.object(S3JsonStore, "load", side_effect=ValueError("Expecting value: line 1 column 1 (char 0)"))
+def test_team_mapping_falls_back_to_live_discovery_when_it_cannot_be_loaded(
+    _: Mock, mock_secretsmanager: Mock, caplog: LogCaptureFixture
+) -> None:
+    mock_secretsmanager.return_value = Mock(get_secret_value=Mock(return_value={"SecretString": "secret"}))
+
+    with caplog.at_level(logging.WARNING):
+        mapping = BitwardenManager()._get_team_mapping()
+
+    assert mapping.teams == {}
+    assert isinstance(mapping.store, S3JsonStore)
+    assert "Failed to load the team mapping, discovering teams live" in caplog.text
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+@mock.patch("boto3.client")
+@mock.patch.object(S3JsonStore, "load", return_value={"teams": {"team-one": ["group-one", "collection-one"]}})
+@mock.patch("bitwarden_manager.bitwarden_manager.time")
+def test_team_mapping_is_loaded_once_per_ttl(mock_time: Mock, load: Mock, mock_secretsmanager: Mock) -> None:
+    mock_secretsmanager.return_value = Mock(get_secret_value=Mock(return_value={"SecretString": "secret"}))
+    mock_time.monotonic.return_value = 1000.0
+    manager = BitwardenManager()
+
+    mapping = manager._get_team_mapping()
+    assert BitwardenManager()._get_team_mapping() is mapping
+    load.assert_called_once()
+
+    mock_time.monotonic.return_value = 1900.0
+    assert manager._get_team_mapping() is not mapping
+    assert load.call_count == 2
+
+
+@mock.patch("boto3.client")
+def test_sqs_batch_fetches_each_team_roster_once(mock_secretsmanager: Mock) -> None:
+    mock_secretsmanager.return_value = Mock(get_secret_value=Mock(return_value={"SecretString": "secret"}))
+    event = {
+        "Records": [
+            {"eventSource": "aws:sqs", "body": json.dumps({"event_name": "sync_team", "team": "team-one"})},
+            {"eventSource": "aws:sqs", "body": json.dumps({"event_name": "sync_team", "team": "team-one"})},
+        ]
+    }
+
+    with (
+        responses.RequestsMock(assert_all_requests_are_fired=False) as rsps,
+        patch.object(BitwardenManager, "_get_bitwarden_vault_client"),
+        patch.object(BitwardenManager, "_get_bitwarden_public_api"),
+        patch.object(BitwardenManager, "_get_team_mapping"),
+        patch.object(
+            SyncTeam,
+            "run",
+            autospec=True,
+            side_effect=lambda handler, event: handler.user_management_api.get_team_members(event["team"]),
+        ),
+    ):
+        rsps.add(UMP_MOCKED_LOGIN)
+        roster = rsps.add(
+            responses.GET,
+            f"{UMP_API_URL}/organisations/teams/team-one/members",
+            json={"members": [{"username": "test.user", "role": "user"}]},
+        )
+        BitwardenManager().run(event=event)
+
+    assert roster.call_count == 1
@@ -0,0 +1,37 @@
+import threading
+
+from bitwarden_manager.concurrency import run_concurrently
+
+
+def test_run_concurrently_returns_results_in_order() -> None:
+    results = run_concurrently(lambda item: item * 2, [3, 1, 2], max_workers=3)
+
+    assert [result.item for result in results] == [3, 1, 2]
+    assert [result.value for result in results] == [6, 2, 4]
+    assert all(result.succeeded for result in results)
+
+
+def test_run_concurrently_records_failures_per_item() -> None:
+    def fail_on_two(item: int) -> int:
+        if item == 2:
+            raise ValueError("two is not allowed")
+        return item
+
+    results = run_concurrently(fail_on_two, [1, 2, 3], max_workers=2)
+
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ValueError)
+    assert results[1].value is None
+    assert results[2].value == 3
+
+
+def test_run_concurrently_runs_items_in_parallel() -> None:
+    barrier = threading.Barrier(3, timeout=5)
+
+    results = run_concurrently(lambda item: barrier.wait(), ["a", "b", "c"], max_workers=3)
+
+    assert all(result.succeeded for result in results)
+
+
+def test_run_concurrently_with_no_items() -> None:
+    assert run_concurrently(lambda item: item, [], max_workers=5) == []
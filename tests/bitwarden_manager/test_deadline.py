@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock, patch
+
+from bitwarden_manager.deadline import Deadline
+
+
+@patch("bitwarden_manager.deadline.time.monotonic")
+def test_deadline_keeps_a_safety_margin(mock_monotonic: MagicMock) -> None:
+    mock_monotonic.return_value = 100.0
+    deadline = Deadline(remaining_seconds=90, safety_margin=60)
+
+    mock_monotonic.return_value = 110.0
+    assert deadline.remaining() == 20.0
+    assert not deadline.expired()
+
+    mock_monotonic.return_value = 130.0
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+
+
+@patch("bitwarden_manager.deadline.time.monotonic")
+def test_deadline_from_lambda_context(mock_monotonic: MagicMock) -> None:
+    mock_monotonic.return_value = 0.0
+    context = MagicMock(get_remaining_time_in_millis=MagicMock(return_value=900_000))
+
+    deadline = Deadline.from_context(context)
+
+    assert deadline is not None
+    assert deadline.remaining() == 840.0
+
+
+def test_no_deadline_without_a_lambda_context() -> None:
+    assert Deadline.from_context(None) is None
+    assert Deadline.from_context({}) is None
@@ -1,9 +1,11 @@
 import mock
 import os
 
+import pytest
 from freezegun import freeze_time
+from jsonschema import ValidationError
 
-from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient, BitwardenVaultClientError
 from bitwarden_manager.clients.s3_client import S3Client
 from bitwarden_manager.export_vault import ExportVault
 from unittest.mock import Mock
@@ -24,3 +26,50 @@ def test_export_vault() -> None:
     s3_client.write_file_to_s3.assert_called_with(
         bucket_name="test-bucket", filepath=expected_file_path, filename="bw_backup_2023-07-17T00:00:00.json"
     )
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+@freeze_time("2023-7-17")
+def test_export_vault_for_multiple_organisations() -> None:
+    event = {"event_name": "export_vault", "organisation_ids": ["org-one", "org-two"]}
+    s3_client = Mock(spec=S3Client)
+    bitwarden_client = Mock(spec=BitwardenVaultClient)
+    org_clients = {"org-one": Mock(spec=BitwardenVaultClient), "org-two": Mock(spec=BitwardenVaultClient)}
+    bitwarden_client.for_organisation.side_effect = lambda organisation_id: org_clients[organisation_id]
+
+    ExportVault(bitwarden_vault_client=bitwarden_client, s3_client=s3_client).run(event)
+
+    bitwarden_client.export_vault.assert_not_called()
+    for organisation_id, org_client in org_clients.items():
+        org_client.export_vault.assert_called_once()
+        org_client.logout.assert_called_once()
+        s3_client.write_file_to_s3.assert_any_call(
+            bucket_name="test-bucket",
+            filepath=org_client.export_vault.mock_calls[0].kwargs["file_path"],
+            filename=f"{organisation_id}/bw_backup_2023-07-17T00:00:00.json",
+        )
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_BACKUP_BUCKET": "test-bucket"})
+def test_export_vault_for_multiple_organisations_reports_failures() -> None:
+    event = {"event_name": "export_vault", "organisation_ids": ["org-one", "org-two"]}
+    s3_client = Mock(spec=S3Client)
+    bitwarden_client = Mock(spec=BitwardenVaultClient)
+    failing_client = Mock(spec=BitwardenVaultClient)
+    failing_client.export_vault.side_effect = BitwardenVaultClientError("export failed")
+    org_clients = {"org-one": Mock(spec=BitwardenVaultClient), "org-two": failing_client}
+    bitwarden_client.for_organisation.side_effect = lambda organisation_id: org_clients[organisation_id]
+
+    with pytest.raises(ExceptionGroup, match="Vault Export Errors: ") as exception_group:
+        ExportVault(bitwarden_vault_client=bitwarden_client, s3_client=s3_client).run(event)
+
+    assert exception_group.group_contains(BitwardenVaultClientError, match="export failed")
+    s3_client.write_file_to_s3.assert_called_once()
+    failing_client.logout.assert_called_once()
+
+
+def test_export_vault_rejects_invalid_organisation_ids() -> None:
+    event = {"event_name": "export_vault", "organisation_ids": ["../org"]}
+
+    with pytest.raises(ValidationError):
+        ExportVault(bitwarden_vault_client=Mock(spec=BitwardenVaultClient), s3_client=Mock(spec=S3Client)).run(event)
@@ -9,7 +9,7 @@ def test_update_user_groups_missing_collection_names() -> None:
 
 
 def test_non_ump_based_group_ids() -> None:
-    teams = ["team-one", "team-two"]
+    teams = {"team-one", "team-two"}
     groups = {
         "team-one": "id-team-four",
         "team-two": "id-team-two",
@@ -17,3 +17,17 @@ def test_non_ump_based_group_ids() -> None:
         "team-four": "id-team-four",
     }
     assert ["id-team-three", "id-team-four"] == GroupsAndCollections.non_ump_based_group_ids(groups=groups, teams=teams)
+
+
+def test_manage_collection_changes() -> None:
+    manage_one = {"id": "one", "readOnly": False, "hidePasswords": False, "manage": True}
+    read_two = {"id": "two", "readOnly": True, "hidePasswords": False, "manage": False}
+    manual = {"id": "manual", "readOnly": False, "hidePasswords": False, "manage": True}
+    current = [manage_one, read_two, manual]
+
+    assert GroupsAndCollections.manage_collection_changes(current, {"one"}, {"one", "two"}) is None
+    assert GroupsAndCollections.manage_collection_changes(current, {"two"}, {"one", "two"}) == [
+        manual,
+        {"id": "two", "readOnly": False, "hidePasswords": False, "manage": True},
+    ]
+    assert GroupsAndCollections.manage_collection_changes(current, set(), {"one", "two"}) == [read_two, manual]
@@ -1,11 +1,22 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
 from unittest import mock
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, MagicMock, call, patch
 
 import pytest
-from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from freezegun import freeze_time
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenEventsIncompleteException, BitwardenPublicApi
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
-from bitwarden_manager.handlers.offboard_inactive_users import OffboardInactiveUsers
-from jsonschema import ValidationError
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.clients.sqs_client import SqsClient
+from bitwarden_manager.concurrency import TaskResult
+from bitwarden_manager.deadline import Deadline
+from bitwarden_manager.handlers.offboard_inactive_users import (
+    OffboardInactiveUsers,
+    offboard_inactive_users_event_schema,
+)
+from jsonschema import ValidationError, validate
 
 GET_MEMBERS_DICT = [
     {
@@ -128,7 +139,7 @@ def test_run_valid_event(validation_mock: Mock, logger_mock: Mock) -> None:
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
-    mock_api.get_events = Mock(return_value=GET_EVENTS_LIST)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
 
@@ -152,14 +163,15 @@ def test_run_valid_event(validation_mock: Mock, logger_mock: Mock) -> None:
 
     validation_mock.assert_called_once_with(instance=event, schema=mock.ANY)
     mock_api.get_users.assert_called_once()
-    mock_api.get_events.assert_called_once()
+    mock_api.iter_events.assert_called_once()
+    mock_protected_users.assert_called_once_with(GET_MEMBERS_DICT)
     mock_logger.info.assert_any_call("Compiling list of active members for the last 90 days")
     mock_logger.info.assert_any_call("Fetching organization members")
     mock_logger.info.assert_any_call("Compiling list of inactive members")
     mock_logger.info.assert_any_call("Compiling list of protected members")
     mock_logger.info.assert_any_call("Total members: 4, Active members: 3, Inactive members: 1")
     mock_logger.info.assert_any_call("Removing 1 inactive members from bitwarden")
-    mock_offboard_users.assert_called_once_with(expected_inactive, expected_members, set())
+    mock_offboard_users.assert_called_once_with(expected_inactive, expected_members, set(), event=event)
 
 
 @mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
@@ -171,7 +183,7 @@ def test_run_valid_event_dry_run_true(validation_mock: Mock, logger_mock: Mock)
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
-    mock_api.get_events = Mock(return_value=GET_EVENTS_LIST)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
 
@@ -194,7 +206,7 @@ def test_run_valid_event_dry_run_not_set(validation_mock: Mock, logger_mock: Moc
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
-    mock_api.get_events = Mock(return_value=GET_EVENTS_LIST)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
 
@@ -217,7 +229,7 @@ def test_run_valid_event_dry_run_falsee(validation_mock: Mock, logger_mock: Mock
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
-    mock_api.get_events = Mock(return_value=GET_EVENTS_LIST)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
 
@@ -240,7 +252,7 @@ def test_run_null_events(validation_mock: Mock, logger_mock: Mock) -> None:
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
-    mock_api.get_events = Mock(return_value=None)
+    mock_api.iter_events = Mock(return_value=None)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
     event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90}
@@ -260,7 +272,7 @@ def test_run_null_members(validation_mock: Mock, logger_mock: Mock) -> None:
     mock_api = MagicMock(spec=BitwardenPublicApi)
     mock_client = MagicMock(spec=BitwardenVaultClient)
     mock_api.get_users = MagicMock(return_value=None)
-    mock_api.get_events = Mock(return_value=GET_EVENTS_LIST)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
 
     offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=mock_client)
     event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90}
@@ -288,3 +300,554 @@ def test_run_invalid_event(validation_mock: Mock, logger_mock: Mock) -> None:
         offboard_handler.run(event)
 
     validation_mock.assert_called_once_with(instance=event, schema=mock.ANY)
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_get_last_seen_report_accepts_an_event_stream(logger_mock: Mock) -> None:
+    logger_mock.return_value = MagicMock()
+
+    consumed = []
+
+    def stream_events() -> Iterator[Dict[str, Any]]:
+        for event in GET_EVENTS_LIST:
+            consumed.append(event)
+            yield event
+
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=MagicMock(spec=BitwardenPublicApi), bitwarden_vault_client=MagicMock(spec=BitwardenVaultClient)
+    )
+
+    now = datetime(2026, 4, 1, tzinfo=timezone.utc)
+    assert offboard_handler._get_last_seen_report(stream_events(), GET_MEMBERS_DICT, now) == {
+        "11111111": int(now.timestamp()),
+        "22222222": int(now.timestamp()),
+        "33333333": int(now.timestamp()),
+    }
+    assert consumed == GET_EVENTS_LIST
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01")
+def test_run_fetches_events_in_windows(logger_mock: Mock) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(return_value=GET_EVENTS_LIST)
+
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=MagicMock())
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "event_window_days": 7}
+
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()):
+        offboard_handler.run(event)
+
+    mock_api.iter_events.assert_called_once_with(start_date="2026-01-01", window_days=7, timeout=600.0)
+
+
+def _dated_events(date: str) -> List[Dict[str, Any]]:
+    return [dict(event, date=date) for event in GET_EVENTS_LIST]
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_run_with_activity_ledger_only_fetches_events_since_the_last_run(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(return_value=_dated_events("2026-03-20T12:00:00Z"))
+
+    store = LocalJsonStore(path=f"{tmp_path}/ledger.json")
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api, bitwarden_vault_client=MagicMock(), activity_ledger_store=store
+    )
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "use_activity_ledger": True}
+
+    with (
+        patch.object(offboard_handler, "_get_protected_users", return_value=set()),
+        patch.object(offboard_handler, "offboard_users") as offboard_users,
+    ):
+        with freeze_time("2026-04-01"):
+            offboard_handler.run(event)
+
+        mock_api.iter_events.assert_called_once_with(
+            start_date="2026-01-01T00:00:00+00:00",
+            end_date="2026-04-01T00:00:00+00:00",
+            window_days=None,
+            timeout=600.0,
+        )
+        assert offboard_users.call_args.args[0] == {"44444444"}
+
+        # a week later only the new events are fetched, members stay active from the ledger until they age out
+        mock_api.iter_events = Mock(return_value=[])
+        with freeze_time("2026-04-08"):
+            offboard_handler.run(event)
+
+        mock_api.iter_events.assert_called_once_with(
+            start_date="2026-03-31T23:00:00+00:00",
+            end_date="2026-04-08T00:00:00+00:00",
+            window_days=None,
+            timeout=600.0,
+        )
+        assert offboard_users.call_args.args[0] == {"44444444"}
+
+        mock_api.iter_events = Mock(return_value=[])
+        with freeze_time("2026-06-20"):
+            offboard_handler.run(dict(event, inactivity_duration=10))
+
+        assert offboard_users.call_args.args[0] == {"11111111", "22222222", "33333333", "44444444"}
+
+    assert store.load() == {
+        "checkpoint": int(datetime(2026, 6, 20, tzinfo=timezone.utc).timestamp()),
+        "covered_from": int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()),
+        "last_seen": {
+            member_id: int(datetime(2026, 3, 20, 12, tzinfo=timezone.utc).timestamp())
+            for member_id in ["11111111", "22222222", "33333333"]
+        },
+    }
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_run_with_activity_ledger_keeps_the_checkpoint_when_the_event_fetch_is_incomplete(
+    logger_mock: Mock, tmp_path: str
+) -> None:
+    logger_mock.return_value = MagicMock()
+
+    def truncated_events(**_: Any) -> Iterator[Dict[str, Any]]:
+        yield from _dated_events("2026-03-20T12:00:00Z")
+        raise BitwardenEventsIncompleteException("Ran out of time fetching events for time range: 2026-03-31 to now")
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(side_effect=truncated_events)
+
+    store = LocalJsonStore(path=f"{tmp_path}/ledger.json")
+    saved = {"checkpoint": 1775001600, "covered_from": 1767225600, "last_seen": {}}
+    store.save(saved)
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api, bitwarden_vault_client=MagicMock(), activity_ledger_store=store
+    )
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "use_activity_ledger": True}
+
+    with (
+        patch.object(offboard_handler, "_get_protected_users", return_value=set()),
+        patch.object(offboard_handler, "offboard_users") as offboard_users,
+        freeze_time("2026-04-08"),
+    ):
+        with pytest.raises(BitwardenEventsIncompleteException):
+            offboard_handler.run(event)
+
+    offboard_users.assert_not_called()
+    assert store.load() == saved
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_run_with_activity_ledger_rebuilds_when_the_duration_exceeds_its_coverage(
+    logger_mock: Mock, tmp_path: str
+) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(return_value=[])
+
+    store = LocalJsonStore(path=f"{tmp_path}/ledger.json")
+    store.save({"checkpoint": 1775001600, "covered_from": 1774396800, "last_seen": {}})
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api, bitwarden_vault_client=MagicMock(), activity_ledger_store=store
+    )
+    event = {
+        "event_name": "offboard_inactive_users",
+        "inactivity_duration": 90,
+        "use_activity_ledger": True,
+        "event_window_days": 7,
+    }
+
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()), freeze_time("2026-04-01"):
+        offboard_handler.run(event)
+
+    mock_api.iter_events.assert_called_once_with(
+        start_date="2026-01-01T00:00:00+00:00", end_date="2026-04-01T00:00:00+00:00", window_days=7, timeout=600.0
+    )
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_run_with_activity_ledger_requires_a_store(logger_mock: Mock) -> None:
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=MagicMock())
+
+    with pytest.raises(ValueError, match="An activity ledger store must be configured"):
+        offboard_handler.run(
+            {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "use_activity_ledger": True}
+        )
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01T09:30:00")
+def test_run_reports_several_thresholds_from_one_scan(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(
+        return_value=[
+            {"memberId": "11111111", "actingUserId": None, "date": "2026-03-25T10:00:00Z"},
+            {"memberId": None, "actingUserId": "22222222", "date": "2026-02-15T10:00:00Z"},
+            {"memberId": "33333333", "actingUserId": None, "date": "2026-01-01T00:00:00Z"},
+        ]
+    )
+
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=mock_api, bitwarden_vault_client=MagicMock())
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": [90, 30, 60]}
+
+    with (
+        patch.object(offboard_handler, "_get_protected_users", return_value=set()),
+        patch.object(offboard_handler, "offboard_users") as mock_offboard_users,
+    ):
+        offboard_handler.run(event)
+
+    mock_api.iter_events.assert_called_once_with(start_date="2026-01-01", window_days=None, timeout=600.0)
+    mock_logger.info.assert_any_call(
+        "Inactive for 30 days: 3 members "
+        "['test.user02@example.com', 'test.user03@example.com', 'test.user04@example.com']"
+    )
+    mock_logger.info.assert_any_call(
+        "Inactive for 60 days: 2 members ['test.user03@example.com', 'test.user04@example.com']"
+    )
+    mock_logger.info.assert_any_call("Inactive for 90 days: 1 members ['test.user04@example.com']")
+    assert mock_offboard_users.call_args.args[0] == {"44444444"}
+
+
+def test_event_schema_accepts_a_list_of_thresholds() -> None:
+    validate(
+        instance={"event_name": "offboard_inactive_users", "inactivity_duration": [30, 60, 90]},
+        schema=offboard_inactive_users_event_schema,
+    )
+
+    for duration in [[], [30, 30], [0], "90"]:
+        with pytest.raises(ValidationError):
+            validate(
+                instance={"event_name": "offboard_inactive_users", "inactivity_duration": duration},
+                schema=offboard_inactive_users_event_schema,
+            )
+
+
+def _resumable_handler(
+    mock_api: MagicMock, tmp_path: str, expired: List[bool]
+) -> tuple[OffboardInactiveUsers, LocalJsonStore, MagicMock]:
+    store = LocalJsonStore(path=f"{tmp_path}/progress.json")
+    sqs_client = MagicMock(spec=SqsClient)
+    deadline = MagicMock(spec=Deadline)
+    deadline.expired.side_effect = expired
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api,
+        bitwarden_vault_client=MagicMock(),
+        dry_run=False,
+        deadline=deadline,
+        progress_store=store,
+        sqs_client=sqs_client,
+    )
+    return offboard_handler, store, sqs_client
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01")
+def test_run_continues_the_event_scan_in_another_invocation(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.get_event_page.side_effect = [
+        (GET_EVENTS_LIST[:2], "page_2"),
+        (GET_EVENTS_LIST[2:4], "page_3"),
+        (GET_EVENTS_LIST[4:], None),
+    ]
+    mock_api.remove_users_by_id.return_value = [TaskResult(item="44444444")]
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "dry_run": False}
+
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[False, True])
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()):
+        offboard_handler.run(event)
+
+    now = int(datetime(2026, 4, 1, tzinfo=timezone.utc).timestamp())
+    assert store.load() == {
+        "phase": "scan",
+        "end_date": "2026-04-01T00:00:00+00:00",
+        "continuation_token": "page_3",
+        "last_seen": {"11111111": now, "22222222": now},
+    }
+    sqs_client.send_message.assert_called_once_with(
+        queue_url="https://sqs/bitwarden-manager", body=dict(event, resume=True)
+    )
+    mock_api.remove_users_by_id.assert_not_called()
+
+    # the continuation picks up at the saved page, even though it runs later than the original invocation
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[False])
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()), freeze_time("2026-04-01T00:15"):
+        offboard_handler.run(dict(event, resume=True))
+
+    assert mock_api.get_event_page.call_args_list[-1] == call(
+        start_date="2026-01-01", end_date="2026-04-01T00:00:00+00:00", continuation_token="page_3"
+    )
+    mock_api.remove_users_by_id.assert_called_once_with({"44444444": "test.user04@example.com"})
+    sqs_client.send_message.assert_not_called()
+    assert store.load() is not None and store.load() == {}
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01")
+def test_run_continues_the_windowed_event_scan_in_another_invocation(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+    windows = BitwardenPublicApi.split_into_windows(
+        start_date="2026-01-01", end_date="2026-04-01T00:00:00+00:00", window_days=30
+    )
+
+    def first_window_only(windows: List[Tuple[str, str]], timeout: float) -> Iterator[Any]:
+        yield windows[0], GET_EVENTS_LIST[:4]
+        raise BitwardenEventsIncompleteException(f"Ran out of time fetching events for window: {windows[1]}")
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_event_windows.side_effect = first_window_only
+    mock_api.remove_users_by_id.return_value = [TaskResult(item="44444444")]
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "event_window_days": 30}
+
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[])
+    offboard_handler.deadline.remaining.return_value = 120.0  # type: ignore[union-attr]
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()):
+        offboard_handler.run(dict(event, dry_run=False))
+
+    mock_api.iter_event_windows.assert_called_once_with(windows=windows, timeout=120.0)
+    now = int(datetime(2026, 4, 1, tzinfo=timezone.utc).timestamp())
+    assert store.load() == {
+        "phase": "scan",
+        "end_date": "2026-04-01T00:00:00+00:00",
+        "remaining_windows": [list(window) for window in windows[1:]],
+        "last_seen": {"11111111": now, "22222222": now},
+    }
+    sqs_client.send_message.assert_called_once_with(
+        queue_url="https://sqs/bitwarden-manager", body=dict(event, dry_run=False, resume=True)
+    )
+    mock_api.remove_users_by_id.assert_not_called()
+
+    # only the windows that were not fetched are fetched by the continuation
+    mock_api.iter_event_windows.side_effect = lambda windows, timeout: iter([(windows[-1], GET_EVENTS_LIST[4:])])
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[False])
+    offboard_handler.deadline.remaining.return_value = 120.0  # type: ignore[union-attr]
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()):
+        offboard_handler.run(dict(event, dry_run=False, resume=True))
+
+    assert mock_api.iter_event_windows.call_args == call(windows=windows[1:], timeout=120.0)
+    mock_api.remove_users_by_id.assert_called_once_with({"44444444": "test.user04@example.com"})
+    sqs_client.send_message.assert_not_called()
+    assert store.load() == {}
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01")
+def test_run_continues_the_activity_ledger_scan_in_another_invocation(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.get_event_page.side_effect = [
+        (_dated_events("2026-03-20T12:00:00Z")[:2], "page_2"),
+        (_dated_events("2026-03-20T12:00:00Z")[2:], None),
+    ]
+    ledger_store = LocalJsonStore(path=f"{tmp_path}/ledger.json")
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "use_activity_ledger": True}
+
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[True])
+    offboard_handler.activity_ledger_store = ledger_store
+    with (
+        patch.object(offboard_handler, "_get_protected_users", return_value=set()),
+        patch.object(offboard_handler, "offboard_users") as offboard_users,
+    ):
+        offboard_handler.run(event)
+
+    offboard_users.assert_not_called()
+    mock_api.iter_events.assert_not_called()
+    assert ledger_store.load() is None
+    assert store.load() == {
+        "phase": "scan",
+        "end_date": "2026-04-01T00:00:00+00:00",
+        "continuation_token": "page_2",
+        "last_seen": {"11111111": int(datetime(2026, 3, 20, 12, tzinfo=timezone.utc).timestamp())},
+    }
+    sqs_client.send_message.assert_called_once_with(
+        queue_url="https://sqs/bitwarden-manager", body=dict(event, resume=True)
+    )
+
+    # the ledger is only recorded once the continuation has scanned the rest of the range
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[])
+    offboard_handler.activity_ledger_store = ledger_store
+    with (
+        patch.object(offboard_handler, "_get_protected_users", return_value=set()),
+        patch.object(offboard_handler, "offboard_users") as offboard_users,
+    ):
+        offboard_handler.run(dict(event, resume=True))
+
+    assert mock_api.get_event_page.call_args == call(
+        start_date="2026-01-01T00:00:00+00:00", end_date="2026-04-01T00:00:00+00:00", continuation_token="page_2"
+    )
+    assert offboard_users.call_args.args[0] == {"44444444"}
+    assert ledger_store.load() == {
+        "checkpoint": int(datetime(2026, 4, 1, tzinfo=timezone.utc).timestamp()),
+        "covered_from": int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()),
+        "last_seen": {
+            member_id: int(datetime(2026, 3, 20, 12, tzinfo=timezone.utc).timestamp())
+            for member_id in ["11111111", "22222222", "33333333"]
+        },
+    }
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@freeze_time("2026-04-01")
+def test_run_limits_scans_that_cannot_continue_to_the_time_left(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.get_users = MagicMock(return_value=GET_MEMBERS_DICT)
+    mock_api.iter_events = Mock(return_value=[])
+    deadline = MagicMock(spec=Deadline, remaining=Mock(return_value=120.0))
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api,
+        bitwarden_vault_client=MagicMock(),
+        activity_ledger_store=LocalJsonStore(path=f"{tmp_path}/ledger.json"),
+        deadline=deadline,
+    )
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "event_window_days": 7}
+
+    with patch.object(offboard_handler, "_get_protected_users", return_value=set()):
+        offboard_handler.run(event)
+        offboard_handler.run(dict(event, use_activity_ledger=True))
+
+    assert mock_api.iter_events.call_args_list == [
+        call(start_date="2026-01-01", window_days=7, timeout=120.0),
+        call(
+            start_date="2026-01-01T00:00:00+00:00",
+            end_date="2026-04-01T00:00:00+00:00",
+            window_days=7,
+            timeout=120.0,
+        ),
+    ]
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.REMOVAL_CHUNK_SIZE", 2)
+def test_offboard_users_continues_removals_in_another_invocation(logger_mock: Mock, tmp_path: str) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    mock_api.remove_users_by_id.side_effect = lambda users: [TaskResult(item=user_id) for user_id in users]
+    all_users = {f"{i}": f"user{i}@example.com" for i in range(1, 6)}
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "dry_run": False}
+
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[False, True])
+    offboard_handler.offboard_users(set(all_users), all_users, set(), event=event)
+
+    mock_api.remove_users_by_id.assert_called_once_with({"1": "user1@example.com", "2": "user2@example.com"})
+    assert store.load() == {
+        "phase": "remove",
+        "remaining_removals": {"3": "user3@example.com", "4": "user4@example.com", "5": "user5@example.com"},
+    }
+    sqs_client.send_message.assert_called_once_with(
+        queue_url="https://sqs/bitwarden-manager", body=dict(event, resume=True)
+    )
+    mock_logger.info.assert_any_call("Removed 2 of 2 inactive members from bitwarden")
+
+    offboard_handler, store, sqs_client = _resumable_handler(mock_api, tmp_path, expired=[False, False])
+    offboard_handler.run(dict(event, resume=True))
+
+    assert mock_api.remove_users_by_id.call_args_list[1:] == [
+        call({"3": "user3@example.com", "4": "user4@example.com"}),
+        call({"5": "user5@example.com"}),
+    ]
+    mock_api.get_users.assert_not_called()
+    assert store.load() == {}
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_run_resume_requires_saved_progress(logger_mock: Mock, tmp_path: str) -> None:
+    offboard_handler, _, _ = _resumable_handler(MagicMock(spec=BitwardenPublicApi), tmp_path, expired=[])
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "resume": True}
+
+    with pytest.raises(ValueError, match="There is no offboarding progress to resume"):
+        offboard_handler.run(event)
+
+    with pytest.raises(ValueError, match="There is no offboarding progress to resume"):
+        OffboardInactiveUsers(bitwarden_api=MagicMock(), bitwarden_vault_client=MagicMock()).run(event)
+
+
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_continue_later_requires_a_progress_store_and_queue(logger_mock: Mock) -> None:
+    offboard_handler = OffboardInactiveUsers(bitwarden_api=MagicMock(), bitwarden_vault_client=MagicMock())
+
+    with pytest.raises(ValueError, match="A progress store and SQS client must be configured"):
+        offboard_handler._continue_later({"event_name": "offboard_inactive_users"}, {"phase": "scan"})
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_offboard_users_fans_removals_out_in_shards(logger_mock: Mock) -> None:
+    mock_logger = MagicMock()
+    logger_mock.return_value = mock_logger
+
+    mock_api = MagicMock(spec=BitwardenPublicApi)
+    sqs_client = MagicMock(spec=SqsClient)
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=mock_api, bitwarden_vault_client=MagicMock(), dry_run=False, sqs_client=sqs_client
+    )
+    all_users = {f"{i}": f"user{i}@example.com" for i in range(1, 6)}
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "removal_shard_size": 2}
+
+    offboard_handler.offboard_users(set(all_users), all_users, {"5"}, event=event)
+
+    sqs_client.send_messages.assert_called_once_with(
+        queue_url="https://sqs/bitwarden-manager",
+        bodies=[
+            {"event_name": "remove_users", "members": {"1": "user1@example.com", "2": "user2@example.com"}},
+            {"event_name": "remove_users", "members": {"3": "user3@example.com", "4": "user4@example.com"}},
+        ],
+    )
+    mock_api.remove_users_by_id.assert_not_called()
+    mock_logger.info.assert_any_call("Queued removal of 4 inactive members in 2 remove_users events")
+
+
+@mock.patch.dict(os.environ, {"BITWARDEN_MANAGER_QUEUE_URL": "https://sqs/bitwarden-manager"})
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_offboard_users_fan_out_clears_the_progress_of_a_resumed_run(logger_mock: Mock, tmp_path: str) -> None:
+    logger_mock.return_value = MagicMock()
+
+    offboard_handler, store, sqs_client = _resumable_handler(MagicMock(spec=BitwardenPublicApi), tmp_path, expired=[])
+    store.save({"phase": "scan", "end_date": "2026-04-01T00:00:00+00:00", "continuation_token": "page_3"})
+    all_users = {f"{i}": f"user{i}@example.com" for i in range(1, 4)}
+    event = {
+        "event_name": "offboard_inactive_users",
+        "inactivity_duration": 90,
+        "removal_shard_size": 2,
+        "resume": True,
+    }
+
+    offboard_handler.offboard_users(set(all_users), all_users, set(), event=event)
+
+    sqs_client.send_messages.assert_called_once()
+    assert store.load() == {}
+
+
+@mock.patch.dict(os.environ, {}, clear=True)
+@mock.patch("bitwarden_manager.handlers.offboard_inactive_users.get_bitwarden_logger")
+def test_offboard_users_fan_out_requires_a_queue(logger_mock: Mock) -> None:
+    offboard_handler = OffboardInactiveUsers(
+        bitwarden_api=MagicMock(), bitwarden_vault_client=MagicMock(), dry_run=False, sqs_client=MagicMock()
+    )
+    event = {"event_name": "offboard_inactive_users", "inactivity_duration": 90, "removal_shard_size": 2}
+
+    with pytest.raises(ValueError, match="BITWARDEN_MANAGER_QUEUE_URL must be configured"):
+        offboard_handler.offboard_users({"1"}, {"1": "user1@example.com"}, set(), event=event)
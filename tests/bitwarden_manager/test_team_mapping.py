@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenNotFoundException, BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
+from bitwarden_manager.clients.json_store import LocalJsonStore
+from bitwarden_manager.team_mapping import TeamMapping, get_groups_and_collections, rediscover_when_not_found
+
+
+def test_refresh_only_maps_teams_with_one_group_and_one_collection(tmp_path: str) -> None:
+    store = LocalJsonStore(path=f"{tmp_path}/team_mapping.json")
+    mapping = TeamMapping.load(store)
+    assert mapping.resolve("team-one") is None
+
+    mapping.refresh(
+        groups={"team-one": "group-one", "team-two": "duplicate", "team-three": "group-three", "team-four": "group-4"},
+        collections={
+            "team-one": {"id": "collection-one", "externalId": "dGVhbS1vbmU="},
+            "team-two": {"id": "collection-two", "externalId": "dGVhbS10d28="},
+            "team-three": {"id": "duplicate", "externalId": "dGVhbS10aHJlZQ=="},
+        },
+    )
+    mapping.save()
+
+    loaded = TeamMapping.load(store)
+    assert loaded.teams == {"team-one": ["group-one", "collection-one"]}
+    assert loaded.resolve("team-one") == ("group-one", "collection-one")
+    assert loaded.resolve("team-two") is None
+
+
+def test_get_groups_and_collections_only_discovers_unmapped_teams(tmp_path: str) -> None:
+    mapping = TeamMapping(
+        store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json"),
+        teams={"team-one": ["group-one", "collection-one"]},
+    )
+    mock_bitwarden = MagicMock(
+        spec=BitwardenPublicApi,
+        list_existing_groups=Mock(return_value={"team-two": "group-two"}),
+        list_existing_collections=Mock(
+            side_effect=[{}, {"team-two": {"id": "collection-two", "externalId": "dGVhbS10d28="}}]
+        ),
+    )
+    mock_vault = MagicMock(spec=BitwardenVaultClient)
+
+    groups, collections = get_groups_and_collections(
+        bitwarden_api=mock_bitwarden,
+        bitwarden_vault_client=mock_vault,
+        teams=["team-one", "team-two"],
+        team_mapping=mapping,
+    )
+
+    assert groups == {"team-one": "group-one", "team-two": "group-two"}
+    assert collections == {
+        "team-one": {"id": "collection-one", "externalId": "dGVhbS1vbmU="},
+        "team-two": {"id": "collection-two", "externalId": "dGVhbS10d28="},
+    }
+    mock_bitwarden.list_existing_groups.assert_called_once_with(["team-two"])
+    mock_vault.create_collections.assert_called_once_with(["team-two"])
+
+
+def test_get_groups_and_collections_without_discovery_when_every_team_is_mapped(tmp_path: str) -> None:
+    mapping = TeamMapping(
+        store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json"),
+        teams={"team-one": ["group-one", "collection-one"]},
+    )
+    mock_bitwarden = MagicMock(spec=BitwardenPublicApi)
+    mock_vault = MagicMock(spec=BitwardenVaultClient)
+
+    groups, _ = get_groups_and_collections(
+        bitwarden_api=mock_bitwarden, bitwarden_vault_client=mock_vault, teams=["team-one"], team_mapping=mapping
+    )
+
+    assert groups == {"team-one": "group-one"}
+    mock_bitwarden.list_existing_groups.assert_not_called()
+    mock_bitwarden.list_existing_collections.assert_not_called()
+    mock_vault.create_collections.assert_not_called()
+
+
+def test_rediscover_when_not_found_drops_the_stale_team_and_retries(tmp_path: str) -> None:
+    store = LocalJsonStore(path=f"{tmp_path}/team_mapping.json")
+    mapping = TeamMapping(
+        store=store,
+        teams={"team-one": ["group-one", "deleted-collection"], "team-two": ["group-two", "collection-two"]},
+    )
+    action = Mock(side_effect=[BitwardenNotFoundException("deleted-collection", "Collection not found"), "done"])
+
+    assert rediscover_when_not_found(mapping, action) == "done"
+
+    assert action.call_count == 2
+    assert mapping.teams == {"team-two": ["group-two", "collection-two"]}
+    assert TeamMapping.load(store).teams == {"team-two": ["group-two", "collection-two"]}
+
+
+def test_rediscover_when_not_found_raises_for_ids_that_are_not_mapped(tmp_path: str) -> None:
+    mapping = TeamMapping(
+        store=LocalJsonStore(path=f"{tmp_path}/team_mapping.json"),
+        teams={"team-two": ["group-two", "collection-two"]},
+    )
+    action = Mock(side_effect=BitwardenNotFoundException("collection-three", "Collection not found"))
+
+    with pytest.raises(BitwardenNotFoundException, match="Collection not found"):
+        rediscover_when_not_found(mapping, action)
+
+    action.assert_called_once()
+    assert mapping.teams == {"team-two": ["group-two", "collection-two"]}
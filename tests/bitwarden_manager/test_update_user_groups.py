@@ -1,10 +1,10 @@
-from unittest.mock import MagicMock
+from unittest.mock import ANY, MagicMock, Mock
 from typing import List
 
 import pytest
 from jsonschema.exceptions import ValidationError
 
-from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi
+from bitwarden_manager.clients.bitwarden_public_api import BitwardenPublicApi, MemberUpdate
 from bitwarden_manager.update_user_groups import UpdateUserGroups
 from bitwarden_manager.clients.user_management_api import UserManagementApi
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient
@@ -16,7 +16,8 @@ def test_update_user_groups() -> None:
         "username": "test.user",
         "email": "testemail@example.com",
     }
-    mock_client_bitwarden = MagicMock(spec=BitwardenPublicApi)
+    member_update = MemberUpdate({"id": "11111111", "type": 2, "permissions": None, "collections": None})
+    mock_client_bitwarden = MagicMock(spec=BitwardenPublicApi, get_member_update=Mock(return_value=member_update))
     mock_client_user_management = MagicMock(spec=UserManagementApi)
     mock_client_bitwarden_vault = MagicMock(spec=BitwardenVaultClient)
 
@@ -26,13 +27,19 @@ def test_update_user_groups() -> None:
         bitwarden_vault_client=mock_client_bitwarden_vault,
     ).run(event)
 
-    user_id = mock_client_bitwarden.fetch_user_id_by_email()
+    user_id = "11111111"
     managed_group_ids = mock_client_bitwarden.collate_user_group_ids()
     custom_group_ids: List[str] = []
 
     mock_client_bitwarden.associate_user_to_groups.assert_called_with(
         user_id=user_id, managed_group_ids=managed_group_ids, custom_group_ids=custom_group_ids
     )
+    mock_client_bitwarden.get_member_update.assert_called_once_with(email="testemail@example.com")
+    mock_client_bitwarden.fetch_user_id_by_email.assert_not_called()
+    mock_client_bitwarden.assign_custom_permissions_to_platsec_user.assert_called_once_with(
+        user=ANY, teams=ANY, member_update=member_update
+    )
+    mock_client_bitwarden.update_member.assert_called_once_with(member_update)
 
 
 def test_update_user_groups_rejects_bad_events() -> None:
@@ -11,6 +11,11 @@ from app import handler
 from bitwarden_manager.clients.aws_secretsmanager_client import AwsSecretsManagerClient
 from bitwarden_manager.clients.bitwarden_vault_client import BitwardenVaultClient, BitwardenVaultClientError
 from bitwarden_manager.handlers.offboard_inactive_users import OffboardInactiveUsers
+from bitwarden_manager.handlers.onboard_users import OnboardUsers
+from bitwarden_manager.handlers.reconcile_org import ReconcileOrg
+from bitwarden_manager.handlers.refresh_team_mapping import RefreshTeamMapping
+from bitwarden_manager.handlers.remove_users import RemoveUsers
+from bitwarden_manager.handlers.sync_team import SyncTeam
 from bitwarden_manager.offboard_user import OffboardUser
 from bitwarden_manager.onboard_user import OnboardUser
 from bitwarden_manager.export_vault import ExportVault
@@ -186,6 +191,81 @@ def test_handler_routes_remove_user(_: Mock) -> None:
         bitwarden_logout.assert_called_once()
 
 
+@mock.patch("boto3.client")
+def test_handler_routes_new_users(_: Mock) -> None:
+    event = dict(event_name="new_users", users=[{"username": "test.user", "email": "test.user@example.com"}])
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout") as bitwarden_logout:
+                with patch.object(OnboardUsers, "run") as onboard_users_mock:
+                    handler(event=event, context={})
+
+        onboard_users_mock.assert_called_once_with(event=event)
+        bitwarden_logout.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_handler_routes_sync_team(_: Mock) -> None:
+    event = dict(event_name="sync_team", team="team-one")
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout") as bitwarden_logout:
+                with patch.object(SyncTeam, "run") as sync_team_mock:
+                    handler(event=event, context={})
+
+        sync_team_mock.assert_called_once_with(event=event)
+        bitwarden_logout.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_handler_routes_reconcile_org(_: Mock) -> None:
+    event = dict(event_name="reconcile_org", dry_run=False)
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout") as bitwarden_logout:
+                with patch.object(ReconcileOrg, "run") as reconcile_org_mock:
+                    handler(event=event, context={})
+
+        reconcile_org_mock.assert_called_once_with(event=event)
+        bitwarden_logout.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_handler_routes_refresh_team_mapping(_: Mock) -> None:
+    event = dict(event_name="refresh_team_mapping")
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout") as bitwarden_logout:
+                with patch.object(RefreshTeamMapping, "run") as refresh_team_mapping_mock:
+                    handler(event=event, context={})
+
+        refresh_team_mapping_mock.assert_called_once_with(event=event)
+        bitwarden_logout.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_handler_routes_remove_users(_: Mock) -> None:
+    event = dict(event_name="remove_users", members={"11111111": "test.user01"})
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout") as bitwarden_logout:
+                with patch.object(RemoveUsers, "run") as remove_users_mock:
+                    handler(event=event, context={})
+
+        remove_users_mock.assert_called_once_with(event=event)
+        bitwarden_logout.assert_called_once()
+
+
 @mock.patch("boto3.client")
 def test_handler_routes_update_user_groups(_: Mock) -> None:
     event = dict(event_name="update_user_groups")
@@ -230,3 +310,20 @@ def test_handler_routes_offboard_inactive_users(_: Mock) -> None:
 
         offboard_inactive_users_mock.assert_called_once_with(event=event)
         bitwarden_logout.assert_called_once()
+
+
+@mock.patch("boto3.client")
+def test_handler_passes_the_lambda_deadline_to_offboard_inactive_users(_: Mock) -> None:
+    event = dict(event_name="offboard_inactive_users", inactivity_duration=90)
+    context = MagicMock(get_remaining_time_in_millis=MagicMock(return_value=900_000))
+    with responses.RequestsMock(assert_all_requests_are_fired=True) as rsps:
+        rsps.add(MOCKED_LOGIN)
+        with patch.object(AwsSecretsManagerClient, "get_secret_value") as secrets_manager_mock:
+            secrets_manager_mock.return_value = "23497858247589473589734805734853"
+            with patch.object(BitwardenVaultClient, "logout"):
+                with patch("bitwarden_manager.bitwarden_manager.OffboardInactiveUsers") as offboard_inactive_users_mock:
+                    handler(event=event, context=context)
+
+        deadline = offboard_inactive_users_mock.call_args.kwargs["deadline"]
+        assert 0 < deadline.remaining() <= 840.0
+        offboard_inactive_users_mock.return_value.run.assert_called_once_with(event=event)